@@ -27,11 +27,35 @@ Module layout
 -------------
 rtttl/
   __init__.py   ← public re-exports (this file)
-  constants.py  ← note table, style constants, defaults
-  notes.py      ← frequency calculation, style-char conversion
+  constants.py  ← frequency table, style constants, defaults
+  notes.py      ← frequency lookup, transpose / tempo, style-char conversion
   parser.py     ← RTTTL header + note-token parser
-  player.py     ← PlayRtttl (PWM driver, state machine)
-  melodies.py   ← built-in RTTTL strings
+  tokenizer.py  ← table-driven byte tokenizer (whole-song fast path)
+  compiler.py   ← pre-compiled note streams + compile cache
+  incremental.py ← incremental recompilation for live text editing
+  timeline.py   ← note-time index for seeking / position reporting
+  stream.py     ← chunked parser for file / byte-stream input
+  render.py     ← host-side PCM/WAV renderer (NumPy, not imported here)
+  synth.py      ← streaming PCM synthesis for I2S DACs (import explicitly)
+  corpus.py     ← parallel corpus validator, ``python -m rtttl.corpus`` (CPython)
+  freeze.py     ← frozen bytes-constant module generator, ``python -m rtttl.freeze``
+  service.py    ← local WAV rendering service with render cache (NumPy)
+  loadtest.py   ← load generator for the rendering service
+  search.py     ← name and melody search index, ``python -m rtttl.search``
+  simulate.py   ← virtual clock, fast-forward playback simulation
+  bench.py      ← benchmark suite, ``python -m rtttl.bench`` (CPython)
+  player.py     ← PlayRtttl (state machine)
+  async_player.py ← AsyncPlayRtttl (asyncio front-end, import explicitly)
+  timer_player.py ← TimerPlayRtttl (machine.Timer-driven, import explicitly)
+  thread_player.py ← ThreadedPlayer (engine thread + command queue, import explicitly)
+  multi_player.py ← MultiPlayer (many buzzers, one event heap)
+  sync.py       ← leader/follower sync across boards (import explicitly)
+  backends.py   ← output backends (PWM, null, recording)
+  compat.py     ← ticks_* functions with CPython fallbacks
+  timing.py     ← note-start lateness statistics, profiling counters
+  bank.py       ← binary melody bank (pre-parsed songs, loaded on demand)
+  melodies.py   ← built-in melodies: lazy views over melodies.bin
+  melodies_src.py ← source strings for melodies.bin (host only)
 """
 
 from .constants import (
@@ -44,21 +68,76 @@ from .constants import (
     DEFAULT_DURATION,
     DEFAULT_OCTAVE,
     DEFAULT_BPM,
+    REPEAT_OFF,
+    REPEAT_ONE,
+    REPEAT_ALL,
 )
-from .notes import get_frequency, style_char_to_divisor
-from .parser import parse_header, parse_next_note, SongHeader
+from .notes import (
+    FREQ_TABLE,
+    get_frequency,
+    key_of_frequency,
+    transpose_frequency,
+    style_char_to_divisor,
+    tone_length,
+)
+from .parser import parse_header, parse_next_note, parse_next_note_us, SongHeader
+from .tokenizer import tokenize, parse_song
+from .timeline import NoteIndex
+from .compiler import (
+    CompiledSong,
+    compile_rtttl,
+    compile_cached,
+    note_triple,
+    as_compiled,
+    clear_compile_cache,
+)
+from .bank import MelodyBank, BankView, write_bank
+from .stream import NoteStream, iter_notes
 from .player import PlayRtttl
+from .timing import LatenessStats, PlayerStats
+from .multi_player import MultiPlayer
+from .backends import OutputBackend, PWMBackend, NullBackend, RecordingBackend
 
 __all__ = [
     # Player
     "PlayRtttl",
+    "MultiPlayer",
+    "LatenessStats",
+    "PlayerStats",
+    # Backends
+    "OutputBackend",
+    "PWMBackend",
+    "NullBackend",
+    "RecordingBackend",
     # Parser
     "parse_header",
     "parse_next_note",
+    "parse_next_note_us",
+    "tokenize",
+    "parse_song",
     "SongHeader",
+    # Compiler
+    "CompiledSong",
+    "compile_rtttl",
+    "compile_cached",
+    "note_triple",
+    "as_compiled",
+    "clear_compile_cache",
+    "NoteIndex",
+    # Melody banks
+    "MelodyBank",
+    "BankView",
+    "write_bank",
+    # Streaming
+    "NoteStream",
+    "iter_notes",
     # Notes
+    "FREQ_TABLE",
     "get_frequency",
+    "key_of_frequency",
+    "transpose_frequency",
     "style_char_to_divisor",
+    "tone_length",
     # Constants
     "STYLE_CONTINUOUS",
     "STYLE_NATURAL",
@@ -69,4 +148,7 @@ __all__ = [
     "DEFAULT_DURATION",
     "DEFAULT_OCTAVE",
     "DEFAULT_BPM",
+    "REPEAT_OFF",
+    "REPEAT_ONE",
+    "REPEAT_ALL",
 ]
@@ -0,0 +1,101 @@
+"""
+rtttl/async_player.py
+~~~~~~~~~~~~~~~~~~~~~
+asyncio front-end for :class:`~rtttl.player.PlayRtttl`.
+
+Instead of polling ``update()`` every millisecond, the coroutine sleeps
+exactly until the next tone stop or note boundary, so the scheduler (and
+the CPU) stays idle during long notes and rests.  Works with MicroPython's
+``asyncio`` / ``uasyncio`` and with CPython ``asyncio``.
+
+Usage example::
+
+    import asyncio
+    from rtttl.async_player import AsyncPlayRtttl
+    from rtttl.melodies import RTTTL_MELODIES
+
+    player = AsyncPlayRtttl(pin=8)
+
+    async def main():
+        await player.play(RTTTL_MELODIES[21])           # wait until done
+        player.play_background(RTTTL_MELODIES[0])       # returns a Task
+        await other_work()
+        await player.wait()
+
+    asyncio.run(main())
+"""
+
+try:
+    import asyncio
+except ImportError:                     # older MicroPython firmware
+    import uasyncio as asyncio
+
+from .player import PlayRtttl
+
+try:
+    _sleep_ms = asyncio.sleep_ms        # MicroPython
+except AttributeError:                  # CPython
+    def _sleep_ms(ms):
+        return asyncio.sleep(ms / 1000)
+
+
+class AsyncPlayRtttl(PlayRtttl):
+    """RTTTL player driven by an asyncio task.
+
+    Takes the same arguments as :class:`~rtttl.player.PlayRtttl`; the
+    non-blocking ``start()``/``update()`` API keeps working as before.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task = None
+
+    async def play(self, rtttl, on_complete=None) -> bool:
+        """Play an RTTTL string or stream, returning when it has finished.
+
+        Returns:
+            ``True`` if the song played, ``False`` if it could not be parsed.
+        """
+        self.cancel()
+        if not self._start_any(rtttl, on_complete):
+            return False
+        await self._run()
+        return True
+
+    def play_background(self, rtttl, on_complete=None):
+        """Start playing in a background task.
+
+        Any song already playing in the background is cancelled first.
+
+        Returns:
+            The ``asyncio`` task, or ``None`` if the song could not be parsed.
+        """
+        self.cancel()
+        if not self._start_any(rtttl, on_complete):
+            return None
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def wait(self) -> None:
+        """Wait for the background song (if any) to finish."""
+        if self._task is not None:
+            await self._task
+
+    def cancel(self) -> None:
+        """Cancel background playback and silence the output."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        try:
+            while self.update():
+                await _sleep_ms(self._ms_until_next_event())
+        except asyncio.CancelledError:
+            self.stop()
+            raise
@@ -0,0 +1,89 @@
+"""
+rtttl/backends.py
+~~~~~~~~~~~~~~~~~
+Output backends for :class:`~rtttl.player.PlayRtttl`.
+
+A backend is anything with the two ``machine.PWM`` methods the player
+uses — ``freq(hz)`` and ``duty_u16(value)`` — so a raw ``PWM`` object works
+as well.  ``machine`` is only imported when a :class:`PWMBackend` is
+created, so the rest of the package imports fine on CPython.
+
+Usage example::
+
+    from rtttl import PlayRtttl
+    from rtttl.backends import RecordingBackend
+
+    rec = RecordingBackend()
+    player = PlayRtttl(backend=rec)
+    player.start("Nokia:d=4,o=5,b=112:8e6,8d6,f#5,g#5")
+    print(rec.events)   # [(t_ms, "freq", 1318), (t_ms, "duty", 32768), …]
+"""
+
+from .compat import ticks_ms
+
+
+class OutputBackend:
+    """Interface expected by the player."""
+
+    def freq(self, hz: int) -> None:
+        """Set the output frequency in Hz."""
+        raise NotImplementedError
+
+    def duty_u16(self, value: int) -> None:
+        """Set the duty cycle (0 = silent, 32768 = 50 % square wave)."""
+        raise NotImplementedError
+
+
+class PWMBackend(OutputBackend):
+    """Hardware PWM output on a GPIO pin.
+
+    Args:
+        pin: GPIO pin number connected to the buzzer/speaker.
+    """
+
+    def __init__(self, pin: int):
+        from machine import PWM, Pin   # deferred: only needed on hardware
+
+        self._pwm = PWM(Pin(pin))
+        self._pwm.freq(1000)       # arbitrary valid starting frequency
+        self._pwm.duty_u16(0)      # silent
+
+        # Bind the hot-path methods directly; no wrapper call per note.
+        self.freq     = self._pwm.freq
+        self.duty_u16 = self._pwm.duty_u16
+
+
+class NullBackend(OutputBackend):
+    """Discards all output.  Useful for benchmarks and dry runs."""
+
+    def freq(self, hz: int) -> None:
+        pass
+
+    def duty_u16(self, value: int) -> None:
+        pass
+
+
+class RecordingBackend(OutputBackend):
+    """Records every output change as a timestamped event.
+
+    Events are ``(timestamp_ms, "freq", hz)`` or
+    ``(timestamp_ms, "duty", value)`` tuples appended to :attr:`events`.
+
+    Args:
+        clock: Zero-argument callable returning the timestamp
+               (defaults to ``ticks_ms``).
+    """
+
+    def __init__(self, clock=ticks_ms):
+        self._clock = clock
+        self.events = []
+
+    def freq(self, hz: int) -> None:
+        self.events.append((self._clock(), "freq", hz))
+
+    def duty_u16(self, value: int) -> None:
+        self.events.append((self._clock(), "duty", value))
+
+    def clear(self) -> None:
+        """Forget all recorded events."""
+        self.events = []
@@ -0,0 +1,350 @@
+"""
+rtttl/bank.py
+~~~~~~~~~~~~~
+Compact binary melody bank with on-demand loading.
+
+A bank file holds many songs, each stored pre-parsed, so loading one costs
+a seek and a read — no RTTTL parsing — and songs that never play never take
+up RAM.
+
+File layout (all integers little-endian)::
+
+    header   4s magic b"RTTB", u8 version, u8 reserved, u16 song count
+    index    count × (u32 offset, u32 length, 24s name, NUL-padded)
+    records  one per song, at its index offset:
+               u16 bpm, u8 default_duration, u8 default_octave,
+               u8 number_of_loops, u8 header style, u8 compiled style,
+               u8 full name length, u16 note count, u16 RTTTL text length,
+               note count × (u32 frequency, u32 tone_us, u32 gap_us),
+               RTTTL text (UTF-8), full name (UTF-8)
+
+Names longer than 24 bytes are cut at a character boundary in the index;
+the full name (up to 255 bytes) then follows the text of the record.  For
+shorter names the full name length is 0.
+
+The note triples are the ``CompiledSong.notes`` array as stored in memory.
+
+Usage example::
+
+    from rtttl.bank import MelodyBank
+
+    bank = MelodyBank("/songs.bin")
+    player.start(bank.load("Nokia"))     # CompiledSong, ready to play
+
+Rebuild the built-in ``melodies.bin`` on a host with::
+
+    python -m rtttl.bank
+"""
+
+import struct
+import sys
+from array import array
+
+from .compiler import CompiledSong, compile_rtttl
+from .constants import STYLE_DEFAULT
+from .parser import SongHeader
+
+BANK_MAGIC   = b"RTTB"
+BANK_VERSION = 2
+
+_HEADER = "<4sBBH"
+_ENTRY  = "<II24s"
+_RECORD = "<HBBBBBBHH"
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_ENTRY_SIZE  = struct.calcsize(_ENTRY)
+_RECORD_SIZE = struct.calcsize(_RECORD)
+_NAME_MAX    = 24
+_FULL_MAX    = 255
+_LITTLE      = sys.byteorder == "little"
+
+
+class MelodyBank:
+    """Read songs from a bank on demand.
+
+    Args:
+        source: Path of a bank file (opened on first access), an open binary
+                file, or a bytes-like object such as a ``bytes`` constant or
+                an ``mmap`` (read without copying the whole bank).
+    """
+
+    def __init__(self, source):
+        self._path  = source if isinstance(source, str) else None
+        self._file  = None
+        self._buf   = None
+        self._count = -1
+        if self._path is None:
+            self._attach(source)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        self._open()
+        return self._count
+
+    def name(self, index: int) -> str:
+        """Song name, in full even if it is cut short in the index."""
+        offset, _, name = self._entry(index)
+        return self._full_name(offset, name)
+
+    def names(self):
+        """Iterate over all song names in bank order."""
+        for i in range(len(self)):
+            yield self.name(i)
+
+    def index_of(self, name: str) -> int:
+        """Position of the song called *name*.
+
+        Raises:
+            KeyError: if there is no such song.
+        """
+        key = _prefix(name.encode("utf-8"), _NAME_MAX)
+        for i in range(len(self)):
+            offset, _, prefix = self._entry(i)
+            if prefix.encode() == key and self._full_name(offset, prefix) == name:
+                return i
+        raise KeyError(name)
+
+    def load(self, key) -> CompiledSong:
+        """Load one song, by position or by name, as a :class:`CompiledSong`."""
+        offset, length, name = self._entry(self._index(key))
+        rec = self._read(offset, _RECORD_SIZE)
+        bpm, duration, octave, loops, header_style, style, name_len, count, text_len = \
+            struct.unpack(_RECORD, rec)
+        if name_len:
+            name = self._read_name(offset, count, text_len, name_len)
+
+        h = SongHeader()
+        h.name                   = name
+        h.default_duration       = duration
+        h.default_octave         = octave
+        h.bpm                    = bpm
+        h.time_for_whole_note_ms = (60_000 // bpm) * 4
+        h.time_for_whole_note_us = 240_000_000 // bpm
+        h.number_of_loops        = loops
+        h.style_divisor          = header_style
+        h.notes_start            = 0
+
+        raw = self._read(offset + _RECORD_SIZE, count * 12)
+        if self._buf is not None and _LITTLE and hasattr(raw, "cast"):
+            # In-memory bank: the notes are a read-only view, not a copy
+            # (CPython; MicroPython's memoryview cannot cast).
+            return CompiledSong(h, raw.cast("I"), style)
+        # bytearray initialisers are copied raw by both CPython and MicroPython
+        notes = array("I", bytearray(raw))
+        if not _LITTLE:
+            notes.byteswap()
+        return CompiledSong(h, notes, style)
+
+    def source(self, key) -> str:
+        """Load the original RTTTL string of one song, by position or name."""
+        offset, length, _ = self._entry(self._index(key))
+        count, text_len = struct.unpack("<HH", self._read(offset + _RECORD_SIZE - 4, 4))
+        start = offset + _RECORD_SIZE + count * 12
+        return str(bytes(self._read(start, text_len)), "utf-8")
+
+    def close(self) -> None:
+        """Close the bank file (it is reopened on next access if possible)."""
+        if self._file is not None and self._path is not None:
+            self._file.close()
+            self._file = None
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _attach(self, source) -> None:
+        if hasattr(source, "read") and hasattr(source, "seek"):
+            self._file = source
+        else:
+            self._buf = memoryview(source)
+        magic, version, _, count = struct.unpack(_HEADER, self._read(0, _HEADER_SIZE))
+        if magic != BANK_MAGIC or version != BANK_VERSION:
+            raise ValueError("not an RTTTL bank (version %d)" % BANK_VERSION)
+        self._count = count
+
+    def _open(self) -> None:
+        if self._file is None and self._buf is None:
+            self._attach(open(self._path, "rb"))
+
+    def _read(self, offset: int, n: int):
+        self._open()
+        if self._buf is not None:
+            return self._buf[offset:offset + n]
+        self._file.seek(offset)
+        return self._file.read(n)
+
+    def _index(self, key) -> int:
+        if isinstance(key, str):
+            return self.index_of(key)
+        count = len(self)
+        if key < 0:
+            key += count
+        if not 0 <= key < count:
+            raise IndexError("bank index out of range")
+        return key
+
+    def _full_name(self, offset: int, prefix: str) -> str:
+        if len(prefix.encode()) < _NAME_MAX - 3:
+            return prefix               # too short to have been cut
+        name_len, count, text_len = struct.unpack(
+            "<BHH", self._read(offset + _RECORD_SIZE - 5, 5))
+        if not name_len:
+            return prefix
+        return self._read_name(offset, count, text_len, name_len)
+
+    def _read_name(self, offset: int, count: int, text_len: int, name_len: int) -> str:
+        start = offset + _RECORD_SIZE + count * 12 + text_len
+        return str(bytes(self._read(start, name_len)), "utf-8")
+
+    def _entry(self, index: int):
+        offset, length, raw = struct.unpack(
+            _ENTRY, self._read(_HEADER_SIZE + index * _ENTRY_SIZE, _ENTRY_SIZE))
+        raw = bytes(raw)
+        end = raw.find(b"\0")
+        return offset, length, str(raw[:end] if end >= 0 else raw, "utf-8")
+
+
+class BankView:
+    """Read-only, list-like view of RTTTL strings stored in a bank.
+
+    Items are loaded when accessed, so only songs that are actually used
+    occupy RAM.  :meth:`song` returns the pre-parsed form instead.
+
+    Args:
+        bank:    :class:`MelodyBank` to read from.
+        indices: Bank positions in view order (default: the whole bank).
+    """
+
+    def __init__(self, bank: MelodyBank, indices=None):
+        self._bank    = bank
+        self._indices = indices
+
+    def __len__(self) -> int:
+        if self._indices is None:
+            return len(self._bank)
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):        # a list, as slicing a list gives
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return self._bank.source(self._position(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def song(self, i: int) -> CompiledSong:
+        """Item *i* as a :class:`CompiledSong` (no parsing needed)."""
+        return self._bank.load(self._position(i))
+
+    def name(self, i: int) -> str:
+        """Name of item *i* (read from the bank index only)."""
+        return self._bank.name(self._position(i))
+
+    def _position(self, i: int) -> int:
+        if self._indices is None:
+            return i
+        return self._indices[i]
+
+
+# ---------------------------------------------------------------------------
+# Writing banks
+# ---------------------------------------------------------------------------
+
+def pack_song(rtttl: str, style_divisor: int = STYLE_DEFAULT):
+    """
+    Compile one RTTTL string into a bank record.
+
+    Returns:
+        Tuple ``(name, record)`` of ``bytes`` for :func:`write_records`, or
+        ``None`` if the header cannot be parsed.
+    """
+    song = compile_rtttl(rtttl, style_divisor)
+    if song is None:
+        return None
+    return pack_compiled(song, rtttl)
+
+
+def pack_compiled(song: CompiledSong, rtttl: str = ""):
+    """
+    Pack an already compiled song (and optionally its text) as a bank record.
+
+    Returns:
+        Tuple ``(name, record)`` of ``bytes`` for :func:`write_records`.
+    """
+    h = song.header
+    notes = array("I", song.notes)
+    if not _LITTLE:
+        notes.byteswap()
+    text = rtttl.encode("utf-8")
+    name = h.name.encode("utf-8")
+    prefix = _prefix(name, _NAME_MAX)
+    full = _prefix(name, _FULL_MAX) if prefix != name else b""
+    record = struct.pack(_RECORD, h.bpm, h.default_duration, h.default_octave,
+                         h.number_of_loops, h.style_divisor, song.style_divisor, len(full),
+                         song.note_count, len(text)) + bytes(notes) + text + full
+    return prefix, record
+
+
+def _prefix(data: bytes, n: int) -> bytes:
+    """The first *n* bytes of UTF-8 *data*, without splitting a character."""
+    if len(data) <= n:
+        return data
+    while n and (data[n] & 0xC0) == 0x80:
+        n -= 1
+    return data[:n]
+
+
+def write_records(f, records) -> int:
+    """
+    Write packed ``(name, record)`` pairs from :func:`pack_song` as a bank.
+
+    Returns:
+        Number of songs written.
+    """
+    records = list(records)
+    offset = _HEADER_SIZE + len(records) * _ENTRY_SIZE
+    f.write(struct.pack(_HEADER, BANK_MAGIC, BANK_VERSION, 0, len(records)))
+    for name, rec in records:
+        f.write(struct.pack(_ENTRY, offset, len(rec), name))
+        offset += len(rec)
+    for _, rec in records:
+        f.write(rec)
+    return len(records)
+
+
+def write_bank(songs, f, style_divisor: int = STYLE_DEFAULT) -> int:
+    """
+    Compile RTTTL strings and write them to *f* as a melody bank.
+
+    Args:
+        songs:         Iterable of RTTTL strings.
+        f:             Writable binary file object.
+        style_divisor: Fallback style the notes are split with.  Players
+                       using another default style re-split on load.
+
+    Returns:
+        Number of songs written.
+
+    Raises:
+        ValueError: if a song header cannot be parsed.
+    """
+    records = []
+    for rtttl in songs:
+        packed = pack_song(rtttl, style_divisor)
+        if packed is None:
+            raise ValueError("invalid RTTTL header: %r" % rtttl[:40])
+        records.append(packed)
+    return write_records(f, records)
+
+
+if __name__ == "__main__":
+    import os
+    from .melodies import BANK_PATH
+    from .melodies_src import RTTTL_MELODIES as _SOURCES
+
+    with open(BANK_PATH, "wb") as out:
+        n = write_bank(_SOURCES, out)
+    print("wrote %d songs, %d bytes to %s" % (n, os.path.getsize(BANK_PATH), BANK_PATH))
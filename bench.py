@@ -0,0 +1,356 @@
+"""
+rtttl/bench.py
+~~~~~~~~~~~~~~
+Benchmark suite for the parser, compiler and player (CPython only).
+
+Runs on a host with a :class:`~rtttl.simulate.VirtualClock` and a fake PWM
+(:class:`NullBackend`), so results do not depend on real time passing.  Reported metrics:
+
+* notes parsed per second with ``parse_header`` + ``parse_next_note``,
+  over ``RTTTL_MELODIES`` and over a synthetic large corpus
+* notes parsed per second with the byte tokenizer (``parse_song`` into a
+  reused buffer) over the same corpus
+* notes compiled per second with ``compile_rtttl``
+* ``get_frequency`` calls per second
+* cost of an idle ``PlayRtttl.update()`` call versus one that starts a note
+* bytes allocated per note (tracemalloc peak) for parsing and playback
+
+Usage::
+
+    python -m rtttl.bench                    # run and print
+    python -m rtttl.bench --compare          # compare with the stored baseline
+    python -m rtttl.bench --save-baseline    # overwrite the stored baseline
+
+Higher is better for ``*_per_s`` metrics, lower is better for the rest.
+
+Absolute timings move with the host and its load, so ``--compare`` does
+not judge them directly: every timed metric is first taken relative to
+the ``parse_next_note`` corpus loop (``REFERENCE_METRIC``) measured in the
+same run.  Allocation counts are compared as they are.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .backends import NullBackend
+from .compiler import compile_rtttl
+from .melodies import RTTTL_MELODIES
+from .notes import get_frequency
+from .parser import parse_header, parse_next_note
+from .tokenizer import parse_song
+from .player import PlayRtttl
+from .simulate import VirtualClock
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "bench_baseline.json")
+
+# Timed metrics are compared as ratios to this one
+REFERENCE_METRIC = "parse_corpus_notes_per_s"
+
+_NOTE_LETTERS = ("c", "c#", "d", "d#", "e", "f", "f#", "g", "g#", "a", "a#", "b", "p")
+_DURATIONS    = ("", "1", "2", "4", "8", "16", "32")
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def synthetic_corpus(n_songs: int = 500, notes_per_song: int = 200,
+                     seed: int = 1) -> list:
+    """Deterministic random RTTTL songs for throughput measurements."""
+    rnd = random.Random(seed)
+    songs = []
+    for i in range(n_songs):
+        notes = []
+        for _ in range(notes_per_song):
+            tok = rnd.choice(_DURATIONS) + rnd.choice(_NOTE_LETTERS)
+            if rnd.random() < 0.2:
+                tok += "."
+            if tok[-1] != "p" and rnd.random() < 0.5:
+                tok += str(rnd.randint(4, 7))
+            notes.append(tok)
+        header = "Synth%d:d=%d,o=%d,b=%d" % (
+            i, rnd.choice((4, 8, 16)), rnd.randint(4, 6), rnd.randint(60, 240))
+        songs.append(header + ":" + ",".join(notes))
+    return songs
+
+
+def _count_notes(songs) -> int:
+    return sum(compile_rtttl(s).note_count for s in songs)
+
+
+def _best_of(fn, repeat: int) -> float:
+    """Smallest wall time of *repeat* calls to *fn*, in seconds.
+
+    One untimed warm-up call is made first.
+    """
+    fn()
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        if best is None or dt < best:
+            best = dt
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def _parse_all(songs) -> None:
+    for rtttl in songs:
+        header = parse_header(rtttl)
+        idx = header.notes_start
+        end = len(rtttl)
+        while idx < end:
+            idx = parse_next_note(rtttl, idx, header)[3]
+
+
+def bench_parse(songs, repeat: int = 5) -> float:
+    """Notes parsed per second with ``parse_header`` + ``parse_next_note``."""
+    return _count_notes(songs) / _best_of(lambda: _parse_all(songs), repeat)
+
+
+def bench_tokenize(songs, repeat: int = 5) -> float:
+    """Notes parsed per second with ``parse_song`` on pre-encoded songs."""
+    encoded = [s.encode() for s in songs]
+    buffers = [parse_song(e)[1] for e in encoded]
+
+    def run():
+        for data, out in zip(encoded, buffers):
+            parse_song(data, out)
+    return _count_notes(songs) / _best_of(run, repeat)
+
+
+def bench_compile(songs, repeat: int = 5) -> float:
+    """Notes compiled per second with ``compile_rtttl``."""
+    def run():
+        for s in songs:
+            compile_rtttl(s)
+    return _count_notes(songs) / _best_of(run, repeat)
+
+
+def bench_get_frequency(calls: int = 100_000, repeat: int = 5) -> float:
+    """``get_frequency`` calls per second."""
+    def run():
+        for i in range(calls):
+            get_frequency(i % 13, 4 + (i & 3))
+    return calls / _best_of(run, repeat)
+
+
+def bench_update(calls: int = 50_000, repeat: int = 5):
+    """Cost of ``PlayRtttl.update()`` in nanoseconds per call.
+
+    Returns:
+        Tuple ``(idle_ns, note_boundary_ns)``.
+    """
+    song = synthetic_corpus(1, 400, seed=7)[0].replace(":", ":l=2,", 1)
+    clock = VirtualClock()
+    player = PlayRtttl(backend=NullBackend(), clock=clock)
+    player.start(song)
+    update = player.update
+
+    # Idle: the clock never reaches the next note.
+    def idle():
+        for _ in range(calls):
+            update()
+    idle_s = _best_of(idle, repeat)
+
+    # Note boundary: jump the clock to the next note on every call.
+    def boundary():
+        for _ in range(calls):
+            clock.now_us = player._next_action_time
+            if not update():
+                player.start(song)
+    boundary_s = _best_of(boundary, repeat)
+    return idle_s / calls * 1e9, boundary_s / calls * 1e9
+
+
+def bench_alloc(songs):
+    """Mean tracemalloc peak (bytes) per parsed note and per played note.
+
+    Returns:
+        Tuple ``(parse_bytes_per_note, update_bytes_per_note)``.
+    """
+    # Parsing
+    total = notes = 0
+    tracemalloc.start()
+    for rtttl in songs:
+        header = parse_header(rtttl)
+        idx = header.notes_start
+        while idx < len(rtttl):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            idx = parse_next_note(rtttl, idx, header)[3]
+            total += tracemalloc.get_traced_memory()[1] - base
+            notes += 1
+    tracemalloc.stop()
+    parse_bytes = total / notes
+
+    # Playback: one update() per note boundary
+    clock = VirtualClock()
+    total = notes = 0
+    player = PlayRtttl(backend=NullBackend(), clock=clock)
+    for rtttl in songs:
+        player.start(rtttl)
+    tracemalloc.start()
+    for rtttl in songs:
+        player.start(rtttl)
+        while True:
+            clock.now_us = player._next_action_time
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            playing = player.update()
+            total += tracemalloc.get_traced_memory()[1] - base
+            notes += 1
+            if not playing:
+                break
+    tracemalloc.stop()
+    return parse_bytes, total / notes
+
+
+def run_all(quick: bool = False) -> dict:
+    """Run every benchmark and return ``{metric: value}``.
+
+    The timed benchmarks run in interleaved rounds and the best round of
+    each is kept, so a burst of load on the host hits all metrics alike
+    instead of one of them.
+    """
+    rounds = 3 if quick else 7
+    corpus = synthetic_corpus(100 if quick else 500)
+    results = {}
+    for _ in range(rounds):
+        idle_ns, boundary_ns = bench_update(10_000 if quick else 50_000, 1)
+        sample = {
+            "parse_melodies_notes_per_s": bench_parse(RTTTL_MELODIES, 1),
+            "parse_corpus_notes_per_s":   bench_parse(corpus, 1),
+            "tokenize_corpus_notes_per_s": bench_tokenize(corpus, 1),
+            "compile_corpus_notes_per_s": bench_compile(corpus, 1),
+            "get_frequency_calls_per_s":  bench_get_frequency(repeat=1),
+            "update_idle_ns":             idle_ns,
+            "update_note_ns":             boundary_ns,
+        }
+        for name, value in sample.items():
+            best = results.get(name)
+            if best is None or (value > best if name.endswith("_per_s")
+                                else value < best):
+                results[name] = value
+    parse_alloc, update_alloc = bench_alloc(RTTTL_MELODIES)
+    results["parse_alloc_bytes_per_note"] = parse_alloc
+    results["update_alloc_bytes_per_note"] = update_alloc
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baseline handling
+# ---------------------------------------------------------------------------
+
+def save_baseline(results: dict, path: str = BASELINE_PATH) -> None:
+    data = {
+        "python":   platform.python_implementation() + " " + platform.python_version(),
+        "platform": platform.platform(),
+        "results":  results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def relative(results: dict) -> dict:
+    """Timed metrics of *results* relative to ``REFERENCE_METRIC``.
+
+    ``*_per_s`` metrics become multiples of the reference throughput and
+    ``*_ns`` metrics the number of reference notes that fit in that time,
+    so both cancel out the speed of the host.  Other metrics are returned
+    unchanged and the reference itself is left out.
+    """
+    ref = results[REFERENCE_METRIC]
+    out = {}
+    for name, value in results.items():
+        if name == REFERENCE_METRIC:
+            continue
+        if name.endswith("_per_s"):
+            value = value / ref
+        elif name.endswith("_ns"):
+            value = value * ref / 1e9
+        out[name] = value
+    return out
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.20):
+    """Compare *results* with *baseline*, both as returned by :func:`run_all`.
+
+    Timed metrics are compared through :func:`relative`, so a faster or
+    slower host does not count as a change.
+
+    Returns:
+        Tuple ``(lines, regressions)`` — printable report lines and the names
+        of metrics that got worse by more than *threshold* (a fraction).
+    """
+    lines = []
+    regressions = []
+    results = relative(results)
+    baseline = relative(baseline) if REFERENCE_METRIC in baseline else {}
+    for name in sorted(results):
+        value = results[name]
+        base = baseline.get(name)
+        if not base:
+            lines.append("%-30s %14.4g   (no baseline)" % (name, value))
+            continue
+        change = (value - base) / base
+        higher_is_better = name.endswith("_per_s")
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        lines.append("%-30s %14.4g %14.4g %+8.1f%%%s"
+                     % (name, value, base, change * 100, flag))
+    return lines, regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtttl.bench", description=__doc__.split("\n\n")[0])
+    ap.add_argument("--quick", action="store_true", help="fewer repeats, smaller corpus")
+    ap.add_argument("--compare", action="store_true", help="compare with the stored baseline")
+    ap.add_argument("--save-baseline", action="store_true", help="store results as the new baseline")
+    ap.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    ap.add_argument("--threshold", type=float, default=0.20,
+                    help="relative change counted as a regression (default 0.20)")
+    args = ap.parse_args(argv)
+
+    results = run_all(quick=args.quick)
+
+    if args.compare:
+        lines, regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        print("timed metrics relative to", REFERENCE_METRIC)
+        print("%-30s %14s %14s %9s" % ("metric", "current", "baseline", "change"))
+        for line in lines:
+            print(line)
+        if args.save_baseline:
+            save_baseline(results, args.baseline)
+        return 1 if regressions else 0
+
+    for name in sorted(results):
+        print("%-30s %14.1f" % (name, results[name]))
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print("baseline written to", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+rtttl/compat.py
+~~~~~~~~~~~~~~~
+MicroPython ``time.ticks_*`` functions, with CPython fallbacks.
+
+On the device these are the native functions.  On a host they are built on
+``time.monotonic_ns()`` so the player and its tools run unchanged on CI.
+The fallbacks do not wrap around, so plain ``+`` / ``-`` arithmetic on the
+returned values stays valid.
+
+:func:`low_power_sleep` uses ``machine.idle`` / ``machine.lightsleep``
+where they exist and falls back to :func:`sleep_ms`.
+"""
+
+from .constants import LIGHTSLEEP_MIN_MS
+
+try:
+    from time import ticks_ms, ticks_us, ticks_diff, ticks_add, sleep_ms
+except ImportError:                                 # CPython
+    import time as _time
+
+    def ticks_ms() -> int:
+        return _time.monotonic_ns() // 1_000_000
+
+    def ticks_us() -> int:
+        return _time.monotonic_ns() // 1_000
+
+    def ticks_diff(a: int, b: int) -> int:
+        return a - b
+
+    def ticks_add(t: int, delta: int) -> int:
+        return t + delta
+
+    def sleep_ms(ms: int) -> None:
+        _time.sleep(ms / 1000)
+
+try:
+    from machine import idle as _idle, lightsleep as _lightsleep
+except ImportError:                                 # CPython, or a port without them
+    _idle = _lightsleep = None
+
+
+def low_power_sleep(ms: int, output_active: bool) -> None:
+    """
+    Sleep *ms* milliseconds in the lowest-power mode that keeps the output
+    correct.
+
+    While a tone sounds, the PWM clock must keep running, so the CPU only
+    idles (``machine.idle()`` wakes on the next interrupt, at least once per
+    millisecond tick).  During a rest of at least ``LIGHTSLEEP_MIN_MS`` the
+    output is silent and ``machine.lightsleep()`` stops the clocks instead.
+
+    Note that on some ports light sleep suspends the USB serial connection.
+
+    Args:
+        ms:            Time to sleep.
+        output_active: ``True`` while a tone is sounding.
+    """
+    if _lightsleep is None:
+        sleep_ms(ms)
+    elif not output_active and ms >= LIGHTSLEEP_MIN_MS:
+        _lightsleep(ms)
+    else:
+        until = ticks_add(ticks_ms(), ms)
+        while ticks_diff(until, ticks_ms()) > 0:
+            _idle()
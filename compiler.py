@@ -0,0 +1,240 @@
+"""
+rtttl/compiler.py
+~~~~~~~~~~~~~~~~~
+Compile RTTTL strings into compact, pre-computed note streams.
+
+A compiled song stores one ``(frequency, tone_us, gap_us)`` triple per note
+in a flat ``array('I')``, so the player only has to index into it while a
+song is playing — no string scanning, no frequency or style maths and no
+per-note allocations.  Times are in microseconds, so the tempo is not
+rounded to whole milliseconds per beat.
+
+Usage example::
+
+    from rtttl.compiler import compile_rtttl
+
+    song = compile_rtttl("Nokia:d=4,o=5,b=112:8e6,8d6,f#5,g#5")
+    for i in range(song.note_count):
+        freq, tone_us, gap_us = song.note(i)
+"""
+
+from array import array
+
+from .constants import STYLE_DEFAULT, COMPILE_CACHE_SIZE, TEMPO_ONE
+from .notes import (get_frequency, tone_length, transpose_frequency,
+                    tempo_factor, scale_duration)
+from .timeline import NoteIndex
+from .tokenizer import parse_song
+
+
+class CompiledSong:
+    """Pre-parsed note stream for one RTTTL string.
+
+    Attributes:
+        header:        :class:`~rtttl.parser.SongHeader` of the source string.
+        notes:         Flat ``array('I')`` of ``frequency, tone_us, gap_us``
+                       triples.  A frequency of 0 marks a rest.  Songs
+                       loaded from an in-memory melody bank hold a
+                       read-only ``memoryview`` of the bank instead.
+        style_divisor: Style the tone/gap split was computed with.
+        note_count:    Number of notes in one pass of the song.
+    """
+
+    def __init__(self, header, notes, style_divisor: int):
+        self.header        = header
+        self.notes         = notes
+        self.style_divisor = style_divisor
+        self.note_count    = len(notes) // 3
+        self._index        = None
+
+    def note(self, i: int):
+        """Return ``(frequency, tone_us, gap_us)`` for note *i*."""
+        i *= 3
+        notes = self.notes
+        return notes[i], notes[i + 1], notes[i + 2]
+
+    def with_style(self, style_divisor: int):
+        """Return this song with its notes re-split for *style_divisor*.
+
+        Returns ``self`` if nothing changes, including when the song header
+        fixes the style with ``s=``.
+        """
+        if style_divisor == self.style_divisor or \
+                self.header.style_divisor != STYLE_DEFAULT:
+            return self
+        notes = array('I', self.notes)
+        for i in range(0, len(notes), 3):
+            if notes[i]:
+                duration_us = notes[i + 1] + notes[i + 2]
+                tone_us = tone_length(duration_us, style_divisor)
+                notes[i + 1] = tone_us
+                notes[i + 2] = duration_us - tone_us
+        song = CompiledSong(self.header, notes, style_divisor)
+        song._index = self._index       # note start times do not change
+        return song
+
+    def transposed(self, semitones: int):
+        """Return this song shifted by *semitones* (negative shifts down).
+
+        Pitches are clamped to the range of
+        :data:`~rtttl.notes.FREQ_TABLE`; timing is unchanged.
+        """
+        if not semitones:
+            return self
+        notes = array('I', self.notes)
+        for i in range(0, len(notes), 3):
+            notes[i] = transpose_frequency(notes[i], semitones)
+        song = CompiledSong(self.header, notes, self.style_divisor)
+        song._index = self._index       # note start times do not change
+        return song
+
+    def with_tempo(self, scale):
+        """Return this song played *scale* times as fast (2 = double speed).
+
+        The header still describes the original tempo.
+        """
+        factor = tempo_factor(scale)
+        if factor == TEMPO_ONE:
+            return self
+        notes = array('I', self.notes)
+        for i in range(0, len(notes), 3):
+            notes[i + 1] = scale_duration(notes[i + 1], factor)
+            notes[i + 2] = scale_duration(notes[i + 2], factor)
+        return CompiledSong(self.header, notes, self.style_divisor)
+
+    def index(self, rtttl=None):
+        """Return the :class:`~rtttl.timeline.NoteIndex` of this song.
+
+        It is built on first use and kept with the song.  Pass the source
+        text as *rtttl* to also record the token offsets.
+        """
+        index = self._index
+        if index is None or (rtttl is not None and index.offsets is None):
+            index = self._index = NoteIndex(self, rtttl)
+        return index
+
+    def duration_us(self) -> int:
+        """Length of one pass of the song in microseconds (loops excluded)."""
+        notes = self.notes
+        total = 0
+        for i in range(0, len(notes), 3):
+            total += notes[i + 1] + notes[i + 2]
+        return total
+
+    def duration_ms(self) -> int:
+        """Length of one pass of the song in milliseconds (loops excluded)."""
+        return self.duration_us() // 1000
+
+
+def note_triple(note_index: int, octave: int, duration_us: int, style: int):
+    """
+    Turn one tokenizer note into a compiled ``(frequency, tone_us, gap_us)``.
+
+    Args:
+        note_index:  Semitone index from the tokenizer; above 11 is a rest.
+        octave:      Octave of the note.
+        duration_us: Full note duration in microseconds.
+        style:       Style divisor that splits the tone from the gap.
+    """
+    if note_index <= 11:          # pitched note
+        tone_us = tone_length(duration_us, style)
+        return get_frequency(note_index, octave), tone_us, duration_us - tone_us
+    return 0, 0, duration_us      # rest / pause
+
+
+def compile_rtttl(rtttl: str, style_divisor: int = STYLE_DEFAULT):
+    """
+    Parse a whole RTTTL string into a :class:`CompiledSong`.
+
+    A one-song melody bank in a bytes-like object (a frozen song constant
+    from :mod:`rtttl.freeze`) is loaded instead, without parsing.
+
+    Args:
+        rtttl:         Full RTTTL string, or a frozen song constant.
+        style_divisor: Fallback style, used unless the song header selects a
+                       non-default style with ``s=``.
+
+    Returns:
+        CompiledSong, or ``None`` if the header could not be parsed.
+    """
+    if not isinstance(rtttl, str) and bytes(rtttl[:4]) == b"RTTB":
+        from .bank import MelodyBank    # deferred: bank imports this module
+        return MelodyBank(rtttl).load(0).with_style(style_divisor)
+
+    header, notes, count = parse_song(rtttl, us=True)
+    if header.notes_start < 0:
+        return None
+
+    style = header.style_divisor if header.style_divisor != STYLE_DEFAULT \
+            else style_divisor
+
+    # Turn the tokenizer's (note_index, octave, duration) triples into
+    # (freq, tone, gap) in place.
+    for i in range(0, count * 3, 3):
+        notes[i], notes[i + 1], notes[i + 2] = note_triple(
+            notes[i], notes[i + 1], notes[i + 2], style)
+    if len(notes) != count * 3:
+        notes = notes[:count * 3]
+
+    return CompiledSong(header, notes, style)
+
+
+# ---------------------------------------------------------------------------
+# Compile cache
+# ---------------------------------------------------------------------------
+
+# Bounded LRU cache: key → CompiledSong, plus keys ordered oldest → newest.
+# The cache is tiny, so a plain list is cheaper than an ordered dict here.
+_cache = {}
+_cache_order = []
+
+
+def compile_cached(rtttl: str, style_divisor: int = STYLE_DEFAULT):
+    """
+    Like :func:`compile_rtttl`, but reuse recently compiled songs.
+
+    Up to ``COMPILE_CACHE_SIZE`` songs are kept, keyed by the RTTTL string
+    and style; the least recently used entry is evicted first.  Songs that
+    fail to parse are not cached, and neither are ``bytearray`` or
+    ``memoryview`` sources, whose contents may change.
+    """
+    if not isinstance(rtttl, (str, bytes)):
+        return compile_rtttl(rtttl, style_divisor)
+    key = (rtttl, style_divisor)
+    song = _cache.get(key)
+    if song is not None:
+        if _cache_order[-1] != key:
+            _cache_order.remove(key)
+            _cache_order.append(key)
+        return song
+
+    song = compile_rtttl(rtttl, style_divisor)
+    if song is None:
+        return None
+
+    if len(_cache_order) >= COMPILE_CACHE_SIZE:
+        del _cache[_cache_order.pop(0)]
+    _cache[key] = song
+    _cache_order.append(key)
+    return song
+
+
+def as_compiled(song, style_divisor: int = STYLE_DEFAULT):
+    """
+    Return *song* as a :class:`CompiledSong` for the given fallback style.
+
+    RTTTL strings go through :func:`compile_cached`; songs that are already
+    compiled (e.g. loaded from a melody bank) are re-split if needed.
+
+    Returns:
+        CompiledSong, or ``None`` if an RTTTL header could not be parsed.
+    """
+    if isinstance(song, CompiledSong):
+        return song.with_style(style_divisor)
+    return compile_cached(song, style_divisor)
+
+
+def clear_compile_cache() -> None:
+    """Drop every cached compiled song."""
+    _cache.clear()
+    del _cache_order[:]
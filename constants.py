@@ -4,22 +4,30 @@ rtttl/constants.py
 Shared constants for the RTTTL library.
 """
 
-# Note frequencies for octave 7 (all other octaves derived by bit-shifting)
+from array import array
+
+# Full-range pitch table: one key per semitone from C0 (key 0) to B9 (key 119)
+KEY_COUNT = 120
+
+
+def _build_freq_table():
+    # Equal temperament around A4 = 440 Hz (key 57), rounded to whole Hz.
+    return array('H', [int(440 * 2 ** ((key - 57) / 12) + 0.5)
+                       for key in range(KEY_COUNT)])
+
+
+# key (octave * 12 + note index) → frequency in Hz
+FREQ_TABLE = _build_freq_table()
+
+# Octave 7 of FREQ_TABLE, C7 = 2093 … B7 = 3951 Hz: the classic RTTTL table
+# that get_frequency() used to bit-shift into the other octaves
 NOTES_OCTAVE = 7
-NOTES = [
-    2093,  # C7
-    2217,  # C#7
-    2349,  # D7
-    2489,  # D#7
-    2637,  # E7
-    2794,  # F7
-    2960,  # F#7
-    3136,  # G7
-    3322,  # G#7
-    3520,  # A7
-    3729,  # A#7
-    3951,  # B7
-]
+NOTES = list(FREQ_TABLE[NOTES_OCTAVE * 12:NOTES_OCTAVE * 12 + 12])
+
+# Fixed-point unit of tempo scaling: note lengths are multiplied by
+# factor / TEMPO_ONE, so TEMPO_ONE plays the song as written.  Must stay
+# 2 ** 10: notes.scale_duration() shifts by 10 bits.
+TEMPO_ONE = 1024
 
 # Song-header defaults
 DEFAULT_DURATION = 4
@@ -33,3 +41,56 @@ STYLE_STACCATO   = 2   # tone length = note length - 1/2
 STYLE_4          = 4   # tone length = note length - 1/4
 STYLE_8          = 8   # tone length = note length - 1/8
 STYLE_DEFAULT    = STYLE_NATURAL
+
+# Playlist repeat modes
+REPEAT_OFF = 0   # stop after the last queued song
+REPEAT_ONE = 1   # replay the current song
+REPEAT_ALL = 2   # start the playlist over after the last song
+
+# Number of compiled songs kept by the compile cache
+COMPILE_CACHE_SIZE = 4
+
+# Distinct note tokens whose decoding parse_song() remembers (see
+# rtttl.tokenizer); the cache is emptied when it fills up
+TOKEN_CACHE_SIZE = 1024
+
+# Stream parser buffer sizes (bytes)
+STREAM_CHUNK_SIZE = 32   # read buffer
+STREAM_TOKEN_MAX  = 16   # longest note token kept; extra bytes are dropped
+STREAM_HEADER_MAX = 64   # longest name / parameter section kept
+
+# Threaded engine: pending-command capacity and longest sleep between
+# command checks (ms)
+COMMAND_QUEUE_SIZE = 8
+THREAD_POLL_MS     = 5
+
+# Multi-node sync (rtttl.sync): ping period, samples kept for the offset
+# and drift fit, extra round trip (µs) over the best one that a sample may
+# have and still count, start lead time, largest drift rate believed, and
+# the rate at which corrections are slewed in while a song plays (ppm);
+# UDP port and longest message (bytes; longer songs are sent in parts)
+SYNC_PING_MS        = 200
+SYNC_SAMPLES        = 16
+SYNC_DELAY_SLACK_US = 500
+SYNC_LEAD_MS        = 500
+SYNC_MAX_DRIFT_PPM  = 500
+SYNC_SLEW_PPM       = 2_000
+SYNC_PORT           = 5_005
+SYNC_MAX_MESSAGE    = 1_024
+
+# Streaming synthesis (rtttl.synth): sample rate (Hz), samples per chunk
+# buffer (two are allocated), peak sample value
+SYNTH_SAMPLE_RATE   = 22_050
+SYNTH_CHUNK_SAMPLES = 512
+SYNTH_AMPLITUDE     = 8_192
+
+# Low-power waits: rests shorter than this (ms) idle instead of using
+# machine.lightsleep, whose wake-up latency would make the next note late
+LIGHTSLEEP_MIN_MS = 10
+
+# Note-start lateness histogram: upper bucket bounds in µs (last bucket is open)
+LATENESS_BUCKETS_US = (100, 250, 500, 1_000, 2_000, 5_000, 10_000, 20_000, 50_000)
+
+# A note starting later than this re-bases the timeline on "now" instead of
+# rushing the following notes to catch up
+RESYNC_LATENESS_US = 250_000
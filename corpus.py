@@ -0,0 +1,264 @@
+"""
+rtttl/corpus.py
+~~~~~~~~~~~~~~~
+Validate and compile large collections of RTTTL files in parallel (CPython).
+
+Every file is parsed, validated and compiled in a process pool, one worker
+per core.  Each song gets a structured result: its name, note count, total
+duration (loops included) and a list of problems, e.g. malformed headers,
+out-of-range octaves or unknown note letters.  Valid songs can be exported
+to a melody bank (see :mod:`rtttl.bank`).
+
+Usage::
+
+    python -m rtttl.corpus songs/                       # summary + problems
+    python -m rtttl.corpus -j 8 --json report.json songs/
+    python -m rtttl.corpus --bank ringtones.bin songs/
+
+Every non-empty line of a file is treated as one song.  The exit status is 1
+if any song has a problem.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from .bank import pack_compiled, write_records
+from .compiler import compile_rtttl
+from .constants import STYLE_DEFAULT
+from .parser import parse_header
+
+CORPUS_EXTENSIONS = (".rtttl", ".rtx", ".txt")
+
+MIN_OCTAVE = 3
+MAX_OCTAVE = 7
+VALID_DURATIONS = (1, 2, 4, 8, 16, 32, 64)
+
+_NOTE_LETTERS = "cdefgabhp"
+
+
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+
+def validate_rtttl(rtttl: str) -> list:
+    """
+    Check an RTTTL string for problems the player would silently ignore.
+
+    Returns:
+        List of ``(code, offset, message)`` tuples, empty if the song is
+        valid.  *code* is one of ``"header"``, ``"duration"``, ``"octave"``,
+        ``"bpm"`` or ``"note"``; *offset* is the position in *rtttl*.
+    """
+    problems = []
+    first = rtttl.find(":")
+    second = rtttl.find(":", first + 1) if first >= 0 else -1
+    if first < 0 or second < 0:
+        return [("header", 0, "expected 'name:parameters:notes'")]
+
+    # --- parameters ---
+    pos = first + 1
+    for param in rtttl[first + 1:second].split(","):
+        item = param.strip()
+        key, _, value = item.partition("=")
+        if not item:
+            pass
+        elif key == "s":
+            if value not in ("N", "S", "C", "1", "2", "3", "4", "5", "6", "7", "8", "9"):
+                problems.append(("header", pos, "bad style %r" % item))
+        elif key not in ("d", "o", "b", "l") or not value.isdigit():
+            problems.append(("header", pos, "bad parameter %r" % item))
+        elif key == "d" and int(value) not in VALID_DURATIONS:
+            problems.append(("duration", pos, "default duration %s" % value))
+        elif key == "o" and not MIN_OCTAVE <= int(value) <= MAX_OCTAVE:
+            problems.append(("octave", pos, "default octave %s out of range" % value))
+        elif key == "b" and int(value) == 0:
+            problems.append(("bpm", pos, "tempo must be positive"))
+        pos += len(param) + 1
+
+    # --- notes ---
+    pos = second + 1
+    for token in rtttl[second + 1:].split(","):
+        problem = _check_token(token.strip())
+        if problem is not None:
+            problems.append((problem[0], pos, problem[1]))
+        pos += len(token) + 1
+    return problems
+
+
+def _check_token(tok: str):
+    """Return ``(code, message)`` for a bad note token, else ``None``."""
+    if not tok:
+        return "note", "empty note"
+    i = 0
+    while i < len(tok) and tok[i].isdigit():
+        i += 1
+    if i and int(tok[:i]) not in VALID_DURATIONS:
+        return "duration", "duration %s in %r" % (tok[:i], tok)
+    if i >= len(tok) or tok[i].lower() not in _NOTE_LETTERS:
+        return "note", "unknown note letter in %r" % tok
+    i += 1
+    if i < len(tok) and tok[i] in "#_":
+        i += 1
+    if i < len(tok) and tok[i] == ".":
+        i += 1
+    if i < len(tok) and tok[i].isdigit():
+        if not MIN_OCTAVE <= int(tok[i]) <= MAX_OCTAVE:
+            return "octave", "octave %s out of range in %r" % (tok[i], tok)
+        i += 1
+    if i < len(tok) and tok[i] == ".":
+        i += 1
+    if i != len(tok):
+        return "note", "unexpected characters in %r" % tok
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Per-file work (runs in the worker processes)
+# ---------------------------------------------------------------------------
+
+def check_song(rtttl: str, style_divisor: int = STYLE_DEFAULT, pack: bool = False) -> dict:
+    """
+    Validate and compile one song.
+
+    Returns:
+        Dict with ``name``, ``ok``, ``problems`` (list of dicts with
+        ``code``, ``offset`` and ``message``), ``notes``, ``duration_ms``
+        and, if *pack* is set and the song is valid, ``record`` — the
+        ``(name, record)`` pair for :func:`~rtttl.bank.write_records`.
+    """
+    problems = [{"code": c, "offset": o, "message": m} for c, o, m in validate_rtttl(rtttl)]
+    song = compile_rtttl(rtttl, style_divisor)
+    result = {
+        "name":        parse_header(rtttl).name,
+        "ok":          not problems and song is not None,
+        "problems":    problems,
+        "notes":       0,
+        "duration_ms": 0,
+    }
+    if song is not None:
+        result["notes"] = song.note_count
+        result["duration_ms"] = song.duration_ms() * max(song.header.number_of_loops, 1)
+        if pack and result["ok"]:
+            result["record"] = pack_compiled(song, rtttl)
+    return result
+
+
+def check_file(path: str, style_divisor: int = STYLE_DEFAULT, pack: bool = False) -> list:
+    """Run :func:`check_song` on every non-empty line of *path*.
+
+    Each result also gets ``file`` and ``line`` keys.  Unreadable files
+    produce a single result with an ``"io"`` problem.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        return [{"file": path, "line": 0, "name": "", "ok": False, "notes": 0,
+                 "duration_ms": 0,
+                 "problems": [{"code": "io", "offset": 0, "message": str(e)}]}]
+    results = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        result = check_song(line, style_divisor, pack)
+        result["file"] = path
+        result["line"] = lineno
+        results.append(result)
+    return results
+
+
+def _check_file_args(args):
+    return check_file(*args)
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def find_files(paths, extensions=CORPUS_EXTENSIONS) -> list:
+    """Expand directories (recursively) into RTTTL files; keep plain files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(extensions):
+                        files.append(os.path.join(root, name))
+        else:
+            files.append(path)
+    return files
+
+
+def check_corpus(files, jobs: int = 0, style_divisor: int = STYLE_DEFAULT,
+                 pack: bool = False) -> list:
+    """
+    Check many files, spreading them over a process pool.
+
+    Args:
+        files: Paths of RTTTL files.
+        jobs:  Worker processes; 0 means one per CPU, 1 runs in-process.
+
+    Returns:
+        Flat list of per-song results in file order.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    work = [(path, style_divisor, pack) for path in files]
+    if jobs == 1 or len(work) < 2:
+        per_file = map(_check_file_args, work)
+        return [r for results in per_file for r in results]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(work) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        per_file = pool.map(_check_file_args, work, chunksize=chunksize)
+        return [r for results in per_file for r in results]
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtttl.corpus",
+                                 description="Validate and compile RTTTL files in parallel.")
+    ap.add_argument("paths", nargs="+", help="RTTTL files or directories")
+    ap.add_argument("-j", "--jobs", type=int, default=0,
+                    help="worker processes (default: one per CPU)")
+    ap.add_argument("--json", metavar="FILE", help="write per-song results as JSON")
+    ap.add_argument("--bank", metavar="FILE", help="write valid songs to a melody bank")
+    ap.add_argument("-q", "--quiet", action="store_true", help="print the summary only")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    files = find_files(args.paths)
+    results = check_corpus(files, args.jobs, pack=bool(args.bank))
+    elapsed = time.perf_counter() - t0
+
+    bad = [r for r in results if not r["ok"]]
+    if not args.quiet:
+        for r in bad:
+            for p in r["problems"]:
+                print("%s:%d:%d: %s: %s" % (r["file"], r["line"], p["offset"] + 1,
+                                            p["code"], p["message"]))
+
+    if args.bank:
+        records = [r.pop("record") for r in results if "record" in r]
+        with open(args.bank, "wb") as f:
+            write_records(f, records)
+
+    if args.json:
+        for r in results:
+            r.pop("record", None)
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+    total_ms = sum(r["duration_ms"] for r in results)
+    print("%d files, %d songs, %d valid, %d with problems, %.1f min of music, %.2f s"
+          % (len(files), len(results), len(results) - len(bad), len(bad),
+             total_ms / 60_000, elapsed))
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,14 +21,11 @@ player.play_blocking(RTTTL_MELODIES[21])
 # ---------------------------------------------------------------------------
 # 2. Non-blocking playback — interleave with other work
 # ---------------------------------------------------------------------------
-import time
-
 player.start(RTTTL_MELODIES[0], on_complete=lambda: print("StarWars done!"))
 
-while player.is_playing():
-    player.update()
+while player.update():
     # … put other periodic work here …
-    time.sleep_ms(1)
+    player.wait()                  # sleep until the next tone stop / note
 
 
 # ---------------------------------------------------------------------------
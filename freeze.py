@@ -0,0 +1,157 @@
+"""
+rtttl/freeze.py
+~~~~~~~~~~~~~~~
+Compile RTTTL songs into a Python module of ``bytes`` constants (CPython).
+
+Every song becomes one constant holding a single-song melody bank (see
+:mod:`rtttl.bank`): header metadata plus the fully resolved
+``frequency, tone_us, gap_us`` note stream.  Freeze the generated module
+into the firmware and the songs stay in flash.  :meth:`PlayRtttl.start()
+<rtttl.player.PlayRtttl.start>` accepts the constants directly and loads
+them without parsing anything.
+
+Usage::
+
+    python -m rtttl.freeze -o frozen_songs.py             # built-in melodies
+    python -m rtttl.freeze -o my_songs.py songs/ alarm.rtttl
+
+Source files hold one RTTTL string per non-empty line.  On the device::
+
+    from frozen_songs import NOKIA
+    player.start(NOKIA)
+"""
+
+import argparse
+import io
+import sys
+
+from .bank import pack_compiled, write_records
+from .compiler import compile_rtttl
+from .constants import STYLE_DEFAULT
+
+_LINE_BYTES = 48        # bytes per line of a generated literal
+
+
+def freeze_song(rtttl: str, style_divisor: int = STYLE_DEFAULT,
+                keep_text: bool = False):
+    """
+    Compile one RTTTL string into a frozen song constant.
+
+    Args:
+        rtttl:         Song to compile.
+        style_divisor: Fallback style the notes are split with.
+        keep_text:     Also store the RTTTL text, so
+                       :meth:`~rtttl.player.PlayRtttl.source_offset` and
+                       :meth:`MelodyBank.source() <rtttl.bank.MelodyBank.source>`
+                       work.  Costs one byte of flash per character.
+
+    Returns:
+        Tuple ``(name, data)``: the song name and the one-song bank as
+        ``bytes``.
+
+    Raises:
+        ValueError: if the header cannot be parsed.
+    """
+    song = compile_rtttl(rtttl, style_divisor)
+    if song is None:
+        raise ValueError("invalid RTTTL header: %r" % rtttl[:40])
+    buf = io.BytesIO()
+    write_records(buf, [pack_compiled(song, rtttl if keep_text else "")])
+    return song.header.name, buf.getvalue()
+
+
+def write_module(songs, f, style_divisor: int = STYLE_DEFAULT,
+                 keep_text: bool = False) -> int:
+    """
+    Write a module of frozen song constants to the text file *f*.
+
+    Constants are named after the songs (upper-cased, with non-alphanumeric
+    characters replaced by ``_``).  The module also defines ``SONGS``, all
+    constants in input order, and ``NAMES``, the matching song names.
+
+    Returns:
+        Number of songs written.
+
+    Raises:
+        ValueError: if a song header cannot be parsed.
+    """
+    frozen = [freeze_song(rtttl, style_divisor, keep_text) for rtttl in songs]
+    used = set()
+    idents = []
+    for name, _ in frozen:
+        ident = base = _identifier(name)
+        n = 2
+        while ident in used:
+            ident = "%s_%d" % (base, n)
+            n += 1
+        used.add(ident)
+        idents.append(ident)
+
+    f.write('"""\nFrozen RTTTL songs, generated by ``python -m rtttl.freeze``.'
+            '  Do not edit.\n\n'
+            'Each constant is a one-song melody bank (see rtttl.bank); pass it\n'
+            'straight to PlayRtttl.start().\n"""\n')
+    for ident, (name, data) in zip(idents, frozen):
+        f.write("\n# %s\n%s = (\n" % (name, ident))
+        for i in range(0, len(data), _LINE_BYTES):
+            f.write("    %r\n" % data[i:i + _LINE_BYTES])
+        f.write(")\n")
+    f.write("\nSONGS = (\n")
+    for ident in idents:
+        f.write("    %s,\n" % ident)
+    f.write(")\n\nNAMES = (\n")
+    for name, _ in frozen:
+        f.write("    %r,\n" % name)
+    f.write(")\n")
+    return len(frozen)
+
+
+def _identifier(name: str) -> str:
+    ident = "".join(c if c.isalnum() and c.isascii() else "_" for c in name).upper()
+    if not ident or ident[0].isdigit():
+        ident = "SONG_" + ident
+    return ident
+
+
+def _read_songs(paths) -> list:
+    """RTTTL strings from *paths* (files or directories), one per line."""
+    from .corpus import find_files
+
+    songs = []
+    for path in find_files(paths):
+        with open(path, encoding="utf-8") as f:
+            songs.extend(line.strip() for line in f if line.strip())
+    return songs
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtttl.freeze",
+                                 description="Compile RTTTL songs into a module of "
+                                             "bytes constants for frozen firmware.")
+    ap.add_argument("paths", nargs="*",
+                    help="RTTTL files or directories (default: the built-in melodies)")
+    ap.add_argument("-o", "--output", metavar="FILE",
+                    help="module to write (default: stdout)")
+    ap.add_argument("--style", type=int, default=STYLE_DEFAULT,
+                    help="fallback style divisor (default: %(default)s)")
+    ap.add_argument("--text", action="store_true",
+                    help="keep the RTTTL text of every song")
+    args = ap.parse_args(argv)
+
+    if args.paths:
+        songs = _read_songs(args.paths)
+    else:
+        from .melodies_src import RTTTL_MELODIES
+        songs = RTTTL_MELODIES
+
+    if args.output is None:
+        write_module(songs, sys.stdout, args.style, args.text)
+        return 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        n = write_module(songs, f, args.style, args.text)
+    print("froze %d songs into %s" % (n, args.output), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
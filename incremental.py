@@ -0,0 +1,291 @@
+"""
+rtttl/incremental.py
+~~~~~~~~~~~~~~~~~~~~
+Incremental compilation for live editing of RTTTL text.
+
+An :class:`IncrementalSong` keeps the text, the compiled note stream, the
+note start times and the token offsets of a song.  Each
+:meth:`~IncrementalSong.edit` re-tokenizes only from the note token the
+edit touches until token boundaries line up with the old text again, and
+splices the new notes into the arrays.  Start times and offsets after the
+edit move by a constant, and that shift is applied lazily: positions
+between the last edit and the next one are brought up to date, but the
+rest of the song is not touched.  The cost of a keystroke therefore
+depends on the tokens it changes and on how far the cursor moved, not on
+the length of the song.
+
+Usage example::
+
+    from rtttl.incremental import IncrementalSong
+
+    live = IncrementalSong("Nokia:d=4,o=5,b=112:8e6,8d6,f#5,g#5")
+    first, removed, added = live.edit(27, 2, "c6")   # 8d6 → 8c6
+    print(live.duration_ms(), live.note(first))
+    player.start(live.song())
+
+Edits to the header (name, ``d=``, ``o=``, ``b=``, ``s=``, ``l=``) change
+every note and recompile the whole song.
+"""
+
+from array import array
+
+from .compiler import CompiledSong, compile_rtttl, note_triple
+from .constants import STYLE_DEFAULT
+from .timeline import NoteIndex
+from .tokenizer import tokenize
+
+
+class _Shifted:
+    """``array('q')`` whose entries from :attr:`start` on are stored
+    :attr:`delta` too small.
+
+    Adding a constant to the tail of the array, as every edit does to the
+    start times and offsets after it, only changes :attr:`delta`.
+    """
+
+    def __init__(self, values):
+        self.values = array('q', values)
+        self.start  = len(self.values)
+        self.delta  = 0
+
+    def __getitem__(self, k: int) -> int:
+        if k >= self.start:
+            return self.values[k] + self.delta
+        return self.values[k]
+
+    def settle(self, k: int) -> None:
+        """Make entries below *k* exact and keep the rest shifted."""
+        values = self.values
+        delta = self.delta
+        if k > self.start:
+            for i in range(self.start, k):
+                values[i] += delta
+        else:
+            for i in range(k, self.start):
+                values[i] -= delta
+        self.start = k
+
+    def splice(self, lo: int, hi: int, new, shift: int) -> None:
+        """Replace entries ``lo:hi`` by the exact values *new*, then add
+        *shift* to every entry after them."""
+        self.settle(hi)
+        self.values[lo:hi] = array('q', new)
+        self.start = lo + len(new)
+        self.delta += shift
+
+    def exact(self) -> array:
+        """All entries, as an exact ``array('I')``."""
+        self.settle(len(self.values))
+        return array('I', self.values)
+
+
+class IncrementalSong:
+    """An RTTTL song kept compiled while its text is edited.
+
+    Args:
+        rtttl:         Initial RTTTL text.
+        style_divisor: Fallback style, as for
+                       :func:`~rtttl.compiler.compile_rtttl`.
+
+    Attributes:
+        text:   Current RTTTL text.
+        header: :class:`~rtttl.parser.SongHeader`, or ``None`` while the
+                header cannot be parsed (the song then has no notes).
+    """
+
+    def __init__(self, rtttl: str, style_divisor: int = STYLE_DEFAULT):
+        self._style_divisor = style_divisor
+        self._load(rtttl)
+
+    # ------------------------------------------------------------------
+    # Editing
+    # ------------------------------------------------------------------
+
+    def edit(self, offset: int, removed: int, inserted: str = ""):
+        """
+        Replace ``text[offset:offset + removed]`` by *inserted*.
+
+        Args:
+            offset:   Character offset of the edit in :attr:`text`.
+            removed:  Number of characters removed.
+            inserted: Text inserted in their place.
+
+        Returns:
+            Tuple ``(first, removed_notes, added_notes)``: notes
+            ``first:first + removed_notes`` of the old song were replaced by
+            notes ``first:first + added_notes`` of the new one.  After a
+            header edit this covers the whole song.
+
+        Raises:
+            ValueError: if the range lies outside :attr:`text`.
+        """
+        text = self.text
+        if offset < 0 or removed < 0 or offset + removed > len(text):
+            raise ValueError("edit range %d+%d outside text of length %d"
+                             % (offset, removed, len(text)))
+        new_text = text[:offset] + inserted + text[offset + removed:]
+        data = self._data
+        ins = inserted.encode()
+        if len(data) != len(text):          # non-ASCII: offsets differ
+            removed = len(text[offset:offset + removed].encode())
+            offset = len(text[:offset].encode())
+
+        header = self.header
+        if header is None or offset < header.notes_start:
+            old_count = self.note_count
+            self._load(new_text)
+            return 0, old_count, self.note_count
+
+        self.text = new_text
+        data[offset:offset + removed] = ins
+        self._song = None
+        return self._retokenize(offset, removed, len(ins))
+
+    # ------------------------------------------------------------------
+    # Queries (constant time unless noted)
+    # ------------------------------------------------------------------
+
+    def note(self, k: int):
+        """Return ``(frequency, tone_us, gap_us)`` for note *k*."""
+        i = 3 * k
+        notes = self._notes
+        return notes[i], notes[i + 1], notes[i + 2]
+
+    def start_us(self, k: int) -> int:
+        """Start time of note *k*; ``start_us(note_count)`` is the length."""
+        return self._starts[k]
+
+    def token_offset(self, k: int) -> int:
+        """Byte offset of note *k*'s token in the UTF-8 text."""
+        return self._offsets[k]
+
+    def duration_us(self) -> int:
+        """Length of one pass of the song in microseconds."""
+        return self._starts[self.note_count]
+
+    def duration_ms(self) -> int:
+        """Length of one pass of the song in milliseconds."""
+        return self.duration_us() // 1000
+
+    def note_at(self, offset: int) -> int:
+        """Index of the note whose token contains byte *offset* (binary
+        search), or -1 if *offset* lies in the header."""
+        if self.header is None or offset < self.header.notes_start or not self.note_count:
+            return -1
+        return self._find_token(offset)
+
+    def song(self) -> CompiledSong:
+        """
+        The current song, for playback or rendering, or ``None`` while the
+        header cannot be parsed.
+
+        Its :meth:`~rtttl.compiler.CompiledSong.index` already holds the
+        start times and token offsets.  The first call after an edit brings
+        all shifted entries up to date, so it takes time linear in the song
+        length; call it when playback starts, not on every keystroke.
+        """
+        if self.header is None:
+            return None
+        song = self._song
+        if song is None:
+            song = CompiledSong(self.header, array('I', self._notes), self._style)
+            song._index = NoteIndex.from_arrays(self._starts.exact(),
+                                                self._offsets.exact()[:self.note_count])
+            self._song = song
+        return song
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _load(self, rtttl: str) -> None:
+        """Compile *rtttl* from scratch."""
+        self.text  = rtttl
+        self._data = bytearray(rtttl.encode())
+        self._song = None
+        song = compile_rtttl(rtttl, self._style_divisor)
+        if song is None:
+            self.header     = None
+            self.note_count = 0
+            self._style     = self._style_divisor
+            self._notes     = array('I')
+            self._starts    = _Shifted((0,))
+            self._offsets   = _Shifted((len(self._data),))
+            return
+        index = song.index(self._data)
+        self.header     = song.header
+        self.note_count = song.note_count
+        self._style     = song.style_divisor
+        self._notes     = song.notes
+        self._starts    = _Shifted(index.starts)
+        # One extra offset, the end of the text, closes the last token.
+        self._offsets   = _Shifted(index.offsets)
+        self._offsets.values.append(len(self._data))
+        self._offsets.start += 1
+
+    def _find_token(self, offset: int) -> int:
+        """Last note whose token starts at or before *offset*."""
+        offsets = self._offsets
+        lo = 0
+        hi = self.note_count - 1
+        while lo < hi:
+            mid = (lo + hi + 1) >> 1
+            if offsets[mid] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def _retokenize(self, offset: int, removed: int, inserted: int):
+        """Re-read the tokens around an edit of the note section."""
+        data = self._data
+        header = self.header
+        offsets = self._offsets
+        count = self.note_count
+        edit_end = offset + removed             # in old offsets
+        shift = inserted - removed
+
+        # Resume at the token holding the edit; an edit right at a token
+        # start may also extend the previous one (e.g. a deleted comma).
+        first = 0
+        if count:
+            first = self._find_token(offset)
+            if first and offsets[first] == offset:
+                first -= 1
+        pos = offsets[first] if count else header.notes_start
+
+        # Read new tokens until one ends where an old token, untouched by
+        # the edit, now starts: from there on the old notes are still valid.
+        end = len(data)
+        whole = header.time_for_whole_note_us
+        style = self._style
+        one = array('I', bytes(12))
+        new_notes = []
+        new_offsets = []
+        new_times = []
+        t = self._starts[first]
+        old = first + 1                     # next old token to line up with
+        while True:
+            while old < count and offsets[old] < edit_end:
+                old += 1
+            if pos >= end:
+                old = count
+                break
+            if old < count and offsets[old] + shift == pos:
+                break
+            new_offsets.append(pos)
+            pos = tokenize(data, pos, end, header, one, whole)[1]
+            new_notes += note_triple(one[0], one[1], one[2], style)
+            t += one[2]
+            new_times.append(t)
+            while old < count and offsets[old] + shift < pos:
+                old += 1
+
+        # Splice: notes first:old of the old song become the new ones.
+        added = len(new_offsets)
+        old_end = self._starts[old]
+        self._notes[3 * first:3 * old] = array('I', new_notes)
+        self._offsets.splice(first, old, new_offsets, shift)
+        self._starts.splice(first + 1, old + 1, new_times, t - old_end)
+        self.note_count = count - (old - first) + added
+        return first, old - first, added
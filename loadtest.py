@@ -0,0 +1,191 @@
+"""
+rtttl/loadtest.py
+~~~~~~~~~~~~~~~~~
+Load generator for the rendering service (CPython).
+
+Sends a skewed mix of songs — a few popular ones requested often, a long
+tail requested rarely — from several threads.  It then reports the cache
+hit rate (from the ``X-Cache`` response headers) and the latency
+percentiles.  Without ``--url`` or ``--unix`` an in-process server with a
+temporary disk cache is started, so the test runs fully offline.
+
+Usage::
+
+    python -m rtttl.loadtest                          # in-process server
+    python -m rtttl.loadtest -n 2000 -c 16 --songs 300
+    python -m rtttl.loadtest --url http://127.0.0.1:8765
+    python -m rtttl.loadtest --unix /tmp/rtttl.sock
+"""
+
+import argparse
+import http.client
+import json
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .bench import synthetic_corpus
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    """HTTP over a Unix-domain socket."""
+
+    def __init__(self, path: str, timeout: float = 60):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def workload(n_requests: int, n_songs: int, skew: float = 1.2,
+             seed: int = 1) -> list:
+    """
+    Songs to request, in order: Zipf-distributed over *n_songs* songs.
+
+    Song *k* (0-based) is picked with probability proportional to
+    ``1 / (k + 1) ** skew``.
+    """
+    rnd = random.Random(seed)
+    songs = synthetic_corpus(n_songs, 40, seed=seed)
+    weights = [1 / (k + 1) ** skew for k in range(n_songs)]
+    return rnd.choices(songs, weights, k=n_requests)
+
+
+def percentile(sorted_values, p: float) -> float:
+    """*p*-th percentile (0–100) of an ascending list, nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run(connect, songs, concurrency: int = 8) -> dict:
+    """
+    Request every song in *songs* through ``concurrency`` worker threads.
+
+    Args:
+        connect: Zero-argument callable returning a new
+                 ``http.client.HTTPConnection``; each worker keeps one.
+
+    Returns:
+        Dict with ``requests``, ``errors``, ``hit_rate``, ``by_source``
+        (``X-Cache`` value → count), ``p50_ms``, ``p99_ms``, ``max_ms`` and
+        ``requests_per_s``.
+    """
+    lock = threading.Lock()
+    latencies = []
+    by_source = {}
+    errors = [0]
+    next_item = iter(songs)
+
+    def worker():
+        conn = connect()
+        while True:
+            with lock:
+                rtttl = next(next_item, None)
+            if rtttl is None:
+                break
+            body = rtttl.encode()
+            t0 = time.perf_counter()
+            try:
+                conn.request("POST", "/render", body,
+                             {"Content-Type": "text/plain"})
+                resp = conn.getresponse()
+                resp.read()
+                source = resp.getheader("X-Cache", "none") if resp.status == 200 else None
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = connect()
+                source = None
+            took = (time.perf_counter() - t0) * 1000
+            with lock:
+                if source is None:
+                    errors[0] += 1
+                else:
+                    latencies.append(took)
+                    by_source[source] = by_source.get(source, 0) + 1
+        conn.close()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    ok = len(latencies)
+    hits = ok - by_source.get("miss", 0)
+    return {
+        "requests":       len(songs),
+        "errors":         errors[0],
+        "hit_rate":       hits / ok if ok else 0.0,
+        "by_source":      by_source,
+        "p50_ms":         percentile(latencies, 50),
+        "p99_ms":         percentile(latencies, 99),
+        "max_ms":         latencies[-1] if latencies else 0.0,
+        "requests_per_s": len(songs) / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtttl.loadtest",
+                                 description="Load-test the RTTTL rendering service.")
+    ap.add_argument("-n", "--requests", type=int, default=1000, help="requests to send (default: %(default)s)")
+    ap.add_argument("-c", "--concurrency", type=int, default=8, help="client threads (default: %(default)s)")
+    ap.add_argument("--songs", type=int, default=200, help="distinct songs (default: %(default)s)")
+    ap.add_argument("--skew", type=float, default=1.2, help="Zipf exponent of song popularity (default: %(default)s)")
+    ap.add_argument("--seed", type=int, default=1)
+    target = ap.add_mutually_exclusive_group()
+    target.add_argument("--url", help="running service, e.g. http://127.0.0.1:8765")
+    target.add_argument("--unix", metavar="PATH", help="running service on a Unix socket")
+    ap.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = ap.parse_args(argv)
+
+    songs = workload(args.requests, args.songs, args.skew, args.seed)
+    server = tmp = None
+    if args.unix:
+        connect = lambda: _UnixConnection(args.unix)
+    else:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            from .service import RenderCache, RenderServer
+
+            tmp = tempfile.TemporaryDirectory(prefix="rtttl-cache-")
+            server = RenderServer(("127.0.0.1", 0), RenderCache(tmp.name), quiet=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host, port = server.server_address[:2]
+        connect = lambda: http.client.HTTPConnection(host, port, timeout=60)
+
+    try:
+        result = run(connect, songs, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            tmp.cleanup()
+
+    if args.json:
+        print(json.dumps(result, indent=1))
+    else:
+        print("%d requests, %d errors, %.0f req/s" % (
+            result["requests"], result["errors"], result["requests_per_s"]))
+        print("hit rate %.1f %%  (%s)" % (100 * result["hit_rate"], ", ".join(
+            "%s %d" % kv for kv in sorted(result["by_source"].items()))))
+        print("latency p50 %.1f ms, p99 %.1f ms, max %.1f ms" % (
+            result["p50_ms"], result["p99_ms"], result["max_ms"]))
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
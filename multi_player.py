@@ -0,0 +1,233 @@
+"""
+rtttl/multi_player.py
+~~~~~~~~~~~~~~~~~~~~~
+Drive many buzzers from one scheduler.
+
+:class:`MultiPlayer` owns any number of channels, each with its own output
+backend and song.  Upcoming tone-stop and next-note events of all channels
+live in one min-heap, so an ``update()`` call only touches channels that are
+actually due: the cost per tick grows with the number of due events, not
+with the number of channels.
+
+Usage example::
+
+    from rtttl.multi_player import MultiPlayer
+    from rtttl.melodies import RTTTL_MELODIES
+
+    mp = MultiPlayer()
+    left  = mp.add_channel(pin=8)
+    right = mp.add_channel(pin=9)
+    mp.start(left,  RTTTL_MELODIES[0])
+    mp.start(right, RTTTL_MELODIES[21])
+
+    while mp.update():
+        pass
+
+Events are scheduled from the time they were *due*, not from when
+``update()`` ran, so a late tick does not shift the rest of the song.  The
+heap works in milliseconds, rounded up so no event fires early; each
+channel carries the rounding forward, so the microsecond note lengths of
+compiled songs add up exactly instead of drifting.  Due times count from
+an epoch that moves forward every ``_REBASE_MS``, so they never get near
+the ``ticks_ms`` wrap-around.
+"""
+
+try:
+    import heapq
+except ImportError:                     # older MicroPython firmware
+    import uheapq as heapq
+
+from .backends import PWMBackend
+from .compat import ticks_ms, ticks_diff, ticks_add
+from .compiler import as_compiled
+from .constants import STYLE_DEFAULT
+
+# Event kinds.  Tone stops sort first so a stop and the next note of the
+# same channel at the same instant are applied in the right order.
+_TONE_STOP = 0
+_NEXT_NOTE = 1
+
+# ticks_diff() of two ticks_ms values is only meaningful below 2**29 ms
+# (~6 days) on MicroPython; move the epoch long before that.
+_REBASE_MS = 1 << 27
+
+
+class _Channel:
+    """Per-channel playback state."""
+
+    def __init__(self, backend, style_divisor: int):
+        self.backend       = backend
+        self.style_divisor = style_divisor
+        self.notes         = None
+        self.pos           = 0
+        self.offset_us     = 0      # exact next-note start minus its due ms, (-1000, 0]
+        self.loops_left    = 1
+        self.on_complete   = None
+        self.playing       = False
+        self.generation    = 0      # bumped on start/stop; older events are stale
+
+
+class MultiPlayer:
+    """Polyphonic RTTTL scheduler for several buzzers."""
+
+    def __init__(self):
+        self._channels = []
+        self._heap     = []   # (due_ms, kind, channel, generation)
+        self._active   = 0
+        self._epoch    = ticks_ms()
+
+    # ------------------------------------------------------------------
+    # Channels
+    # ------------------------------------------------------------------
+
+    def add_channel(self, pin: int = None, backend=None,
+                    style_divisor: int = STYLE_DEFAULT) -> int:
+        """Add an output channel.
+
+        Args:
+            pin:           GPIO pin for a :class:`~rtttl.backends.PWMBackend`.
+            backend:       Output backend; takes precedence over *pin*.
+            style_divisor: Default playback style for this channel.
+
+        Returns:
+            Channel number to pass to :meth:`start` / :meth:`stop`.
+        """
+        if backend is None:
+            if pin is None:
+                raise ValueError("channel needs a pin or a backend")
+            backend = PWMBackend(pin)
+        self._channels.append(_Channel(backend, style_divisor))
+        return len(self._channels) - 1
+
+    # ------------------------------------------------------------------
+    # Playback
+    # ------------------------------------------------------------------
+
+    def start(self, channel: int, rtttl, on_complete=None) -> bool:
+        """Start a song on *channel*, replacing whatever it was playing.
+
+        *rtttl* is an RTTTL string or a :class:`~rtttl.compiler.CompiledSong`.
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        ch = self._channels[channel]
+        song = as_compiled(rtttl, ch.style_divisor)
+        if song is None:
+            return False
+
+        self._halt(ch)
+        ch.notes       = song.notes
+        ch.pos         = 0
+        ch.offset_us   = 0
+        ch.loops_left  = max(song.header.number_of_loops, 1)
+        ch.on_complete = on_complete
+        ch.playing     = True
+        self._active  += 1
+        heapq.heappush(self._heap, (self._now(), _NEXT_NOTE, channel, ch.generation))
+
+        self.update()
+        return True
+
+    def update(self) -> bool:
+        """Apply every event that is due.
+
+        Returns:
+            ``True`` while at least one channel is playing.
+        """
+        heap = self._heap
+        now = self._now()
+        while heap and heap[0][0] <= now:
+            due, kind, channel, generation = heapq.heappop(heap)
+            ch = self._channels[channel]
+            if generation != ch.generation:
+                continue                        # channel restarted/stopped
+            if kind == _TONE_STOP:
+                ch.backend.duty_u16(0)
+            else:
+                self._next_note(ch, channel, due)
+                # on_complete may have started a song, and so moved the epoch
+                now = self._now()
+        return self._active > 0
+
+    def stop(self, channel: int) -> None:
+        """Stop *channel* and silence its output."""
+        self._halt(self._channels[channel])
+
+    def stop_all(self) -> None:
+        """Stop every channel."""
+        for ch in self._channels:
+            self._halt(ch)
+        del self._heap[:]
+
+    def is_playing(self, channel: int = None) -> bool:
+        """Return ``True`` if *channel* (or, if omitted, any channel) is playing."""
+        if channel is None:
+            return self._active > 0
+        return self._channels[channel].playing
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _now(self) -> int:
+        """Milliseconds since the epoch (monotonic)."""
+        now = ticks_diff(ticks_ms(), self._epoch)
+        if now >= _REBASE_MS:
+            self._rebase(now)
+            now = 0
+        return now
+
+    def _rebase(self, shift: int) -> None:
+        """Move the epoch *shift* ms forward, keeping every due time."""
+        self._epoch = ticks_add(self._epoch, shift)
+        # Subtracting the same amount everywhere keeps the heap a heap.  It
+        # is changed in place: update() may be iterating over it.
+        heap = self._heap
+        for i in range(len(heap)):
+            due, kind, channel, generation = heap[i]
+            heap[i] = (due - shift, kind, channel, generation)
+
+    def _ms_until_next_event(self) -> int:
+        """Milliseconds until the earliest pending event (>= 0), or -1 if none."""
+        if not self._heap:
+            return -1
+        wait = self._heap[0][0] - self._now()
+        return wait if wait > 0 else 0
+
+    def _halt(self, ch) -> None:
+        ch.generation += 1
+        if ch.playing:
+            ch.backend.duty_u16(0)
+            ch.playing = False
+            self._active -= 1
+
+    def _next_note(self, ch, channel: int, due: int) -> None:
+        notes = ch.notes
+        pos = ch.pos
+        while pos >= len(notes):
+            if ch.loops_left <= 1:
+                self._halt(ch)
+                if ch.on_complete is not None:
+                    ch.on_complete()
+                return
+            ch.loops_left -= 1
+            pos = 0
+
+        freq     = notes[pos]
+        tone_end = ch.offset_us + notes[pos + 1]   # µs after *due*
+        note_end = tone_end + notes[pos + 2]
+        next_ms  = -(-note_end // 1000)            # rounded up
+        ch.pos   = pos + 3
+        ch.offset_us = note_end - next_ms * 1000
+
+        heap = self._heap
+        if freq:                      # pitched note
+            ch.backend.freq(freq)
+            ch.backend.duty_u16(32768)
+            heapq.heappush(heap, (due - (-tone_end // 1000), _TONE_STOP,
+                                  channel, ch.generation))
+        else:                         # rest / pause
+            ch.backend.duty_u16(0)
+        heapq.heappush(heap, (due + next_ms, _NEXT_NOTE,
+                              channel, ch.generation))
@@ -1,10 +1,11 @@
 """
 rtttl/notes.py
 ~~~~~~~~~~~~~~
-Note-index ↔ frequency helpers and style-char conversion.
+Note-index ↔ frequency helpers, transposition, tempo scaling and style-char
+conversion.
 """
 
-from .constants import NOTES, NOTES_OCTAVE, STYLE_DEFAULT
+from .constants import FREQ_TABLE, KEY_COUNT, TEMPO_ONE, STYLE_DEFAULT
 
 
 def get_frequency(note_index: int, octave: int) -> int:
@@ -13,20 +14,82 @@ def get_frequency(note_index: int, octave: int) -> int:
 
     Args:
         note_index: 0–11  (C=0, C#=1, … B=11); any other value means pause.
-        octave:     3–7
+        octave:     0–9
 
     Returns:
         Frequency in Hz, or 0 for a pause.
     """
-    if note_index >= len(NOTES):
+    if note_index > 11:
         return 0  # pause
+    return FREQ_TABLE[octave * 12 + note_index]
 
-    freq = NOTES[note_index]
-    if octave <= NOTES_OCTAVE:
-        freq >>= (NOTES_OCTAVE - octave)
-    else:
-        freq <<= (octave - NOTES_OCTAVE)
-    return freq
+
+def key_of_frequency(freq: int) -> int:
+    """
+    Return the key (``octave * 12 + note_index``) nearest to *freq*.
+
+    Exact for every frequency produced by :func:`get_frequency`.
+
+    Returns:
+        Key in ``0 … KEY_COUNT - 1``, or -1 for a pause (``freq == 0``).
+    """
+    if freq <= 0:
+        return -1
+    table = FREQ_TABLE
+    lo = 0
+    hi = KEY_COUNT - 1
+    while lo < hi:                    # first key at or above *freq*
+        mid = (lo + hi) >> 1
+        if table[mid] < freq:
+            lo = mid + 1
+        else:
+            hi = mid
+    # Pick the nearer neighbour on a log scale.
+    if lo and freq * freq < table[lo - 1] * table[lo]:
+        lo -= 1
+    return lo
+
+
+def transpose_frequency(freq: int, semitones: int) -> int:
+    """
+    Shift a note frequency by *semitones*, clamped to the table range.
+
+    A pause (0) stays a pause.  Does not allocate.
+    """
+    if not freq:
+        return 0
+    key = key_of_frequency(freq) + semitones
+    if key < 0:
+        key = 0
+    elif key >= KEY_COUNT:
+        key = KEY_COUNT - 1
+    return FREQ_TABLE[key]
+
+
+def tempo_factor(scale) -> int:
+    """
+    Convert a tempo multiplier to the fixed-point factor for
+    :func:`scale_duration`.
+
+    Args:
+        scale: Playback speed; 2 plays twice as fast, 0.5 half as fast.
+
+    Raises:
+        ValueError: if *scale* is not positive.
+    """
+    if scale <= 0:
+        raise ValueError("tempo scale must be positive")
+    return int(TEMPO_ONE / scale + 0.5)
+
+
+def scale_duration(duration_us: int, factor: int) -> int:
+    """
+    Return ``duration_us * factor / TEMPO_ONE`` (truncated).
+
+    The product is split so intermediate values stay small ints on
+    MicroPython, where a big int would allocate.
+    """
+    return (duration_us >> 10) * factor + (((duration_us & 1023) * factor) >> 10)
 
 
 def style_char_to_divisor(char: str) -> int:
@@ -48,3 +111,20 @@ def style_char_to_divisor(char: str) -> int:
     if '1' <= char <= '9':
         return int(char)
     return STYLE_DEFAULT
+
+
+def tone_length(duration: int, style_divisor: int) -> int:
+    """
+    Return the audible part of a note after applying a playback style.
+
+    Args:
+        duration:      Full note length, in any unit (the player uses µs).
+        style_divisor: 0 for continuous, otherwise the style divisor.
+
+    Returns:
+        Tone length in the unit of *duration* (the rest of the note is
+        silence).
+    """
+    if style_divisor != 0:
+        return duration - ((duration + (style_divisor // 2)) // style_divisor)
+    return duration
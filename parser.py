@@ -20,6 +20,7 @@ class SongHeader:
         self.default_octave   = DEFAULT_OCTAVE
         self.bpm              = DEFAULT_BPM
         self.time_for_whole_note_ms = (60_000 // DEFAULT_BPM) * 4
+        self.time_for_whole_note_us = 240_000_000 // DEFAULT_BPM
         self.number_of_loops  = 1
         self.style_divisor    = STYLE_DEFAULT
         self.notes_start      = -1   # index into the original string where notes begin
@@ -72,6 +73,7 @@ def parse_header(rtttl: str) -> SongHeader:
             if bpm > 0:
                 h.bpm = bpm
                 h.time_for_whole_note_ms = (60_000 // bpm) * 4
+                h.time_for_whole_note_us = 240_000_000 // bpm
 
         elif ch == 'l':             # loop count
             idx += 2
@@ -113,14 +115,37 @@ def parse_next_note(rtttl: str, idx: int, header: SongHeader):
             duration_ms – note duration in milliseconds
             next_idx    – index to pass on the next call (past trailing comma)
     """
+    return _parse_note(rtttl, idx, header, header.time_for_whole_note_ms)
+
+
+def parse_next_note_us(rtttl: str, idx: int, header: SongHeader):
+    """
+    Like :func:`parse_next_note`, but with the duration in microseconds.
+
+    The whole-note time is ``240_000_000 // bpm`` µs, so the tempo is exact
+    to a microsecond instead of being truncated to whole milliseconds per
+    beat.
+
+    Returns:
+        Tuple ``(note_index, octave, duration_us, next_idx)``.
+    """
+    return _parse_note(rtttl, idx, header, header.time_for_whole_note_us)
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _parse_note(rtttl: str, idx: int, header: SongHeader, whole: int):
+    """Shared body of the note parsers; *whole* is the whole-note duration."""
     # --- duration digits ---
     duration_num, idx = _read_int(rtttl, idx)
     if duration_num == 0:
         duration_num = header.default_duration
-    duration_ms = header.time_for_whole_note_ms // duration_num
+    duration = whole // duration_num
 
     if idx >= len(rtttl):
-        return 42, header.default_octave, duration_ms, idx
+        return 42, header.default_octave, duration, idx
 
     # --- note letter ---
     note_char = rtttl[idx].lower()
@@ -142,7 +167,7 @@ def parse_next_note(rtttl: str, idx: int, header: SongHeader):
 
     # --- first dot ---
     if idx < len(rtttl) and rtttl[idx] == '.':
-        duration_ms += duration_ms // 2
+        duration += duration // 2
         idx += 1
 
     # --- octave digit ---
@@ -154,20 +179,16 @@ def parse_next_note(rtttl: str, idx: int, header: SongHeader):
 
     # --- second dot (rare) ---
     if idx < len(rtttl) and rtttl[idx] == '.':
-        duration_ms += duration_ms // 2
+        duration += duration // 2
         idx += 1
 
     # --- skip comma separator ---
     if idx < len(rtttl) and rtttl[idx] == ',':
         idx += 1
 
-    return note_index, octave, duration_ms, idx
+    return note_index, octave, duration, idx
 
 
-# ---------------------------------------------------------------------------
-# Internal helpers
-# ---------------------------------------------------------------------------
-
 def _read_int(s: str, idx: int):
     """Read consecutive digit characters starting at idx.  Returns (value, new_idx)."""
     num = 0
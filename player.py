@@ -13,16 +13,27 @@ Usage example::
 
     while player.update():             # call from your main loop
         pass
+
+Playlist example::
+
+    from rtttl.constants import REPEAT_ALL
+
+    player.enqueue(RTTTL_MELODIES[3])  # starts at once if nothing is playing
+    player.enqueue(RTTTL_MELODIES[7])  # follows without a gap
+    player.set_repeat(REPEAT_ALL)
 """
 
-import time
 import random as _random
 
-from machine import PWM, Pin
-
-from .constants import STYLE_DEFAULT
-from .notes import get_frequency
-from .parser import parse_header, parse_next_note
+from .backends import PWMBackend
+from .compat import ticks_us, ticks_diff, ticks_add, sleep_ms
+from .constants import (STYLE_DEFAULT, STREAM_CHUNK_SIZE, RESYNC_LATENESS_US, TEMPO_ONE,
+                        REPEAT_OFF, REPEAT_ONE, REPEAT_ALL)
+from .compiler import as_compiled
+from .notes import (get_frequency, tone_length, transpose_frequency,
+                    tempo_factor, scale_duration)
+from .stream import NoteStream
+from .timing import LatenessStats, PlayerStats, ProbeBackend
 
 
 class PlayRtttl:
@@ -30,73 +41,186 @@ class PlayRtttl:
 
     Args:
         pin:           GPIO pin number connected to the buzzer/speaker.
+                       Ignored when *backend* is given.
         style_divisor: Default playback style.  Override per-song via the
                        RTTTL ``s=`` parameter.  Common values:
 
                        * ``STYLE_NATURAL`` (16)   – slight gap between notes (default)
                        * ``STYLE_STACCATO`` (2)   – short notes with long gaps
                        * ``STYLE_CONTINUOUS`` (0) – notes run end-to-end
+        backend:       Output backend (see :mod:`rtttl.backends`).  Defaults
+                       to a :class:`~rtttl.backends.PWMBackend` on *pin*.
+        clock:         Zero-argument callable returning the time in
+                       ``ticks_us`` units.  Pass a
+                       :class:`~rtttl.simulate.VirtualClock` to play a song
+                       in simulated time (see :mod:`rtttl.simulate`).
+
+    Notes are scheduled on an absolute timeline in microseconds: each note
+    starts where the previous one was *scheduled* to end, not where the poll
+    that played it happened to run, so late ``update()`` calls do not slow
+    the song down.  How late each note actually began is recorded in
+    :attr:`lateness` (a :class:`~rtttl.timing.LatenessStats`).
+
+    :meth:`set_transpose` and :meth:`set_tempo` are applied note by note as
+    the song plays, so they can be changed at any time.
+
+    Songs added with :meth:`enqueue` form a playlist.  The next one is
+    compiled while the current one plays (during ``update()`` calls that
+    find no note due) and starts exactly where the current one is scheduled
+    to end, so there is no gap between songs.
+
+    :meth:`enable_stats` adds call counters, timers and a per-note hook for
+    profiling; while it is off, the playback path carries no extra code.
     """
 
-    def __init__(self, pin: int, style_divisor: int = STYLE_DEFAULT):
-        self._pwm = PWM(Pin(pin))
-        self._pwm.freq(1000)       # arbitrary valid starting frequency
-        self._pwm.duty_u16(0)      # silent
+    def __init__(self, pin: int = None, style_divisor: int = STYLE_DEFAULT,
+                 backend=None, clock=ticks_us):
+        if backend is None:
+            if pin is None:
+                raise ValueError("PlayRtttl needs a pin or a backend")
+            backend = PWMBackend(pin)
+        self._pwm   = backend
+        self._clock = clock             # ticks_us-compatible time source
 
         self._style_divisor = style_divisor
+        self._transpose     = 0           # semitones added to every note
+        self._tempo         = TEMPO_ONE   # note-length factor (see set_tempo)
 
         # Runtime state
         self._is_running       = False
-        self._rtttl            = ""
+        self._source           = None   # RTTTL string or CompiledSong
         self._header           = None
-        self._next_idx         = 0
-        self._notes_start      = 0
-        self._next_action_time = 0
-        self._tone_stop_time   = 0
+        self._notes            = None   # compiled (freq, tone_us, gap_us) stream
+        self._note_pos         = 0      # index of the next triple in _notes
+        self._stream           = None   # NoteStream when playing from a file
+        self._stream_notes     = None   # its note generator
+        self._stream_style     = STYLE_DEFAULT
+        self._next_action_time = 0      # ticks_us of the next note's scheduled start
+        self._tone_stop_time   = 0      # ticks_us of the current tone's end
+        self._tone_on          = False
         self._loops_left       = 1
+        self._loops_total      = 1
+        self._index            = None   # NoteIndex of the compiled song
         self._on_complete      = None
+        self._loads            = 0      # songs loaded so far
+
+        # Playlist
+        self._playlist       = []         # (rtttl, on_complete) entries
+        self._play_pos       = -1         # playlist index of the current song
+        self._up_next_pos    = -1         # playlist index of the prepared song
+        self._up_next_song   = None       # its CompiledSong (None: unparsable)
+        self._prepare_needed = False      # _up_next_* is stale
+        self._shuffle        = False
+        self._repeat         = REPEAT_OFF
+
+        self.lateness = LatenessStats()
+        self._stats   = None            # PlayerStats while instrumented
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
-    def start(self, rtttl: str, on_complete=None) -> bool:
+    def start(self, rtttl, on_complete=None) -> bool:
         """Begin playback in non-blocking mode.
 
         Args:
-            rtttl:       RTTTL-formatted string.
+            rtttl:       RTTTL-formatted string, or a
+                         :class:`~rtttl.compiler.CompiledSong` (e.g. from a
+                         melody bank) or frozen song constant (see
+                         :mod:`rtttl.freeze`), which are played without
+                         parsing.
             on_complete: Optional zero-argument callable invoked when the
                          song (including all loops) finishes.
 
         Returns:
             ``True`` on success, ``False`` if the header could not be parsed.
         """
-        self._header = parse_header(rtttl)
-        if self._header.notes_start < 0:
+        song = self._compile(rtttl)
+        if song is None:
             return False
 
-        # Honour per-song style only if the header specified one explicitly;
-        # otherwise fall back to the instance-level default.
-        # parse_header already stored the per-song style in _header.style_divisor.
-        # We always use _header.style_divisor during playback, so that is fine.
-
-        self._rtttl            = rtttl
-        self._notes_start      = self._header.notes_start
-        self._next_idx         = self._header.notes_start
-        self._loops_left       = max(self._header.number_of_loops, 1)
-        self._next_action_time = 0
-        self._tone_stop_time   = 0
+        self._load(song, rtttl, on_complete)
+        self._next_action_time = self._clock()
+        self.update()
+        return True
+
+    def start_at(self, rtttl, at_us: int, on_complete=None) -> bool:
+        """Like :meth:`start`, but the first note begins at clock time *at_us*.
+
+        Used to start several players at one shared instant (see
+        :mod:`rtttl.sync`).  Until then :meth:`update` just waits.
+
+        Args:
+            at_us: Start time in the units of the player's clock
+                   (``ticks_us``); must not lie more than ~250 ms in the past.
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        song = self._compile(rtttl)
+        if song is None:
+            return False
+
+        self._load(song, rtttl, on_complete)
+        self._next_action_time = at_us
+        self.update()
+        return True
+
+    def start_stream(self, source, on_complete=None,
+                     chunk_size: int = STREAM_CHUNK_SIZE) -> bool:
+        """Begin non-blocking playback straight from a file or byte stream.
+
+        The song is parsed incrementally while it plays, so memory use stays
+        constant regardless of its length.  ``l=`` loops are honoured only if
+        *source* supports ``seek()``.
+
+        Args:
+            source:      File-like object positioned at the start of an RTTTL
+                         song (see :class:`~rtttl.stream.NoteStream`).
+            on_complete: Optional zero-argument callable invoked when the
+                         song (including all loops) finishes.
+            chunk_size:  Size of the read buffer in bytes.
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        stream = NoteStream(source, chunk_size)
+        header = stream.header
+        if header.notes_start < 0:
+            return False
+
+        self._source           = None
+        self._header           = header
+        self._notes            = None
+        self._stream           = stream
+        self._stream_notes     = stream.notes_us()
+        self._stream_style     = header.style_divisor \
+            if header.style_divisor != STYLE_DEFAULT else self._style_divisor
+        self._loops_total      = max(header.number_of_loops, 1)
+        self._loops_left       = self._loops_total
+        self._index            = None
+        self._next_action_time = self._clock()
+        self._tone_on          = False
         self._is_running       = True
         self._on_complete      = on_complete
+        self._loads           += 1
 
         self.update()
         return True
 
-    def play_blocking(self, rtttl: str) -> None:
-        """Play an RTTTL string synchronously (blocks until finished)."""
-        if self.start(rtttl):
+    def play_blocking(self, rtttl, sleep=None) -> None:
+        """Play an RTTTL string or stream synchronously (blocks until finished).
+
+        Between notes the player sleeps until its next deadline instead of
+        polling.
+
+        Args:
+            sleep: See :meth:`wait`; pass
+                   :func:`~rtttl.compat.low_power_sleep` on battery power.
+        """
+        if self._start_any(rtttl):
             while self.update():
-                time.sleep_ms(1)
+                self.wait(sleep)
 
     def update(self) -> bool:
         """Advance the player state machine.
@@ -110,60 +234,376 @@ class PlayRtttl:
         if not self._is_running:
             return False
 
-        now = time.ticks_ms()
+        now = self._clock()
 
         # --- silence the buzzer when the tone portion is over ---
-        if self._tone_stop_time and time.ticks_diff(now, self._tone_stop_time) >= 0:
+        if self._tone_on and ticks_diff(now, self._tone_stop_time) >= 0:
             self._pwm.duty_u16(0)
-            self._tone_stop_time = 0
+            self._tone_on = False
 
         # --- not yet time for the next note ---
-        if time.ticks_diff(now, self._next_action_time) < 0:
+        late = ticks_diff(now, self._next_action_time)
+        if late < 0:
+            if self._prepare_needed:  # idle: get the next song ready
+                self._prepare_next()
             return True
 
-        # --- end of notes string ---
-        if self._next_idx >= len(self._rtttl):
+        if self._stream is not None:
+            return self._update_stream(now, late)
+
+        # --- end of note stream ---
+        notes = self._notes
+        pos = self._note_pos
+        if pos >= len(notes):
             if self._loops_left > 1:
                 self._loops_left -= 1
-                self._next_idx = self._notes_start
+                self._note_pos = 0
                 return self.update()
-            self._finish()
-            return False
-
-        # --- parse and play next note ---
-        note_index, octave, duration_ms, self._next_idx = parse_next_note(
-            self._rtttl, self._next_idx, self._header
-        )
-
-        style = self._header.style_divisor if self._header.style_divisor != STYLE_DEFAULT \
-                else self._style_divisor
-
-        if note_index <= 11:          # pitched note
-            freq = get_frequency(note_index, octave)
-            if style != 0:
-                tone_ms = duration_ms - ((duration_ms + (style // 2)) // style)
-            else:
-                tone_ms = duration_ms
-            self._pwm.freq(freq)
-            self._pwm.duty_u16(32768)  # 50 % duty cycle → square wave
-            self._tone_stop_time = now + tone_ms
-        else:                         # rest / pause
-            self._pwm.duty_u16(0)
-            self._tone_stop_time = 0
+            return self._song_done()
 
-        self._next_action_time = now + duration_ms
+        # --- play next pre-compiled note ---
+        self._note_pos = pos + 3
+        self._play_note(now, late, notes[pos], notes[pos + 1], notes[pos + 2])
         return True
 
     def stop(self) -> None:
         """Immediately stop playback and silence the buzzer."""
         self._pwm.duty_u16(0)
-        self._tone_stop_time = 0
+        self._tone_on = False
         self._is_running = False
 
     def is_playing(self) -> bool:
         """Return ``True`` if playback is in progress."""
         return self._is_running
 
+    def next_deadline_ms(self) -> int:
+        """Milliseconds until :meth:`update` next has work to do.
+
+        Rounded up, so calling :meth:`update` after sleeping this long never
+        finds the event not yet due.  Main loops can sleep (or do other work)
+        until then instead of polling.
+
+        Returns:
+            ``0`` if :meth:`update` should be called now, ``-1`` if nothing
+            is playing.
+        """
+        if not self._is_running:
+            return -1
+        if self._prepare_needed:        # the next playlist song wants compiling
+            return 0
+        return self._ms_until_next_event()
+
+    def wait(self, sleep=None) -> None:
+        """Sleep until :meth:`next_deadline_ms`; returns at once if not playing.
+
+        Args:
+            sleep: Callable ``sleep(ms, output_active)``, told whether a tone
+                   is sounding.  Defaults to a plain ``sleep_ms``.
+                   :func:`~rtttl.compat.low_power_sleep` idles the CPU during
+                   tones and light-sleeps during rests;
+                   :meth:`VirtualClock.sleep
+                   <rtttl.simulate.VirtualClock.sleep>` simulates it.
+        """
+        ms = self.next_deadline_ms()
+        if ms > 0:
+            if sleep is None:
+                sleep_ms(ms)
+            else:
+                sleep(ms, self._tone_on)
+
+    # ------------------------------------------------------------------
+    # Position and seeking
+    # ------------------------------------------------------------------
+
+    def duration_ms(self) -> int:
+        """Length of the current song in ms, all ``l=`` loops included.
+
+        Returns -1 for streamed songs, whose length is not known up front.
+        """
+        if self._index is None:
+            return -1 if self._stream is not None else 0
+        return self._index.total_us() * self._loops_total // 1000
+
+    def position_ms(self) -> int:
+        """Time since the start of the song in ms, loops included.
+
+        Measured at the song's own tempo, like :meth:`duration_ms` and
+        :meth:`seek`, whatever :meth:`set_tempo` is set to.  Returns 0 when
+        nothing is playing or the first note has not started yet (see
+        :meth:`start_at`), and -1 for streamed songs.
+        """
+        index = self._index
+        if not self._is_running or index is None:
+            return -1 if self._stream is not None else 0
+        starts = index.starts
+        done = self._loops_total - self._loops_left
+        if self._note_pos < 3:                      # no note started yet
+            return done * starts[-1] // 1000
+        k = self._note_pos // 3 - 1                 # note now playing
+        length = starts[k + 1] - starts[k]
+        tempo = self._tempo
+        if tempo != TEMPO_ONE:
+            length = scale_duration(length, tempo)
+        into = ticks_diff(self._clock(), ticks_add(self._next_action_time, -length))
+        if into < 0:
+            into = 0
+        elif into > length:
+            into = length
+        if tempo != TEMPO_ONE:
+            into = into * TEMPO_ONE // tempo        # back to song time
+        return (done * starts[-1] + starts[k] + into) // 1000
+
+    def source_offset(self) -> int:
+        """Offset of the playing note's token in the RTTTL text, or -1.
+
+        Only known for songs started from an RTTTL string, and once the
+        first note has started.
+        """
+        index = self._index
+        if not self._is_running or index is None or index.offsets is None \
+                or self._note_pos < 3:
+            return -1
+        return index.offsets[self._note_pos // 3 - 1]
+
+    def seek(self, ms: int) -> bool:
+        """Jump to *ms* milliseconds into the song (loops included).
+
+        The note at that time starts sounding at once, part-way through,
+        and the rest of the song keeps its timing.  Seeking past the end
+        ends the song as if it had played out: ``on_complete`` is called
+        and the playlist and repeat mode carry on from there.
+
+        Returns:
+            ``False`` if nothing is playing or the song is streamed.
+        """
+        index = self._index
+        if not self._is_running or index is None:
+            return False
+        stats = self._stats
+        total = index.total_us()
+        t = ms * 1000 if ms > 0 else 0
+        loop = t // total if total else self._loops_total
+        if loop >= self._loops_total:
+            if stats is not None:
+                stats.skipped += self._notes_total() - self._notes_played()
+            self._pwm.duty_u16(0)
+            self._tone_on          = False
+            self._loops_left       = 1
+            self._note_pos         = len(self._notes)
+            self._next_action_time = self._clock()
+            self._song_done()
+            return True
+
+        into = t - loop * total
+        k = index.find(into)
+        if stats is not None:
+            jumped = loop * (len(index.starts) - 1) + k - self._notes_played()
+            if jumped > 0:
+                stats.skipped += jumped
+        into -= index.starts[k]
+        notes = self._notes
+        pos = k * 3
+        freq = notes[pos]
+        tone_us = notes[pos + 1]
+        gap_us = notes[pos + 2]
+        if freq and self._transpose:
+            freq = transpose_frequency(freq, self._transpose)
+        tempo = self._tempo
+        if tempo != TEMPO_ONE:
+            tone_us = scale_duration(tone_us, tempo)
+            gap_us = scale_duration(gap_us, tempo)
+            into = scale_duration(into, tempo)
+        start = ticks_add(self._clock(), -into)
+
+        self._loops_left = self._loops_total - loop
+        self._note_pos   = pos + 3
+        if freq and into < tone_us:
+            self._pwm.freq(freq)
+            self._pwm.duty_u16(32768)
+            self._tone_stop_time = ticks_add(start, tone_us)
+            self._tone_on = True
+        else:
+            self._pwm.duty_u16(0)
+            self._tone_on = False
+        self._next_action_time = ticks_add(start, tone_us + gap_us)
+        return True
+
+    # ------------------------------------------------------------------
+    # Playlist
+    # ------------------------------------------------------------------
+
+    def enqueue(self, rtttl, on_complete=None) -> None:
+        """Add a song to the end of the playlist.
+
+        If nothing is playing, the song starts at once.  Otherwise it plays,
+        without a gap, after the songs already queued.  Songs whose header
+        cannot be parsed are skipped when their turn comes.
+
+        Args:
+            rtttl:       RTTTL string or :class:`~rtttl.compiler.CompiledSong`.
+            on_complete: Optional zero-argument callable invoked each time
+                         this song finishes.
+        """
+        self._playlist.append((rtttl, on_complete))
+        self._prepare_needed = True
+        if not self._is_running:
+            self.skip()
+
+    def skip(self) -> bool:
+        """Cut the current song short and start the next playlist song now.
+
+        The skipped song's ``on_complete`` is not called.
+
+        Returns:
+            ``False`` (and playback stops) if there is no next song.
+        """
+        if self._stats is not None and self._is_running and self._index is not None:
+            self._stats.skipped += self._notes_total() - self._notes_played()
+        self._pwm.duty_u16(0)
+        self._tone_on = False
+        if not self._play_next():
+            self._is_running = False
+            return False
+        self._next_action_time = self._clock()
+        self.update()
+        return True
+
+    def queued(self) -> int:
+        """Number of playlist songs after the current one.
+
+        Songs replayed by :data:`~rtttl.constants.REPEAT_ALL` are not
+        counted again.
+        """
+        return len(self._playlist) - self._play_pos - 1
+
+    def clear_queue(self) -> None:
+        """Empty the playlist; the current song plays to its end."""
+        del self._playlist[:]
+        self._play_pos       = -1
+        self._up_next_pos    = -1
+        self._up_next_song   = None
+        self._prepare_needed = False
+
+    def set_shuffle(self, on: bool = True) -> None:
+        """Pick each next playlist song at random from those not yet played.
+
+        The pick is the same as :meth:`play_random`'s; with
+        :data:`~rtttl.constants.REPEAT_ALL` every round is reshuffled.
+        """
+        self._shuffle = on
+        self._prepare_needed = True
+
+    def set_repeat(self, mode: int) -> None:
+        """Set the repeat mode: ``REPEAT_OFF``, ``REPEAT_ONE`` or ``REPEAT_ALL``.
+
+        ``REPEAT_ONE`` replays the current song (``on_complete`` is still
+        called after every pass); ``REPEAT_ALL`` starts the playlist over
+        after its last song.  Except under ``REPEAT_ALL``, songs are dropped
+        from the playlist once the next one starts, so a long-running queue
+        does not grow.
+        """
+        self._repeat = mode
+        self._prepare_needed = True
+
+    # ------------------------------------------------------------------
+    # Instrumentation
+    # ------------------------------------------------------------------
+
+    def enable_stats(self, on_note=None) -> PlayerStats:
+        """Start counting what the player does (see :meth:`stats`).
+
+        ``update()``, song compilation, stream parsing and the output
+        backend are wrapped with counting versions.  Nothing changes in the
+        playback path itself, so with stats disabled it costs nothing.
+
+        Args:
+            on_note: Optional callable ``on_note(player)`` invoked after
+                     every ``update()`` call that started a note, e.g. to
+                     sample :meth:`position_ms` or :meth:`source_offset`.
+
+        Returns:
+            The new, zeroed :class:`~rtttl.timing.PlayerStats`.
+        """
+        self.disable_stats()
+        stats = self._stats = PlayerStats()
+        self._pwm = ProbeBackend(self._pwm, stats)
+        player = self
+        lateness = self.lateness
+        cls = type(self)
+        plain_update = cls.update
+        plain_compile = cls._compile
+        plain_parse = cls._next_stream_note
+
+        def update():
+            if stats._depth:          # update() calling itself
+                return plain_update(player)
+            notes = lateness.notes
+            tone_on = player._tone_on
+            stats._depth = 1
+            t0 = ticks_us()
+            try:
+                playing = plain_update(player)
+            finally:
+                stats._depth = 0
+            took = ticks_diff(ticks_us(), t0)
+            stats.updates += 1
+            stats.update_us += took
+            if took > stats.max_update_us:
+                stats.max_update_us = took
+            started = lateness.notes - notes
+            if started:
+                stats.notes += started
+                if on_note is not None:
+                    on_note(player)
+            elif not tone_on or player._tone_on:
+                stats.idle_updates += 1
+            return playing
+
+        def compile_song(rtttl):
+            t0 = ticks_us()
+            song = plain_compile(player, rtttl)
+            stats.parse_us += ticks_diff(ticks_us(), t0)
+            stats.parse_calls += 1
+            return song
+
+        def next_stream_note():
+            t0 = ticks_us()
+            note = plain_parse(player)
+            stats.parse_us += ticks_diff(ticks_us(), t0)
+            stats.parse_calls += 1
+            return note
+
+        # Instance attributes shadow the plain methods.
+        self.update = update
+        self._compile = compile_song
+        self._next_stream_note = next_stream_note
+        return stats
+
+    def disable_stats(self) -> None:
+        """Remove the instrumentation added by :meth:`enable_stats`."""
+        if self._stats is None:
+            return
+        del self.update
+        del self._compile
+        del self._next_stream_note
+        self._pwm = self._pwm.backend
+        self._stats = None
+
+    def stats(self) -> dict:
+        """Snapshot of the player's statistics as a plain dict.
+
+        Always has a ``lateness`` entry (see
+        :meth:`LatenessStats.snapshot() <rtttl.timing.LatenessStats.snapshot>`).
+        The :class:`~rtttl.timing.PlayerStats` counters are included while
+        :meth:`enable_stats` is in effect; otherwise ``enabled`` is ``False``.
+        """
+        if self._stats is None:
+            snap = {"enabled": False}
+        else:
+            snap = self._stats.snapshot()
+        snap["lateness"] = self.lateness.snapshot()
+        return snap
+
     # ------------------------------------------------------------------
     # Configuration helpers
     # ------------------------------------------------------------------
@@ -171,6 +611,30 @@ class PlayRtttl:
     def set_style(self, style_divisor: int) -> None:
         """Change the default playback style at runtime."""
         self._style_divisor = style_divisor
+        if self._stream is not None:
+            if self._header.style_divisor == STYLE_DEFAULT:
+                self._stream_style = style_divisor
+        elif self._is_running:
+            # Re-split the remaining notes with the new style; the position
+            # in the stream is unchanged.
+            self._notes = as_compiled(self._source, style_divisor).notes
+
+    def set_transpose(self, semitones: int) -> None:
+        """Shift every following note by *semitones* (0 = as written).
+
+        Takes effect from the next note and stays set for later songs.
+        """
+        self._transpose = semitones
+
+    def set_tempo(self, scale=1) -> None:
+        """Play *scale* times as fast as written (2 = double speed).
+
+        Takes effect from the next note and stays set for later songs.
+
+        Raises:
+            ValueError: if *scale* is not positive.
+        """
+        self._tempo = tempo_factor(scale)
 
     def set_loops(self, n: int) -> None:
         """Set loop count for the *next* call to :meth:`start` (0 = forever)."""
@@ -190,27 +654,220 @@ class PlayRtttl:
         """
         if not songs:
             return None
-        chosen = songs[_random.randint(0, len(songs) - 1)]
+        chosen = songs[_random_index(0, len(songs))]
         self.start(chosen, on_complete)
         return chosen
 
-    def play_random_blocking(self, songs: list) -> str | None:
-        """Play a random song from *songs* (blocking).
+    def play_random_blocking(self, songs: list, sleep=None) -> str | None:
+        """Play a random song from *songs* (blocking; *sleep* as in
+        :meth:`play_blocking`).
 
         Returns:
             The selected RTTTL string, or ``None`` if *songs* is empty.
         """
         if not songs:
             return None
-        chosen = songs[_random.randint(0, len(songs) - 1)]
-        self.play_blocking(chosen)
+        chosen = songs[_random_index(0, len(songs))]
+        self.play_blocking(chosen, sleep)
         return chosen
 
     # ------------------------------------------------------------------
     # Internal
     # ------------------------------------------------------------------
 
-    def _finish(self) -> None:
-        self.stop()
-        if self._on_complete is not None:
-            self._on_complete()
+    def _start_any(self, rtttl, on_complete=None) -> bool:
+        """:meth:`start_stream` for file-like objects, :meth:`start` otherwise."""
+        if hasattr(rtttl, "read") or hasattr(rtttl, "readinto"):
+            return self.start_stream(rtttl, on_complete)
+        return self.start(rtttl, on_complete)
+
+    def _compile(self, rtttl):
+        """Compile (or fetch from the cache) *rtttl* for the current style."""
+        return as_compiled(rtttl, self._style_divisor)
+
+    def _next_stream_note(self):
+        """Parse the next note of the streamed song, or ``None`` at its end."""
+        return next(self._stream_notes, None)
+
+    def _notes_played(self) -> int:
+        """Notes of the compiled song started so far, loops included."""
+        done = self._loops_total - self._loops_left
+        return done * (len(self._index.starts) - 1) + self._note_pos // 3
+
+    def _notes_total(self) -> int:
+        """Notes of the compiled song, loops included."""
+        return self._loops_total * (len(self._index.starts) - 1)
+
+    def _load(self, song, source, on_complete) -> None:
+        """Make compiled *song* current; the caller sets its start time."""
+        self._source           = source
+        self._header           = song.header
+        self._notes            = song.notes
+        self._note_pos         = 0
+        self._stream           = None
+        self._stream_notes     = None
+        self._loops_total      = max(song.header.number_of_loops, 1)
+        self._loops_left       = self._loops_total
+        self._index            = song.index(source if isinstance(source, str) else None)
+        self._tone_on          = False
+        self._is_running       = True
+        self._on_complete      = on_complete
+        self._loads           += 1
+
+    def _next_pos(self) -> int:
+        """Playlist index of the song after the current one, or -1."""
+        playlist = self._playlist
+        n = len(playlist)
+        k = self._play_pos + 1
+        if k >= n:
+            if self._repeat != REPEAT_ALL or not n:
+                return -1
+            k = 0
+        if self._shuffle and k < n - 1:
+            # Move a random not-yet-played song into slot k (Fisher-Yates,
+            # one step per song).
+            j = _random_index(k, n)
+            playlist[k], playlist[j] = playlist[j], playlist[k]
+        return k
+
+    def _prepare_next(self) -> None:
+        """Compile the next playlist song ahead of its start."""
+        self._prepare_needed = False
+        k = self._next_pos()
+        song = None
+        if k >= 0:
+            rtttl = self._playlist[k][0]
+            song = self._compile(rtttl)
+            if song is not None:
+                song.index(rtttl if isinstance(rtttl, str) else None)
+        self._up_next_pos  = k
+        self._up_next_song = song
+
+    def _play_next(self) -> bool:
+        """Load the next playlist song, keeping the current start time.
+
+        Returns ``False`` if the playlist has no playable song left.
+        """
+        for _ in range(len(self._playlist)):
+            if self._prepare_needed:
+                self._prepare_next()
+            k = self._up_next_pos
+            if k < 0:
+                return False
+            song = self._up_next_song
+            if k and self._repeat != REPEAT_ALL:
+                del self._playlist[:k]      # played songs are not needed again
+                k = 0
+            self._play_pos       = k
+            self._prepare_needed = True
+            if song is not None and song.note_count:
+                # Re-split if the style changed since it was prepared.
+                song = as_compiled(song, self._style_divisor)
+                self._load(song, self._playlist[k][0], self._playlist[k][1])
+                return True
+        return False
+
+    def _song_done(self) -> bool:
+        """Call ``on_complete``, then continue with the next song (or this
+        one again) or finish.
+
+        The callback runs before the next song is chosen, so repeat-mode and
+        playlist changes it makes apply at once.  If it starts or stops a
+        song itself, that takes over.
+        """
+        done = self._on_complete
+        if done is not None:
+            loads = self._loads
+            done()
+            if self._loads != loads or not self._is_running:
+                return self._is_running
+        if not (self._repeat == REPEAT_ONE and self._restart()) \
+                and not self._play_next():
+            self._stream = None
+            self._stream_notes = None
+            self.stop()
+            return False
+        # The next song starts where this one was scheduled to end.
+        self.update()
+        return self._is_running
+
+    def _restart(self) -> bool:
+        """Rewind the current song for :data:`REPEAT_ONE`."""
+        if self._stream is not None:
+            if not self._stream.rewind():
+                return False
+            self._stream_notes = self._stream.notes_us()
+        elif not self._notes:
+            return False
+        self._note_pos = 0
+        self._loops_left = self._loops_total
+        return True
+
+    def _us_until_next_event(self) -> int:
+        """Microseconds until the next tone stop or note boundary (>= 0)."""
+        now = self._clock()
+        wait = ticks_diff(self._next_action_time, now)
+        if self._tone_on:
+            tone_wait = ticks_diff(self._tone_stop_time, now)
+            if tone_wait < wait:
+                wait = tone_wait
+        return wait if wait > 0 else 0
+
+    def _ms_until_next_event(self) -> int:
+        """Milliseconds until the next tone stop or note boundary, rounded up."""
+        return (self._us_until_next_event() + 999) // 1000
+
+    def _play_note(self, now: int, late: int, freq: int, tone_us: int,
+                   gap_us: int) -> None:
+        # The note is timed from its scheduled start, not from *now*, unless
+        # the player stalled for so long that catching up would garble the
+        # following notes.
+        start = self._next_action_time
+        if late > RESYNC_LATENESS_US:
+            start = now
+            self.lateness.resyncs += 1
+        self.lateness.record(late)
+
+        # Transpose / tempo: a table lookup and a multiply, no allocation.
+        if freq and self._transpose:
+            freq = transpose_frequency(freq, self._transpose)
+        tempo = self._tempo
+        if tempo != TEMPO_ONE:
+            tone_us = scale_duration(tone_us, tempo)
+            gap_us = scale_duration(gap_us, tempo)
+
+        if freq:                      # pitched note
+            self._pwm.freq(freq)
+            self._pwm.duty_u16(32768)  # 50 % duty cycle → square wave
+            self._tone_stop_time = ticks_add(start, tone_us)
+            self._tone_on = True
+        else:                         # rest / pause
+            self._pwm.duty_u16(0)
+            self._tone_on = False
+
+        self._next_action_time = ticks_add(start, tone_us + gap_us)
+
+    def _update_stream(self, now: int, late: int) -> bool:
+        """Parse and play the next note of a streamed song."""
+        note = self._next_stream_note()
+        while note is None:
+            if self._loops_left > 1 and self._stream.rewind():
+                self._loops_left -= 1
+                self._stream_notes = self._stream.notes_us()
+                note = self._next_stream_note()
+                continue
+            return self._song_done()
+
+        note_index, octave, duration_us = note
+        if note_index <= 11:          # pitched note
+            tone_us = tone_length(duration_us, self._stream_style)
+            self._play_note(now, late, get_frequency(note_index, octave),
+                            tone_us, duration_us - tone_us)
+        else:                         # rest / pause
+            self._play_note(now, late, 0, 0, duration_us)
+        return True
+
+
+def _random_index(lo: int, hi: int) -> int:
+    """Random integer in ``lo … hi - 1``."""
+    return _random.randint(lo, hi - 1)
@@ -0,0 +1,123 @@
+"""
+rtttl/render.py
+~~~~~~~~~~~~~~~
+Offline RTTTL → PCM / WAV renderer for host machines (CPython + NumPy).
+
+Synthesises the same square wave that :class:`~rtttl.player.PlayRtttl`
+drives onto the buzzer, including style divisors and ``l=`` loops, so songs
+can be previewed and regression-tested without a board.  Whole songs are
+built with vectorised NumPy operations; there is no per-sample Python loop.
+
+This module needs NumPy and is not imported by ``rtttl/__init__.py``, so it
+never gets loaded on the device.
+
+Usage example::
+
+    from rtttl.render import render_pcm, render_wav
+    from rtttl.melodies import RTTTL_MELODIES
+
+    pcm = render_pcm(RTTTL_MELODIES[21])          # int16 samples
+    render_wav(RTTTL_MELODIES[21], "nokia.wav")
+"""
+
+import wave
+
+import numpy as np
+
+from .constants import STYLE_DEFAULT
+from .compiler import compile_rtttl
+
+DEFAULT_SAMPLE_RATE = 22050
+DEFAULT_AMPLITUDE   = 16384
+
+
+def note_table(rtttl: str, style_divisor: int = STYLE_DEFAULT):
+    """
+    Return the note stream of *rtttl* as a ``(n, 3)`` NumPy array.
+
+    Columns are ``frequency, tone_us, gap_us`` — the values the player uses
+    for each note.  Loops are not expanded.
+
+    Raises:
+        ValueError: if the RTTTL header cannot be parsed.
+    """
+    song = compile_rtttl(rtttl, style_divisor)
+    if song is None:
+        raise ValueError("invalid RTTTL header: %r" % rtttl[:40])
+    table = np.frombuffer(song.notes, dtype=np.uint32).reshape(-1, 3)
+    loops = max(song.header.number_of_loops, 1)   # same rule as PlayRtttl
+    if loops > 1:
+        table = np.tile(table, (loops, 1))
+    return table.astype(np.int64)
+
+
+def render_pcm(rtttl: str,
+               sample_rate: int = DEFAULT_SAMPLE_RATE,
+               style_divisor: int = STYLE_DEFAULT,
+               amplitude: int = DEFAULT_AMPLITUDE):
+    """
+    Render an RTTTL string to mono signed 16-bit PCM.
+
+    Args:
+        rtttl:         Full RTTTL string.
+        sample_rate:   Output sample rate in Hz.
+        style_divisor: Fallback playback style (as for ``PlayRtttl``).
+        amplitude:     Peak sample value of the square wave.
+
+    Returns:
+        ``numpy.ndarray`` of ``int16`` samples.
+    """
+    table = note_table(rtttl, style_divisor)
+    if not len(table):
+        return np.zeros(0, dtype=np.int16)
+
+    freq    = table[:, 0]
+    tone_us = table[:, 1]
+    note_us = tone_us + table[:, 2]
+
+    # Note boundaries from the cumulative microsecond timeline, so rounding
+    # to whole samples never accumulates drift.
+    ends = np.cumsum(note_us) * sample_rate // 1_000_000
+    starts = np.concatenate(([0], ends[:-1]))
+    lengths = ends - starts
+    total = int(ends[-1])
+
+    # Per-sample offset from the start of its note, and the half-period
+    # rate (half periods per sample) of the note it belongs to.  Sample
+    # numbers are kept as integers: float32 is only exact up to 2**24
+    # (about six minutes at 44.1 kHz), offsets within a note stay small.
+    offset = np.arange(total, dtype=np.int64)
+    offset -= np.repeat(starts, lengths)
+    rate = np.repeat((freq * 2 / sample_rate).astype(np.float32), lengths)
+
+    # Silence after the tone part of each note and during rests.
+    tone_samples = np.where(freq > 0, tone_us * sample_rate // 1_000_000, 0)
+    quiet = offset >= np.repeat(tone_samples, lengths)
+
+    # The PWM output starts high at every note and toggles each half period.
+    half = (offset.astype(np.float32) * rate).astype(np.int32) & 1
+    pcm = (amplitude - 2 * amplitude * half).astype(np.int16)
+    pcm[quiet] = 0
+    return pcm
+
+
+def render_wav(rtttl: str, path,
+               sample_rate: int = DEFAULT_SAMPLE_RATE,
+               style_divisor: int = STYLE_DEFAULT,
+               amplitude: int = DEFAULT_AMPLITUDE) -> int:
+    """
+    Render an RTTTL string to a mono 16-bit WAV file.
+
+    Args:
+        path: File name or writable binary file object.
+
+    Returns:
+        Number of samples written.
+    """
+    pcm = render_pcm(rtttl, sample_rate, style_divisor, amplitude)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.astype("<i2").tobytes())
+    return len(pcm)
@@ -0,0 +1,557 @@
+"""
+rtttl/search.py
+~~~~~~~~~~~~~~~
+Name and melody search across large RTTTL collections (CPython).
+
+:class:`SongIndex` indexes compiled songs by name and by *melodic contour*:
+the sequence of semitone steps between consecutive pitched notes.  Steps
+do not depend on key or tempo, so a fragment matches in any
+transposition.  Every run of ``ngram`` steps is an inverted-index term.  A
+query scores songs by the terms they share with the fragment, including
+terms with one step off by a semitone, then re-ranks the best candidates
+by local alignment of the full step sequences.
+
+File layout (all integers little-endian)::
+
+    header    4s magic b"RTTI", u8 version, u8 ngram, u16 reserved,
+              u32 songs covered by the postings, u32 term count
+    terms     term count × (u32 term, u32 song count, u32 byte offset)
+    postings  per term: song ids as varint gaps
+    songs     one record per song, to end of file:
+                u16 name length, name (UTF-8), u16 ref length, ref (UTF-8),
+                u16 step count, steps (int8)
+
+New songs are appended as records only.  They are indexed when the file
+is opened, and :meth:`SongIndex.save` folds them into the postings.
+Postings are decoded only when a query needs them, so opening a large
+index is quick.
+
+Usage::
+
+    python -m rtttl.search build catalogue.rtti songs/
+    python -m rtttl.search add catalogue.rtti new_songs.txt
+    python -m rtttl.search name catalogue.rtti "nok"
+    python -m rtttl.search melody catalogue.rtti "8e6,8d6,f#5,g#5,8c#6,8b5"
+"""
+
+import argparse
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from .compiler import CompiledSong, compile_rtttl
+from .notes import key_of_frequency
+
+INDEX_MAGIC   = b"RTTI"
+INDEX_VERSION = 1
+
+DEFAULT_NGRAM      = 3      # steps per term (4 notes)
+DEFAULT_CANDIDATES = 50     # songs re-ranked by alignment per query
+MAX_STEP           = 24     # larger leaps are clamped to two octaves
+
+_RADIX = 2 * MAX_STEP + 1
+_HEADER = "<4sBBHII"
+_TERM   = "<III"
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_TERM_SIZE   = struct.calcsize(_TERM)
+
+# Alignment scores: same step, step off by one semitone, other step, gap
+_MATCH, _NEAR, _MISMATCH, _GAP = 2, 1, -1, -2
+
+
+def contour(song) -> array:
+    """
+    Semitone steps between the pitched notes of *song*.
+
+    Args:
+        song: :class:`~rtttl.compiler.CompiledSong`.
+
+    Returns:
+        ``array('b')`` of steps, each clamped to ``±MAX_STEP``.  Rests are
+        skipped.
+    """
+    notes = song.notes
+    steps = array('b')
+    prev = -1
+    for i in range(0, len(notes), 3):
+        freq = notes[i]
+        if not freq:
+            continue
+        key = key_of_frequency(freq)
+        if prev >= 0:
+            step = key - prev
+            if step > MAX_STEP:
+                step = MAX_STEP
+            elif step < -MAX_STEP:
+                step = -MAX_STEP
+            steps.append(step)
+        prev = key
+    return steps
+
+
+def fragment_contour(melody) -> array:
+    """
+    Steps of a query melody.
+
+    Args:
+        melody: A full RTTTL string, just its note section
+                (``"8e6,8d6,f#5"``), or a sequence of frequencies in Hz.
+
+    Raises:
+        ValueError: if the RTTTL text cannot be parsed.
+    """
+    if isinstance(melody, str):
+        text = melody if melody.count(":") >= 2 else "q:d=4,o=5,b=63:" + melody
+        song = compile_rtttl(text)
+        if song is None:
+            raise ValueError("cannot parse melody %r" % melody[:40])
+        return contour(song)
+    notes = array('I')
+    for freq in melody:
+        notes.extend((freq, 0, 0))
+    return contour(CompiledSong(None, notes, 0))
+
+
+class SongIndex:
+    """Inverted index over song names and melodic contours.
+
+    Args:
+        ngram: Steps per index term.  Longer terms are more selective, but
+               queries need at least ``ngram + 1`` notes.
+    """
+
+    def __init__(self, ngram: int = DEFAULT_NGRAM):
+        self.ngram      = ngram
+        self.path       = None
+        self._names     = []        # id → name
+        self._refs      = []        # id → ref
+        self._steps     = []        # id → array('b') contour
+        self._by_name   = []        # sorted (lowercase name, id)
+        self._blob      = b""       # postings block read from disk
+        self._on_disk   = {}        # term → (count, offset, end) in _blob
+        self._added     = {}        # term → array('I') of ids added since
+        self._decoded   = {}        # term → array('I'), decoded from _blob
+        self._disk_songs = 0        # songs covered by _on_disk
+        self._file_songs = 0        # song records already in the file
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, song, ref: str = "") -> int:
+        """
+        Index one song.
+
+        Args:
+            song: RTTTL string or :class:`~rtttl.compiler.CompiledSong`.
+            ref:  Free-form reference stored with it, e.g. ``"file:line"``.
+
+        Returns:
+            The song's id (ids count up from 0).
+
+        Raises:
+            ValueError: if an RTTTL header cannot be parsed.
+        """
+        if not isinstance(song, CompiledSong):
+            compiled = compile_rtttl(song)
+            if compiled is None:
+                raise ValueError("invalid RTTTL header: %r" % song[:40])
+            song = compiled
+        return self._add(song.header.name, ref, contour(song))
+
+    def name(self, song_id: int) -> str:
+        """Name of song *song_id*."""
+        return self._names[song_id]
+
+    def ref(self, song_id: int) -> str:
+        """Reference stored with song *song_id*."""
+        return self._refs[song_id]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def find_name(self, prefix: str, limit: int = 20) -> list:
+        """Ids of songs whose name starts with *prefix* (case-insensitive),
+        in name order."""
+        prefix = prefix.lower()
+        by_name = self._by_name
+        i = bisect_left(by_name, (prefix, -1))
+        found = []
+        while i < len(by_name) and len(found) < limit:
+            name, song_id = by_name[i]
+            if not name.startswith(prefix):
+                break
+            found.append(song_id)
+            i += 1
+        return found
+
+    def query(self, melody, limit: int = 10,
+              candidates: int = DEFAULT_CANDIDATES) -> list:
+        """
+        Songs containing a melody like *melody*, best first.
+
+        Args:
+            melody:     See :func:`fragment_contour`; any key, any tempo.
+            limit:      Number of results.
+            candidates: Songs pre-selected by shared terms and then ranked
+                        by alignment.
+
+        Returns:
+            List of ``(score, song_id)``.  A score of 1.0 means the whole
+            fragment occurs exactly; wrong, missing or extra notes lower it.
+
+        Raises:
+            ValueError: if *melody* has fewer than ``ngram + 1`` notes.
+        """
+        steps = fragment_contour(melody)
+        n = self.ngram
+        if len(steps) < n:
+            raise ValueError("melody needs at least %d notes" % (n + 1))
+
+        # --- candidate selection: shared terms, weighted by rarity ---
+        total = len(self)
+        scores = {}
+        for start in range(len(steps) - n + 1):
+            gram = steps[start:start + n]
+            best = {}
+            for term, weight in _variants(gram):
+                ids = self._postings(term)
+                if not ids:
+                    continue
+                w = weight * math.log(1 + total / len(ids))
+                for song_id in ids:
+                    if w > best.get(song_id, 0):
+                        best[song_id] = w
+            for song_id, w in best.items():
+                scores[song_id] = scores.get(song_id, 0) + w
+        ranked = sorted(scores, key=scores.get, reverse=True)[:candidates]
+
+        # --- re-rank by local alignment of the whole fragment ---
+        full = _MATCH * len(steps)
+        results = [(_align(steps, self._steps[song_id]) / full, song_id)
+                   for song_id in ranked]
+        results.sort(key=lambda r: (-r[0], r[1]))
+        return results[:limit]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, path: str):
+        """Load an index file; songs appended since the last
+        :meth:`save` are indexed now."""
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, ngram, _, covered, n_terms = struct.unpack_from(_HEADER, data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError("not an RTTTL search index (version %d)" % INDEX_VERSION)
+        index = cls(ngram)
+        index.path = path
+
+        pos = _HEADER_SIZE
+        terms = []
+        for _ in range(n_terms):
+            terms.append(struct.unpack_from(_TERM, data, pos))
+            pos += _TERM_SIZE
+        blob_start = blob_end = pos
+        if terms:
+            # The postings block is followed directly by the song records;
+            # its end is found by stepping over the last term's list.
+            blob_end = _skip_varints(data, blob_start + terms[-1][2], terms[-1][1])
+        index._blob = data[blob_start:blob_end]
+        ends = [t[2] for t in terms[1:]] + [blob_end - blob_start]
+        index._on_disk = {t[0]: (t[1], t[2], end) for t, end in zip(terms, ends)}
+        index._disk_songs = covered
+
+        pos = blob_end
+        while pos < len(data):
+            name, ref, steps, pos = _read_record(data, pos)
+            if len(index) < covered:
+                index._store(name, ref, steps)
+            else:
+                index._add(name, ref, steps)
+        index._file_songs = len(index)
+        return index
+
+    def save(self, path: str = None) -> None:
+        """Write the whole index, postings included, to *path* (default:
+        the file it was opened from)."""
+        path = path or self.path
+        terms = {}
+        for term in set(self._on_disk) | set(self._added):
+            terms[term] = self._postings(term)
+        block = bytearray()
+        directory = []
+        for term in sorted(terms):
+            ids = terms[term]
+            directory.append(struct.pack(_TERM, term, len(ids), len(block)))
+            _put_varints(block, ids)
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack(_HEADER, INDEX_MAGIC, INDEX_VERSION, self.ngram, 0,
+                                len(self), len(directory)))
+            f.write(b"".join(directory))
+            f.write(block)
+            for song_id in range(len(self)):
+                f.write(self._record(song_id))
+        os.replace(tmp, path)
+
+        self.path = path
+        self._blob = bytes(block)
+        self._on_disk = {}
+        offsets = [struct.unpack(_TERM, d) for d in directory]
+        ends = [o[2] for o in offsets[1:]] + [len(block)]
+        for (term, count, start), end in zip(offsets, ends):
+            self._on_disk[term] = (count, start, end)
+        self._decoded = terms
+        self._added = {}
+        self._disk_songs = self._file_songs = len(self)
+
+    def sync(self) -> int:
+        """Append songs added since the file was written, without
+        rewriting it.
+
+        Returns:
+            Number of songs appended.
+        """
+        new = range(self._file_songs, len(self))
+        with open(self.path, "ab") as f:
+            for song_id in new:
+                f.write(self._record(song_id))
+        self._file_songs = len(self)
+        return len(new)
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _store(self, name: str, ref: str, steps) -> int:
+        song_id = len(self._names)
+        self._names.append(name)
+        self._refs.append(ref)
+        self._steps.append(steps)
+        insort(self._by_name, (name.lower(), song_id))
+        return song_id
+
+    def _add(self, name: str, ref: str, steps) -> int:
+        song_id = self._store(name, ref, steps)
+        added = self._added
+        for term in set(_terms(steps, self.ngram)):
+            ids = added.get(term)
+            if ids is None:
+                ids = added[term] = array('I')
+            ids.append(song_id)
+        return song_id
+
+    def _postings(self, term: int):
+        """Ids of the songs containing *term*, ascending."""
+        ids = self._decoded.get(term)
+        if ids is None:
+            entry = self._on_disk.get(term)
+            ids = array('I')
+            if entry is not None:
+                ids = _get_varints(self._blob, entry[1], entry[0])
+            self._decoded[term] = ids
+        added = self._added.get(term)
+        if added is not None:
+            if not ids:
+                return added
+            ids = ids + added
+        return ids
+
+    def _record(self, song_id: int) -> bytes:
+        name = self._names[song_id].encode("utf-8")
+        ref = self._refs[song_id].encode("utf-8")
+        steps = self._steps[song_id]
+        return (struct.pack("<H", len(name)) + name + struct.pack("<H", len(ref)) + ref
+                + struct.pack("<H", len(steps)) + steps.tobytes())
+
+
+def _terms(steps, n: int):
+    """Term codes of every run of *n* steps."""
+    for start in range(len(steps) - n + 1):
+        yield _encode(steps[start:start + n])
+
+
+def _encode(gram) -> int:
+    code = 0
+    for step in gram:
+        code = code * _RADIX + step + MAX_STEP
+    return code
+
+
+def _variants(gram):
+    """``(term, weight)`` for *gram* and each copy with one step off by one."""
+    yield _encode(gram), 1.0
+    gram = list(gram)
+    for i, step in enumerate(gram):
+        for near in (step - 1, step + 1):
+            if -MAX_STEP <= near <= MAX_STEP:
+                gram[i] = near
+                yield _encode(gram), 0.5
+        gram[i] = step
+
+
+def _align(query, steps) -> int:
+    """Best local-alignment score of *query* against *steps*."""
+    m = len(query)
+    prev = [0] * (m + 1)
+    best = 0
+    for x in steps:
+        cur = [0] * (m + 1)
+        left = 0
+        for j in range(m):
+            d = x - query[j]
+            sub = prev[j] + (_MATCH if d == 0 else _NEAR if -1 <= d <= 1 else _MISMATCH)
+            up = prev[j + 1] + _GAP
+            left += _GAP
+            v = sub if sub > up else up
+            if left > v:
+                v = left
+            if v < 0:
+                v = 0
+            cur[j + 1] = left = v
+            if v > best:
+                best = v
+        prev = cur
+    return best
+
+
+def _put_varints(out: bytearray, ids) -> None:
+    prev = 0
+    for song_id in ids:
+        gap = song_id - prev
+        prev = song_id
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+
+
+def _get_varints(data, pos: int, count: int) -> array:
+    ids = array('I', bytes(4 * count))
+    prev = 0
+    for k in range(count):
+        gap = 0
+        shift = 0
+        b = data[pos]
+        while b & 0x80:
+            gap |= (b & 0x7F) << shift
+            shift += 7
+            pos += 1
+            b = data[pos]
+        gap |= b << shift
+        pos += 1
+        prev += gap
+        ids[k] = prev
+    return ids
+
+
+def _skip_varints(data, pos: int, count: int) -> int:
+    for _ in range(count):
+        while data[pos] & 0x80:
+            pos += 1
+        pos += 1
+    return pos
+
+
+def _read_record(data, pos: int):
+    (n,) = struct.unpack_from("<H", data, pos)
+    name = str(data[pos + 2:pos + 2 + n], "utf-8")
+    pos += 2 + n
+    (n,) = struct.unpack_from("<H", data, pos)
+    ref = str(data[pos + 2:pos + 2 + n], "utf-8")
+    pos += 2 + n
+    (n,) = struct.unpack_from("<H", data, pos)
+    steps = array('b', data[pos + 2:pos + 2 + n])
+    return name, ref, steps, pos + 2 + n
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def _add_files(index: SongIndex, paths) -> int:
+    from .corpus import find_files
+
+    added = 0
+    for path in find_files(paths):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    index.add(line, "%s:%d" % (path, lineno))
+                    added += 1
+                except ValueError:
+                    pass
+    return added
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtttl.search",
+                                 description="Build and query an RTTTL name/melody index.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("build", help="index RTTTL files (one song per line)")
+    p.add_argument("index")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--ngram", type=int, default=DEFAULT_NGRAM)
+    p = sub.add_parser("add", help="append songs to an existing index")
+    p.add_argument("index")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--compact", action="store_true", help="rewrite the postings too")
+    p = sub.add_parser("name", help="find songs by name prefix")
+    p.add_argument("index")
+    p.add_argument("prefix")
+    p.add_argument("-n", "--limit", type=int, default=20)
+    p = sub.add_parser("melody", help="find songs containing a melody fragment")
+    p.add_argument("index")
+    p.add_argument("melody", help='RTTTL notes, e.g. "8e6,8d6,f#5,g#5"')
+    p.add_argument("-n", "--limit", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        index = SongIndex(args.ngram)
+        n = _add_files(index, args.paths)
+        index.save(args.index)
+        print("indexed %d songs into %s" % (n, args.index))
+        return 0
+
+    t0 = time.perf_counter()
+    index = SongIndex.open(args.index)
+    if args.cmd == "add":
+        n = _add_files(index, args.paths)
+        if args.compact:
+            index.save()
+        else:
+            index.sync()
+        print("added %d songs (%d total)" % (n, len(index)))
+        return 0
+
+    t1 = time.perf_counter()
+    if args.cmd == "name":
+        hits = [(None, i) for i in index.find_name(args.prefix, args.limit)]
+    else:
+        hits = index.query(args.melody, args.limit)
+    t2 = time.perf_counter()
+    for score, song_id in hits:
+        prefix = "" if score is None else "%.2f  " % score
+        print("%s%-24s %s" % (prefix, index.name(song_id), index.ref(song_id)))
+    print("%d results; open %.0f ms, query %.1f ms" % (
+        len(hits), (t1 - t0) * 1000, (t2 - t1) * 1000), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""
+rtttl/service.py
+~~~~~~~~~~~~~~~~
+Local RTTTL → WAV rendering service with a content-addressed cache (CPython).
+
+Songs are rendered with :mod:`rtttl.render` (so NumPy is needed) and cached
+by a hash of the *compiled* song plus the render options.  Two strings that
+differ only in name, spacing or spelling (``h`` for ``b``, default vs.
+explicit durations, …) therefore share one cache entry.  Rendered WAVs are
+kept in an in-memory LRU bounded by size and, optionally, in a directory on
+disk that survives restarts.  Concurrent requests for the same key are
+merged: one thread renders, the others wait for its result.
+
+Everything runs locally; nothing is fetched from the network.
+
+Usage::
+
+    python -m rtttl.service --port 8765 --cache-dir ~/.cache/rtttl
+    python -m rtttl.service --unix /tmp/rtttl.sock
+
+    curl "http://127.0.0.1:8765/render?rate=22050" --data-binary @nokia.rtttl -o nokia.wav
+    curl "http://127.0.0.1:8765/render?rtttl=Beep:d=4,o=5,b=120:c,e,g" -o beep.wav
+    curl "http://127.0.0.1:8765/stats"
+
+Each WAV response carries an ``X-Cache`` header (``memory``, ``disk``,
+``merged`` or ``miss``) and the cache key as its ``ETag``.  See
+:mod:`rtttl.loadtest` for a load generator.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import socketserver
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .compiler import compile_rtttl
+from .constants import STYLE_DEFAULT
+from .render import DEFAULT_SAMPLE_RATE, DEFAULT_AMPLITUDE, render_wav
+
+CACHE_FORMAT = 1                        # bump when rendering output changes
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+MAX_SONG_BYTES       = 16 * 1024        # longest RTTTL text accepted
+MAX_RENDER_SECONDS   = 600              # longest song rendered (loops included)
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class _Flight:
+    """One render in progress, shared by every request for its key."""
+
+    def __init__(self):
+        self.done  = threading.Event()
+        self.data  = None
+        self.error = None
+
+
+class RenderCache:
+    """Render songs to WAV bytes, reusing earlier results.
+
+    Thread-safe.
+
+    Args:
+        directory:    Directory for the on-disk cache, or ``None`` for memory
+                      only.  Created if missing.
+        memory_bytes: Size budget of the in-memory LRU.
+    """
+
+    def __init__(self, directory=None, memory_bytes: int = DEFAULT_MEMORY_BYTES):
+        self.directory    = directory
+        self.memory_bytes = memory_bytes
+        self._lock        = threading.Lock()
+        self._memory      = OrderedDict()   # key → WAV bytes, oldest first
+        self._used        = 0
+        self._inflight    = {}              # key → _Flight
+        self.hits_memory  = 0
+        self.hits_disk    = 0
+        self.merged       = 0
+        self.misses       = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def key(rtttl: str, sample_rate: int = DEFAULT_SAMPLE_RATE,
+            style_divisor: int = STYLE_DEFAULT,
+            amplitude: int = DEFAULT_AMPLITUDE) -> str:
+        """
+        Cache key of a render: SHA-256 of the compiled notes and options.
+
+        Raises:
+            ValueError: if the song cannot be parsed or is too long.
+        """
+        if len(rtttl) > MAX_SONG_BYTES:
+            raise ValueError("song longer than %d bytes" % MAX_SONG_BYTES)
+        song = compile_rtttl(rtttl, style_divisor)
+        if song is None:
+            raise ValueError("invalid RTTTL header: %r" % rtttl[:40])
+        loops = max(song.header.number_of_loops, 1)
+        if song.duration_us() * loops > MAX_RENDER_SECONDS * 1_000_000:
+            raise ValueError("song longer than %d s" % MAX_RENDER_SECONDS)
+        h = hashlib.sha256(struct.pack("<HIIH", CACHE_FORMAT, sample_rate,
+                                       amplitude, loops))
+        h.update(song.notes.tobytes())
+        return h.hexdigest()
+
+    def get(self, rtttl: str, sample_rate: int = DEFAULT_SAMPLE_RATE,
+            style_divisor: int = STYLE_DEFAULT,
+            amplitude: int = DEFAULT_AMPLITUDE):
+        """
+        Return the WAV rendering of *rtttl*, from cache if possible.
+
+        Returns:
+            Tuple ``(wav_bytes, key, source)``; *source* is ``"memory"``,
+            ``"disk"``, ``"merged"`` (waited for another request's render)
+            or ``"miss"``.
+
+        Raises:
+            ValueError: if the song cannot be parsed or is too long.
+        """
+        key = self.key(rtttl, sample_rate, style_divisor, amplitude)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return data, key, "memory"
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.merged += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.data, key, "merged"
+
+        source = "disk"
+        data = None
+        try:
+            data = self._read_disk(key)
+            if data is None:
+                source = "miss"
+                buf = io.BytesIO()
+                render_wav(rtttl, buf, sample_rate, style_divisor, amplitude)
+                data = buf.getvalue()
+                self._write_disk(key, data)
+            flight.data = data
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.data is not None:
+                    self._remember(key, data)
+                    if source == "disk":
+                        self.hits_disk += 1
+                    else:
+                        self.misses += 1
+            flight.done.set()
+        return data, key, source
+
+    def stats(self) -> dict:
+        """Counters and memory use as a plain dict."""
+        with self._lock:
+            hits = self.hits_memory + self.hits_disk + self.merged
+            total = hits + self.misses
+            return {
+                "requests":     total,
+                "hits_memory":  self.hits_memory,
+                "hits_disk":    self.hits_disk,
+                "merged":       self.merged,
+                "misses":       self.misses,
+                "hit_rate":     hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._used,
+            }
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory entries (the disk cache is kept)."""
+        with self._lock:
+            self._memory.clear()
+            self._used = 0
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Add to the memory LRU, evicting old entries (lock held)."""
+        if len(data) > self.memory_bytes:
+            return
+        self._memory[key] = data
+        self._used += len(data)
+        while self._used > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._used -= len(old)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".wav")
+
+    def _read_disk(self, key: str):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial file.
+        tmp = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# HTTP front end
+# ---------------------------------------------------------------------------
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """``GET``/``POST /render`` and ``GET /stats``.
+
+    The song comes from the ``rtttl`` query parameter or the request body;
+    ``rate``, ``style`` and ``amplitude`` select render options.
+    """
+
+    server_version = "rtttl-render/%d" % CACHE_FORMAT
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            self._send(200, "application/json",
+                       json.dumps(self.server.cache.stats()).encode())
+        elif url.path == "/render":
+            self._render(parse_qs(url.query), None)
+        else:
+            self._error(404, "not found")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self._error(404, "not found")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_SONG_BYTES:
+            self._error(413, "song longer than %d bytes" % MAX_SONG_BYTES)
+            return
+        body = self.rfile.read(length).decode("utf-8", "replace")
+        self._render(parse_qs(url.query), body)
+
+    def address_string(self) -> str:
+        # Unix-socket clients have no (host, port) address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, fmt, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(fmt, *args)
+
+    # ---- helpers --------------------------------------------------------
+
+    def _render(self, query: dict, body) -> None:
+        try:
+            rtttl = (body if body is not None else query.get("rtttl", [""])[0]).strip()
+            if not rtttl:
+                raise ValueError("no song given")
+            rate = _int_option(query, "rate", DEFAULT_SAMPLE_RATE, 4000, 192_000)
+            style = _int_option(query, "style", STYLE_DEFAULT, 0, 255)
+            amplitude = _int_option(query, "amplitude", DEFAULT_AMPLITUDE, 1, 32767)
+            data, key, source = self.server.cache.get(rtttl, rate, style, amplitude)
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        self._send(200, "audio/wav", data, {"X-Cache": source, "ETag": '"%s"' % key})
+
+    def _send(self, status: int, ctype: str, data: bytes, headers=None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, "text/plain; charset=utf-8", (message + "\n").encode())
+
+
+def _int_option(query: dict, name: str, default: int, lo: int, hi: int) -> int:
+    raw = query.get(name)
+    if not raw:
+        return default
+    try:
+        value = int(raw[0])
+    except ValueError:
+        raise ValueError("%s must be an integer" % name) from None
+    if not lo <= value <= hi:
+        raise ValueError("%s must be in %d..%d" % (name, lo, hi))
+    return value
+
+
+class RenderServer(ThreadingHTTPServer):
+    """Threaded HTTP server on a TCP port, serving a :class:`RenderCache`."""
+
+    daemon_threads = True
+
+    def __init__(self, address, cache: RenderCache, quiet: bool = False):
+        super().__init__(address, RenderHandler)
+        self.cache = cache
+        self.quiet = quiet
+
+
+class UnixRenderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """:class:`RenderServer` on a Unix-domain socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, cache: RenderCache, quiet: bool = False):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, RenderHandler)
+        self.cache = cache
+        self.quiet = quiet
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m rtttl.service",
+                                 description="Serve cached WAV renderings of RTTTL songs.")
+    ap.add_argument("--host", default="127.0.0.1", help="address to bind (default: %(default)s)")
+    ap.add_argument("--port", type=int, default=8765, help="TCP port (default: %(default)s)")
+    ap.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    ap.add_argument("--cache-dir", metavar="DIR", help="on-disk cache directory (default: memory only)")
+    ap.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BYTES // (1024 * 1024),
+                    help="in-memory cache size in MiB (default: %(default)s)")
+    ap.add_argument("-q", "--quiet", action="store_true", help="do not log requests")
+    args = ap.parse_args(argv)
+
+    cache = RenderCache(args.cache_dir, args.memory_mb * 1024 * 1024)
+    if args.unix:
+        server = UnixRenderServer(args.unix, cache, args.quiet)
+        where = args.unix
+    else:
+        server = RenderServer((args.host, args.port), cache, args.quiet)
+        where = "http://%s:%d" % server.server_address[:2]
+    print("serving on %s" % where, file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+rtttl/simulate.py
+~~~~~~~~~~~~~~~~~
+Play songs in simulated time.
+
+:class:`VirtualClock` stands in for ``ticks_us``.  :func:`run` drives a
+:class:`~rtttl.player.PlayRtttl` built on such a clock.  Instead of
+waiting, it moves the clock straight to the next tone stop or note
+boundary, so a song of several minutes plays in a few milliseconds.  The
+output events carry exactly the times a perfectly punctual device would
+produce, which makes the timeline usable as a test oracle.
+
+Usage example::
+
+    from rtttl.simulate import simulate, tones
+    from rtttl.melodies import RTTTL_MELODIES
+
+    events = simulate(RTTTL_MELODIES[21])
+    for start_us, end_us, freq in tones(events):
+        ...
+
+Driving a player you set up yourself (playlists, seek, transpose, …)::
+
+    clock = VirtualClock()
+    player = PlayRtttl(backend=RecordingBackend(clock), clock=clock)
+    player.enqueue(song_a)
+    player.enqueue(song_b)
+    run(player, clock)
+
+To simulate the wake-ups of a low-power blocking loop instead, let the
+player sleep on the clock::
+
+    player.start(song)
+    while player.update():
+        player.wait(clock.sleep)
+    print(clock.wakeups, clock.idle_ms, clock.light_ms)
+
+Run ``python -m rtttl.simulate`` to play the whole built-in library this way.
+"""
+
+import argparse
+import sys
+import time
+
+from .backends import RecordingBackend
+from .constants import STYLE_DEFAULT, LIGHTSLEEP_MIN_MS
+from .player import PlayRtttl
+
+MAX_SIMULATED_US = 3_600_000_000    # stop endless (l=0) songs after an hour
+
+
+class VirtualClock:
+    """A ``ticks_us`` replacement that only moves when told to.
+
+    Calling the instance returns the current time in microseconds.
+    :meth:`sleep` stands in for :func:`~rtttl.compat.low_power_sleep` and
+    adds up how long the device would have idled and light-slept.
+
+    Args:
+        start_us: Initial time.
+    """
+
+    def __init__(self, start_us: int = 0):
+        self.now_us   = start_us
+        self.idle_ms  = 0           # slept with the CPU idling (tone on)
+        self.light_ms = 0           # slept in machine.lightsleep
+        self.wakeups  = 0           # number of sleep() calls
+
+    def __call__(self) -> int:
+        return self.now_us
+
+    def advance(self, us: int) -> None:
+        """Move the clock *us* microseconds forward."""
+        self.now_us += us
+
+    def ms(self) -> int:
+        """Current time in milliseconds (a ``ticks_ms`` replacement)."""
+        return self.now_us // 1000
+
+    def sleep(self, ms: int, output_active: bool = False) -> None:
+        """Advance *ms* milliseconds as :func:`~rtttl.compat.low_power_sleep`
+        would sleep them."""
+        if not output_active and ms >= LIGHTSLEEP_MIN_MS:
+            self.light_ms += ms
+        else:
+            self.idle_ms += ms
+        self.wakeups += 1
+        self.now_us += ms * 1000
+
+
+def run(player, clock: VirtualClock, max_us: int = MAX_SIMULATED_US) -> int:
+    """
+    Play until *player* is idle, jumping *clock* from event to event.
+
+    Args:
+        player: Player whose ``clock`` is *clock*, already started.
+        clock:  The player's :class:`VirtualClock`.
+        max_us: Simulated time after which to give up; the player is then
+                stopped.
+
+    Returns:
+        Simulated microseconds elapsed.
+    """
+    start = clock.now_us
+    end = start + max_us
+    while player.update():
+        wait = player._us_until_next_event()
+        if clock.now_us + wait > end:
+            clock.now_us = end
+            player.stop()
+            break
+        clock.advance(wait)
+    return clock.now_us - start
+
+
+def simulate(rtttl, style_divisor: int = STYLE_DEFAULT,
+             max_us: int = MAX_SIMULATED_US) -> list:
+    """
+    Play *rtttl* in simulated time and return its output events.
+
+    Args:
+        rtttl:         Anything :meth:`PlayRtttl.start()
+                       <rtttl.player.PlayRtttl.start>` accepts.
+        style_divisor: Default playback style.
+        max_us:        See :func:`run`.
+
+    Returns:
+        ``(time_us, "freq", hz)`` and ``(time_us, "duty", value)`` events,
+        as recorded by :class:`~rtttl.backends.RecordingBackend`, with time
+        0 at the start of the song.  Empty if the header cannot be parsed.
+    """
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(style_divisor=style_divisor, backend=backend, clock=clock)
+    if player.start(rtttl):
+        run(player, clock, max_us)
+    return backend.events
+
+
+def tones(events) -> list:
+    """
+    Convert output events into the tones that sounded.
+
+    Returns:
+        List of ``(start_us, end_us, hz)``.
+    """
+    out = []
+    freq = 0
+    start = None
+    for t, kind, value in events:
+        if kind == "freq":
+            freq = value
+        elif value:
+            if start is None:
+                start = t
+        elif start is not None:
+            out.append((start, t, freq))
+            start = None
+    return out
+
+
+def main(argv=None) -> int:
+    from .melodies import RTTTL_MELODIES
+
+    ap = argparse.ArgumentParser(prog="python -m rtttl.simulate",
+                                 description="Play the built-in melodies in simulated time.")
+    ap.add_argument("-i", "--index", type=int, help="print the tone timeline of one melody")
+    ap.add_argument("--style", type=int, default=STYLE_DEFAULT)
+    args = ap.parse_args(argv)
+
+    if args.index is not None:
+        for start, end, freq in tones(simulate(RTTTL_MELODIES[args.index], args.style)):
+            print("%10d %10d %5d" % (start, end, freq))
+        return 0
+
+    t0 = time.perf_counter()
+    n_tones = 0
+    total_us = 0
+    for rtttl in RTTTL_MELODIES:
+        events = simulate(rtttl, args.style)
+        n_tones += len(tones(events))
+        if events:
+            total_us += events[-1][0]
+    took = time.perf_counter() - t0
+    print("%d melodies, %d tones, %.1f s of audio simulated in %.0f ms" % (
+        len(RTTTL_MELODIES), n_tones, total_us / 1e6, took * 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
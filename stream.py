@@ -0,0 +1,202 @@
+"""
+rtttl/stream.py
+~~~~~~~~~~~~~~~
+Parse RTTTL songs straight from a file or byte stream in bounded memory.
+
+The song is read in fixed-size chunks into one reusable buffer, so memory
+use does not depend on the length of the song.  Tokens that straddle a
+chunk boundary are carried over in a small token buffer.
+
+Usage example::
+
+    from rtttl.stream import iter_notes
+
+    with open("songs/nokia.txt", "rb") as f:
+        for note_index, octave, duration_ms in iter_notes(f):
+            ...
+
+Unlike :func:`~rtttl.parser.parse_next_note` on a string, whitespace and
+line breaks between note tokens are ignored, so songs can be stored as
+ordinary text files.
+"""
+
+from array import array
+
+from .constants import STREAM_CHUNK_SIZE, STREAM_TOKEN_MAX, STREAM_HEADER_MAX
+from .parser import parse_header
+from .tokenizer import tokenize
+
+_COLON = 58   # ord(':')
+_COMMA = 44   # ord(',')
+
+
+class NoteStream:
+    """Chunked RTTTL reader over a file-like object.
+
+    The header is read on construction.  ``header.notes_start`` holds the
+    byte offset of the first note token in *source*, or ``-1`` if the header
+    could not be parsed.
+
+    Args:
+        source:     Object with ``readinto()`` or ``read()`` (files, UART,
+                    ``io.BytesIO``, sockets wrapped with ``makefile()``…).
+                    Text-mode files also work; binary mode is preferred.
+        chunk_size: Size of the reusable read buffer in bytes.
+    """
+
+    def __init__(self, source, chunk_size: int = STREAM_CHUNK_SIZE):
+        self._src      = source
+        self._readinto = getattr(source, "readinto", None)
+        self._buf      = bytearray(chunk_size)
+        self._len      = 0      # valid bytes in _buf
+        self._pos      = 0      # read position in _buf
+        self._offset   = 0      # stream offset of _buf[0]
+        self._tok      = bytearray(STREAM_HEADER_MAX)
+        self._note     = array('I', bytes(12))     # one tokenized note
+        self.header    = self._read_header()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def notes(self):
+        """Yield ``(note_index, octave, duration_ms)`` for one pass of the song.
+
+        Values match :func:`~rtttl.parser.parse_next_note`.
+        """
+        return self._notes(self.header.time_for_whole_note_ms)
+
+    def notes_us(self):
+        """Like :meth:`notes`, with durations in microseconds.
+
+        Values match :func:`~rtttl.parser.parse_next_note_us`.
+        """
+        return self._notes(self.header.time_for_whole_note_us)
+
+    def rewind(self) -> bool:
+        """Seek back to the first note so the song can be played again.
+
+        Returns:
+            ``False`` if the source cannot seek (e.g. a UART).
+        """
+        seek = getattr(self._src, "seek", None)
+        if seek is None or self.header.notes_start < 0:
+            return False
+        try:
+            seek(self.header.notes_start)
+        except OSError:
+            return False
+        self._offset = self.header.notes_start
+        self._len    = 0
+        self._pos    = 0
+        return True
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _notes(self, whole: int):
+        header = self.header
+        if header.notes_start < 0:
+            return
+        tok = self._tok
+        note = self._note
+        while True:
+            n, more = self._read_field(_COMMA, 33, STREAM_TOKEN_MAX)
+            if n:
+                # Decoded from the token buffer in place; *note* has room
+                # for one note, so anything after it in the token is ignored
+                # as parse_next_note() would.
+                tokenize(tok, 0, n, header, note, whole)
+                yield note[0], note[1], note[2]
+            if not more:
+                return
+
+    def _fill(self) -> bool:
+        """Read the next chunk into the buffer.  Returns ``False`` at EOF."""
+        self._offset += self._len
+        if self._readinto is not None:
+            n = self._readinto(self._buf) or 0
+        else:
+            data = self._src.read(len(self._buf)) or b""
+            if isinstance(data, str):
+                data = data.encode()
+            n = len(data)
+            self._buf[:n] = data
+        self._len = n
+        self._pos = 0
+        return n > 0
+
+    def _read_field(self, stop: int, skip_below: int, limit: int):
+        """Copy bytes up to *stop* into the token buffer.
+
+        Bytes below *skip_below* (whitespace / control characters) are
+        dropped, and anything beyond *limit* bytes is discarded.
+
+        Returns:
+            Tuple ``(length, found_stop)``; ``found_stop`` is ``False`` at EOF.
+        """
+        tok = self._tok
+        buf = self._buf
+        n = 0
+        while True:
+            if self._pos >= self._len and not self._fill():
+                return n, False
+            c = buf[self._pos]
+            self._pos += 1
+            if c == stop:
+                return n, True
+            if c < skip_below:
+                continue
+            if n < limit:
+                tok[n] = c
+                n += 1
+
+    def _read_header(self):
+        """Read ``name:params:`` and parse it with :func:`parse_header`."""
+        limit = len(self._tok)
+        text = ""
+        for skip_below in (32, 33):         # name keeps spaces, params don't
+            n, ok = self._read_field(_COLON, skip_below, limit)
+            text += self._tok[:_utf8_boundary(self._tok, n)].decode()
+            if not ok:
+                break
+            text += ":"
+
+        header = parse_header(text)
+        if header.notes_start >= 0:
+            header.notes_start = self._offset + self._pos
+        return header
+
+
+def _utf8_boundary(data, n: int) -> int:
+    """Largest length up to *n* that does not end inside a UTF-8 character.
+
+    Fields longer than ``STREAM_HEADER_MAX`` are cut at a byte count, which
+    can fall in the middle of a multi-byte character of the song name.
+    """
+    i = n
+    while i > 0 and data[i - 1] & 0xC0 == 0x80:     # continuation bytes
+        i -= 1
+    if i > 0 and data[i - 1] >= 0xC0:               # lead byte
+        lead = data[i - 1]
+        size = 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+        if n - (i - 1) < size:
+            return i - 1
+    return n
+
+
+def iter_notes(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Generator over the notes of an RTTTL song read from *source*.
+
+    Args:
+        source:     File-like object (see :class:`NoteStream`).
+        chunk_size: Size of the read buffer in bytes.
+
+    Yields:
+        ``(note_index, octave, duration_ms)`` tuples, as returned by
+        :func:`~rtttl.parser.parse_next_note`.  Nothing is yielded if the
+        header is invalid.  ``l=`` loops are not expanded.
+    """
+    yield from NoteStream(source, chunk_size).notes()
@@ -0,0 +1,668 @@
+"""
+rtttl/sync.py
+~~~~~~~~~~~~~
+Play one song on several boards in step.
+
+One :class:`SyncLeader` and any number of :class:`SyncFollower` nodes
+exchange short text messages over a :class:`UDPTransport` or a
+:class:`UARTTransport`:
+
+* Every follower pings the leader a few times a second.  Each round trip
+  gives an NTP-style sample of the offset between the two clocks.
+  :class:`SyncClock` keeps the samples with the shortest round trips and
+  fits offset and drift rate to them.
+* :meth:`SyncLeader.start` picks a start instant a little in the future, in
+  leader time, and sends it with the song, split into as many messages as
+  ``SYNC_MAX_MESSAGE`` requires.  Once a follower holds every part, it
+  calls
+  :meth:`~rtttl.player.PlayRtttl.start_at` with that instant.
+* A follower's player runs on its :class:`SyncClock`, i.e. on leader time
+  as the follower estimates it.  As new samples refine the estimate,
+  corrections are slewed into the running song (``SYNC_SLEW_PPM``), so
+  drift is cancelled without audible jumps.
+* When a song ends, each follower reports how late its notes started and
+  how well it knows the leader's clock.  :meth:`SyncLeader.skew_report`
+  combines the reports.
+
+Usage example (leader)::
+
+    from rtttl.sync import SyncLeader, UDPTransport
+
+    leader = SyncLeader(UDPTransport.bind(), pin=8)
+    ...                                     # let followers sync for a second
+    leader.start(RTTTL_MELODIES[21])
+    while leader.update():
+        leader.wait()
+    print(leader.skew_report())
+
+Follower::
+
+    follower = SyncFollower(UDPTransport.connect("192.168.4.1"), pin=8, name="b2")
+    while True:
+        follower.update()
+        follower.wait()
+
+Messages (ASCII, one per datagram or line; times in µs)::
+
+    P <t0> [padding]                    ping, follower → leader
+    Q <t0> <t1> <t2>                    pong: leader receive / send times
+    S <id> <start> <part> <parts> <text>
+                                        part <part> of <parts> of the song to
+                                        play from leader time <start>
+    A <id> <node>                       all parts received
+    T                                   stop
+    R <id> <node> <notes> <mean_late> <max_late> <offset> <uncertainty> <drift_ppm>
+
+A ping is padded to the length of its pong.  Over a UART the two lines
+then take equally long to transmit, and the offset estimate stays
+symmetric.
+
+``python -m rtttl.sync`` runs a leader and several followers on loopback
+sockets, with their clocks deliberately offset and drifting, and prints the
+measured skew.
+"""
+
+try:
+    import socket
+except ImportError:                     # older MicroPython firmware
+    import usocket as socket
+try:
+    import select
+except ImportError:
+    import uselect as select
+
+from .compat import ticks_us, ticks_diff, ticks_add, sleep_ms
+from .constants import (STYLE_DEFAULT, SYNC_PING_MS, SYNC_SAMPLES, SYNC_DELAY_SLACK_US,
+                        SYNC_LEAD_MS, SYNC_MAX_DRIFT_PPM, SYNC_SLEW_PPM, SYNC_PORT,
+                        SYNC_MAX_MESSAGE)
+from .player import PlayRtttl
+
+_IDLE_WAIT_MS = 100     # longest wait() while nothing is playing
+_PART_HEADER  = 48      # room left in a start message for its fields
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+class UDPTransport:
+    """Messages as UDP datagrams.
+
+    Args:
+        sock: UDP socket; it is made non-blocking.
+        peer: Default destination address (a follower's leader).
+    """
+
+    def __init__(self, sock, peer=None):
+        sock.setblocking(False)
+        self.peer  = peer
+        self._sock = sock
+        self._poll = select.poll()
+        self._poll.register(sock, select.POLLIN)
+
+    @classmethod
+    def bind(cls, host: str = "0.0.0.0", port: int = SYNC_PORT):
+        """Transport for a leader, listening on *host*:*port*."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(socket.getaddrinfo(host, port)[0][-1])
+        return cls(sock)
+
+    @classmethod
+    def connect(cls, host: str, port: int = SYNC_PORT):
+        """Transport for a follower of the leader at *host*:*port*."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(socket.getaddrinfo("0.0.0.0", 0)[0][-1])
+        return cls(sock, socket.getaddrinfo(host, port)[0][-1])
+
+    def send(self, text: str, addr=None) -> None:
+        try:
+            self._sock.sendto(text.encode(), addr or self.peer)
+        except OSError:
+            pass                        # dropped, like any datagram
+
+    def recv(self):
+        """Return ``(text, sender)``, or ``None`` if nothing is waiting.
+
+        Datagrams longer than ``SYNC_MAX_MESSAGE`` would arrive truncated
+        and are dropped.
+        """
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(SYNC_MAX_MESSAGE + 1)
+            except OSError:
+                return None
+            if len(data) <= SYNC_MAX_MESSAGE:
+                try:
+                    return str(data, "utf-8"), addr
+                except UnicodeError:
+                    pass
+
+    def wait(self, ms: int) -> None:
+        """Sleep up to *ms* milliseconds, less if a message arrives."""
+        self._poll.poll(ms)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class UARTTransport:
+    """Newline-terminated messages over a ``machine.UART`` (point to point).
+
+    Args:
+        uart: Configured UART; its baud rate limits how long a song may be
+              sent in a start message.
+    """
+
+    def __init__(self, uart):
+        self._uart = uart
+        self._buf  = b""
+
+    def send(self, text: str, addr=None) -> None:
+        self._uart.write(text.encode() + b"\n")
+
+    def recv(self):
+        """Return ``(line, None)``, or ``None`` if no full line is waiting."""
+        if self._uart.any():
+            self._buf += self._uart.read()
+        i = self._buf.find(b"\n")
+        if i < 0:
+            return None
+        line = self._buf[:i]
+        self._buf = self._buf[i + 1:]
+        try:
+            return str(line, "utf-8"), None
+        except UnicodeError:
+            return "", None             # garbled line; ignored by both ends
+
+    def wait(self, ms: int) -> None:
+        """Sleep up to *ms* milliseconds, less if bytes arrive."""
+        while ms > 0 and not self._uart.any():
+            sleep_ms(1)
+            ms -= 1
+
+
+# ---------------------------------------------------------------------------
+# Clock
+# ---------------------------------------------------------------------------
+
+class SyncClock:
+    """The leader's clock, as estimated by a follower.
+
+    Calling the instance returns the estimated leader time in ``ticks_us``
+    units, so it can be a player's ``clock``.
+
+    Args:
+        local:    The follower's own ``ticks_us``.
+        slew_ppm: Largest rate at which corrections are applied while
+                  :attr:`slewing` is set.
+
+    Attributes:
+        locked:   ``True`` once at least one sample arrived.
+        slewing:  Apply corrections gradually (set while a song plays);
+                  otherwise they take effect at once.
+        delay_us: Round trip of the best recent sample (-1 before any).
+    """
+
+    def __init__(self, local=ticks_us, slew_ppm: int = SYNC_SLEW_PPM):
+        self.locked      = False
+        self.slewing     = False
+        self.delay_us    = -1
+        self._local      = local
+        self._slew       = slew_ppm / 1_000_000
+        self._samples    = []       # (local_us, offset_us, delay_us), oldest first
+        self._ref        = 0        # local time the fit refers to
+        self._offset     = 0        # leader − local at _ref, in µs
+        self._drift      = 0.0      # change of the offset per µs of local time
+        self._applied    = 0        # offset currently in use
+        self._applied_at = 0        # local time it was last moved
+
+    def __call__(self) -> int:
+        now = self._local()
+        step = self._estimate(now) - self._applied
+        if step and self.slewing:
+            limit = int(ticks_diff(now, self._applied_at) * self._slew)
+            if step > limit:
+                step = limit
+            elif step < -limit:
+                step = -limit
+            if not step:                # too soon: let the allowance build up
+                return ticks_add(now, self._applied)
+        self._applied += step
+        self._applied_at = now
+        return ticks_add(now, self._applied)
+
+    def offset_us(self) -> int:
+        """Current estimate of leader time minus local time."""
+        return self._estimate(self._local())
+
+    def drift_ppm(self) -> float:
+        """Estimated rate of the leader clock relative to the local one."""
+        return self._drift * 1_000_000
+
+    def error_us(self) -> int:
+        """Offset still waiting to be slewed in (estimate − applied)."""
+        return self.offset_us() - self._applied
+
+    def add_sample(self, t0: int, t1: int, t2: int, t3: int) -> None:
+        """
+        Add one round trip: ping sent at local *t0*, received at leader
+        *t1*, answered at leader *t2*, answer received at local *t3*.
+        """
+        delay = ticks_diff(t3, t0) - ticks_diff(t2, t1)
+        offset = (ticks_diff(t1, t0) + ticks_diff(t2, t3)) // 2
+        samples = self._samples
+        samples.append((ticks_add(t0, ticks_diff(t3, t0) // 2), offset, delay))
+        if len(samples) > SYNC_SAMPLES:
+            samples.pop(0)
+        self._fit()
+        self.locked = True
+
+    def _estimate(self, now: int) -> int:
+        return self._offset + int(self._drift * ticks_diff(now, self._ref))
+
+    def _fit(self) -> None:
+        """Fit offset and drift to the samples with the shortest round trips."""
+        samples = self._samples
+        best = min(s[2] for s in samples)
+        ref = samples[-1][0]
+        xs = []
+        ys = []
+        for t, offset, delay in samples:
+            if delay <= best + SYNC_DELAY_SLACK_US:
+                xs.append(ticks_diff(t, ref))
+                ys.append(offset)
+        n = len(xs)
+        mean_x = sum(xs) / n
+        mean_y = sum(ys) / n
+        drift = self._drift
+        sxx = sum((x - mean_x) ** 2 for x in xs)
+        if n >= 3 and xs[-1] - xs[0] >= 1_000_000:     # need a second of data
+            drift = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+            limit = SYNC_MAX_DRIFT_PPM / 1_000_000
+            if drift > limit:
+                drift = limit
+            elif drift < -limit:
+                drift = -limit
+        self._ref = ref
+        self._offset = int(mean_y - drift * mean_x)
+        self._drift = drift
+        self.delay_us = best
+
+
+# ---------------------------------------------------------------------------
+# Nodes
+# ---------------------------------------------------------------------------
+
+class SyncLeader:
+    """The node whose clock every follower runs on.
+
+    Args:
+        transport: :class:`UDPTransport` (bound) or :class:`UARTTransport`.
+        pin, backend, style_divisor: Passed to
+                   :class:`~rtttl.player.PlayRtttl`.
+        clock:     The leader's ``ticks_us``.
+
+    Attributes:
+        player:  The leader's own :class:`~rtttl.player.PlayRtttl`.
+        reports: Follower name → last report (see :meth:`skew_report`).
+    """
+
+    def __init__(self, transport, pin: int = None, backend=None,
+                 style_divisor: int = STYLE_DEFAULT, clock=ticks_us):
+        self.player     = PlayRtttl(pin, style_divisor, backend, clock)
+        self.reports    = {}
+        self._transport = transport
+        self._clock     = clock
+        self._peers     = []        # addresses that pinged us
+        self._song_id   = 0
+        self._start_msg = None      # announcement of the current song, in parts
+        self._start_at  = 0
+        self._unacked   = []        # peers that have not confirmed it
+        self._resend_at = 0
+
+    def followers(self) -> int:
+        """Number of followers heard from."""
+        return len(self._peers)
+
+    def start(self, rtttl: str, lead_ms: int = SYNC_LEAD_MS) -> bool:
+        """
+        Start *rtttl* on every node *lead_ms* milliseconds from now.
+
+        Songs too long for one ``SYNC_MAX_MESSAGE`` message are sent in
+        parts; followers start once they hold all of them.
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        at = ticks_add(self._clock(), lead_ms * 1000)
+        if not self.player.start_at(rtttl, at):
+            return False
+        self.player.lateness.reset()
+        self._song_id += 1
+        parts = _split(rtttl, SYNC_MAX_MESSAGE - _PART_HEADER)
+        self._start_msg = ["S %d %d %d %d %s" % (self._song_id, at, k, len(parts), part)
+                           for k, part in enumerate(parts)]
+        self._start_at = at
+        self._unacked = list(self._peers)
+        self.reports = {}
+        self._announce()
+        return True
+
+    def stop(self) -> None:
+        """Stop the song on every node."""
+        self.player.stop()
+        self._unacked = []
+        for peer in self._peers:
+            self._transport.send("T", peer)
+
+    def update(self) -> bool:
+        """Answer messages and advance playback; ``True`` while playing."""
+        transport = self._transport
+        msg = transport.recv()
+        while msg is not None:
+            t1 = self._clock()
+            text, sender = msg
+            kind = text[:1]
+            try:
+                if kind == "P":
+                    t0 = int(text.split()[1])
+                    transport.send("Q %d %d %d" % (t0, t1, self._clock()), sender)
+                    if sender not in self._peers:
+                        self._peers.append(sender)
+                        if self._start_msg is not None and self.player.is_playing():
+                            self._unacked.append(sender)    # late joiner
+                elif kind == "A":
+                    if int(text.split()[1]) == self._song_id and sender in self._unacked:
+                        self._unacked.remove(sender)
+                elif kind == "R":
+                    self._add_report(text)
+            except (ValueError, IndexError):
+                pass                    # malformed or stray datagram: drop it
+            msg = transport.recv()
+
+        if self._unacked and ticks_diff(self._clock(), self._resend_at) >= 0:
+            self._announce()
+        return self.player.update()
+
+    def wait(self) -> None:
+        """Sleep until the next note event or incoming message."""
+        ms = self.player.next_deadline_ms()
+        if ms < 0 or ms > _IDLE_WAIT_MS:
+            ms = _IDLE_WAIT_MS
+        if self._unacked and ms > SYNC_PING_MS // 4:
+            ms = SYNC_PING_MS // 4
+        self._transport.wait(ms)
+
+    def skew_report(self) -> dict:
+        """
+        Timing of the last song on every node that reported.
+
+        Returns:
+            Node name (``"leader"`` for this one) → dict with ``notes``,
+            ``mean_late_us``, ``max_late_us`` (note-start lateness against
+            the shared timeline), ``offset_us``, ``uncertainty_us`` (half
+            the best round trip), ``drift_ppm`` and ``skew_us``: the node's
+            mean lateness minus the leader's, i.e. how far behind the leader
+            its notes started on average.  The true skew may be up to
+            ``uncertainty_us`` further off.
+        """
+        own = self.player.lateness
+        report = {"leader": {
+            "notes":          own.notes,
+            "mean_late_us":   own.mean(),
+            "max_late_us":    own.max,
+            "offset_us":      0,
+            "uncertainty_us": 0,
+            "drift_ppm":      0.0,
+            "skew_us":        0,
+        }}
+        for name, r in self.reports.items():
+            r = dict(r)
+            r["skew_us"] = r["mean_late_us"] - own.mean()
+            report[name] = r
+        return report
+
+    def _announce(self) -> None:
+        if ticks_diff(self._clock(), self._start_at) > 1_000_000:
+            self._unacked = []          # long started; stop retrying
+            return
+        for peer in self._unacked:
+            for msg in self._start_msg:
+                self._transport.send(msg, peer)
+        self._resend_at = ticks_add(self._clock(), SYNC_PING_MS * 1000 // 4)
+
+    def _add_report(self, text: str) -> None:
+        f = text.split()
+        if len(f) < 9 or int(f[1]) != self._song_id:
+            return
+        self.reports[f[2]] = {
+            "notes":          int(f[3]),
+            "mean_late_us":   int(f[4]),
+            "max_late_us":    int(f[5]),
+            "offset_us":      int(f[6]),
+            "uncertainty_us": int(f[7]),
+            "drift_ppm":      float(f[8]),
+        }
+
+
+class SyncFollower:
+    """A node that plays whatever the leader starts, on the leader's time.
+
+    Args:
+        transport: :class:`UDPTransport` (connected) or
+                   :class:`UARTTransport`.
+        pin, backend, style_divisor: Passed to
+                   :class:`~rtttl.player.PlayRtttl`.
+        name:      Node name used in reports (no spaces).
+        local:     The follower's own ``ticks_us``.
+
+    Attributes:
+        clock:  Its :class:`SyncClock`.
+        player: Its :class:`~rtttl.player.PlayRtttl`, running on *clock*.
+    """
+
+    def __init__(self, transport, pin: int = None, backend=None,
+                 style_divisor: int = STYLE_DEFAULT, name: str = "follower",
+                 local=ticks_us):
+        self.clock      = SyncClock(local)
+        self.player     = PlayRtttl(pin, style_divisor, backend, self.clock)
+        self.name       = name
+        self._transport = transport
+        self._local     = local
+        self._next_ping = local()
+        self._song_id   = -1
+        self._start_at  = 0
+        self._reported  = True
+        self._parts     = None      # parts of the song being received …
+        self._parts_id  = -1        # … and its id
+
+    def update(self) -> bool:
+        """Ping, handle messages and advance playback; ``True`` while playing."""
+        transport = self._transport
+        now = self._local()
+        if ticks_diff(now, self._next_ping) >= 0:
+            t0 = "%d" % now
+            # Padding makes the ping as long as its pong (see module docs).
+            transport.send("P " + t0 + " " * (2 * len(t0) + 2))
+            self._next_ping = ticks_add(now, SYNC_PING_MS * 1000)
+
+        msg = transport.recv()
+        while msg is not None:
+            t3 = self._local()
+            text = msg[0]
+            kind = text[:1]
+            if kind == "Q":
+                try:
+                    f = text.split()
+                    self.clock.add_sample(int(f[1]), int(f[2]), int(f[3]), t3)
+                except (ValueError, IndexError):
+                    pass                # malformed: the next ping replaces it
+            elif kind == "S":
+                self._start(text)
+            elif kind == "T":
+                self.player.stop()
+            msg = transport.recv()
+
+        player = self.player
+        self.clock.slewing = player.is_playing() and ticks_diff(
+            ticks_add(self._local(), self.clock.offset_us()), self._start_at) >= 0
+        playing = player.update()
+        if not playing and not self._reported:
+            self._report()
+        return playing
+
+    def wait(self) -> None:
+        """Sleep until the next note event, ping or incoming message."""
+        ms = self.player.next_deadline_ms()
+        ping = (ticks_diff(self._next_ping, self._local()) + 999) // 1000
+        if ms < 0 or ms > ping:
+            ms = ping
+        if ms > 0:
+            self._transport.wait(ms)
+
+    def _start(self, text: str) -> None:
+        try:
+            _, song_id, at, part, parts, body = text.split(" ", 5)
+            song_id, at, part, parts = int(song_id), int(at), int(part), int(parts)
+        except ValueError:
+            return                      # malformed: wait for the resend
+        if not 0 <= part < parts:
+            return
+        if song_id == self._song_id:
+            self._transport.send("A %d %s" % (song_id, self.name))
+            return                      # repeated announcement
+        if song_id != self._parts_id or len(self._parts) != parts:
+            self._parts = [None] * parts
+            self._parts_id = song_id
+        self._parts[part] = body
+        if None in self._parts:
+            return
+        rtttl = "".join(self._parts)
+        self._parts = None
+        self._parts_id = -1
+        self._transport.send("A %d %s" % (song_id, self.name))
+        self._song_id = song_id
+        self._start_at = at
+        player = self.player
+        player.lateness.reset()
+        if player.start_at(rtttl, at):
+            self._reported = False
+            behind = ticks_diff(self.clock(), at)
+            if behind > 0:              # announcement arrived late: catch up
+                player.seek(behind // 1000)
+
+    def _report(self) -> None:
+        self._reported = True
+        late = self.player.lateness
+        clock = self.clock
+        self._transport.send("R %d %s %d %d %d %d %d %.1f" % (
+            self._song_id, self.name, late.notes, late.mean(), late.max,
+            clock.offset_us(), clock.delay_us // 2, clock.drift_ppm()))
+
+
+def _split(text: str, size: int) -> list:
+    """Cut *text* into pieces of at most *size* UTF-8 bytes."""
+    parts = []
+    i = 0
+    while True:
+        part = text[i:i + size]
+        while len(part.encode()) > size:
+            part = part[:-1]
+        parts.append(part)
+        i += len(part)
+        if i >= len(text):
+            return parts
+
+
+# ---------------------------------------------------------------------------
+# Loopback demonstration
+# ---------------------------------------------------------------------------
+
+def _skewed_clock(offset_us: int, drift_ppm: float):
+    """A ``ticks_us`` that is *offset_us* ahead and runs *drift_ppm* fast."""
+    origin = ticks_us()
+    rate = 1 + drift_ppm / 1_000_000
+
+    def clock():
+        return origin + offset_us + int(ticks_diff(ticks_us(), origin) * rate)
+    return clock
+
+
+def _onsets(events) -> list:
+    """Real times (µs) at which tones started, from RecordingBackend events."""
+    return [t for t, kind, value in events if kind == "duty" and value]
+
+
+def main(argv=None) -> int:
+    import argparse                     # deferred: host-only demo
+    import threading
+
+    from .backends import RecordingBackend
+    from .melodies import RTTTL_MELODIES
+
+    ap = argparse.ArgumentParser(prog="python -m rtttl.sync",
+                                 description="Synchronized playback on loopback sockets.")
+    ap.add_argument("-f", "--followers", type=int, default=3)
+    ap.add_argument("-i", "--index", type=int, default=21, help="built-in melody to play")
+    ap.add_argument("--drift", type=float, default=200.0, help="follower clock drift, ppm (default: %(default)s)")
+    ap.add_argument("--settle", type=float, default=3.0, help="seconds of syncing before the start")
+    args = ap.parse_args(argv)
+
+    leader_io = UDPTransport.bind("127.0.0.1", 0)
+    port = leader_io._sock.getsockname()[1]
+    leader = SyncLeader(leader_io, backend=RecordingBackend(ticks_us))
+    followers = []
+    for k in range(args.followers):
+        local = _skewed_clock((k + 1) * 123_457, args.drift * (1 if k % 2 else -1))
+        followers.append(SyncFollower(UDPTransport.connect("127.0.0.1", port),
+                                      backend=RecordingBackend(ticks_us),
+                                      name="f%d" % k, local=local))
+
+    done = []
+
+    def run_follower(f):
+        while not done:
+            f.update()
+            f.wait()
+
+    threads = [threading.Thread(target=run_follower, args=(f,), daemon=True) for f in followers]
+    for t in threads:
+        t.start()
+    t_end = ticks_add(ticks_us(), int(args.settle * 1_000_000))
+    while ticks_diff(t_end, ticks_us()) > 0:
+        leader.update()
+        leader.wait()
+
+    print("%d followers synced; starting melody %d" % (leader.followers(), args.index))
+    leader.start(RTTTL_MELODIES[args.index])
+    while leader.update():
+        leader.wait()
+    t_end = ticks_add(ticks_us(), 500_000)             # collect the reports
+    while ticks_diff(t_end, ticks_us()) > 0 and len(leader.reports) < len(followers):
+        leader.update()
+        leader.wait()
+    done.append(True)
+    for t in threads:
+        t.join()
+
+    print("%-8s %6s %9s %9s %11s %9s %9s %9s" % (
+        "node", "notes", "skew_us", "max_late", "uncertainty", "drift", "true_us", "true_max"))
+    ref = _onsets(leader.player._pwm.events)
+    nodes = {"leader": leader.player._pwm.events}
+    nodes.update((f.name, f.player._pwm.events) for f in followers)
+    # true_us / true_max: mean and worst onset difference to the leader,
+    # measured on the shared host clock
+    for name, r in sorted(leader.skew_report().items()):
+        onsets = _onsets(nodes[name])
+        diffs = [b - a for a, b in zip(ref, onsets)]
+        true = sum(diffs) // len(diffs) if diffs else 0
+        worst = max((abs(d) for d in diffs), default=0)
+        print("%-8s %6d %9d %9d %11d %8.1fp %9d %9d" % (
+            name, r["notes"], r["skew_us"], r["max_late_us"], r["uncertainty_us"],
+            r["drift_ppm"], true, worst))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
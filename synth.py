@@ -0,0 +1,371 @@
+"""
+rtttl/synth.py
+~~~~~~~~~~~~~~
+Streaming PCM synthesis for I2S DACs and other sample sinks.
+
+:class:`Synth` turns a song into signed 16-bit mono samples one chunk at a
+time.  Notes are pulled lazily from :func:`~rtttl.parser.parse_next_note_us`
+(or from a :class:`~rtttl.stream.NoteStream` for files).  Samples are
+written into two fixed buffers that take turns: one is being played while
+the other is filled.  Peak memory is those two buffers plus a 256-entry
+wave table, whatever the length of the song, and nothing is allocated per
+chunk.
+
+The oscillator is a 16-bit phase accumulator.  A remainder term keeps the
+pitch exact, and all values stay small integers on MicroPython.  The phase
+carries on from one note to the next, so back-to-back notes join without a
+click.  This differs from the buzzer and from :mod:`rtttl.render`, whose
+square wave restarts at every note.  Note boundaries follow the same
+cumulative microsecond timeline as the player, so rounding to whole
+samples never accumulates.
+
+Usage example (Pico with an I2S DAC)::
+
+    from machine import I2S, Pin
+    from rtttl.synth import Synth
+
+    audio = I2S(0, sck=Pin(16), ws=Pin(17), sd=Pin(18), mode=I2S.TX,
+                bits=16, format=I2S.MONO, rate=22050, ibuf=4096)
+    synth = Synth(22050, waveform="sine")
+    synth.start(RTTTL_MELODIES[21])
+    synth.stream(audio)              # blocking; I2S.write is the sink
+
+Non-blocking, refilled from the I2S interrupt::
+
+    def refill(i2s):
+        buf = synth.next_chunk()
+        if buf is not None:
+            i2s.write(buf)
+
+    audio.irq(refill)
+    refill(audio)
+
+On a host, stream into any binary file or a :class:`WavSink`::
+
+    python -m rtttl.synth 21 -o nokia.wav --waveform sine
+"""
+
+import math
+from array import array
+
+from .compiler import CompiledSong, note_triple
+from .constants import STYLE_DEFAULT, SYNTH_SAMPLE_RATE, SYNTH_CHUNK_SAMPLES, SYNTH_AMPLITUDE
+from .parser import parse_header, parse_next_note_us
+from .stream import NoteStream
+
+WAVEFORMS = ("square", "sine", "triangle")
+
+
+def wave_table(waveform: str = "square", amplitude: int = SYNTH_AMPLITUDE) -> array:
+    """
+    One period of *waveform* as 256 signed 16-bit samples.
+
+    Raises:
+        ValueError: for an unknown waveform.
+    """
+    table = array('h', bytes(512))
+    for i in range(256):
+        if waveform == "square":
+            v = amplitude if i < 128 else -amplitude
+        elif waveform == "sine":
+            v = int(amplitude * math.sin(2 * math.pi * i / 256))
+        elif waveform == "triangle":
+            v = amplitude * (i if i < 128 else 256 - i) // 64 - amplitude
+        else:
+            raise ValueError("unknown waveform %r (use one of %s)" % (waveform, ", ".join(WAVEFORMS)))
+        table[i] = v
+    return table
+
+
+class Synth:
+    """Chunked, double-buffered PCM synthesiser.
+
+    Args:
+        sample_rate:   Output rate in Hz.
+        chunk_samples: Samples per buffer.
+        amplitude:     Peak sample value.
+        waveform:      ``"square"`` (buzzer timbre), ``"sine"`` or
+                       ``"triangle"``.
+        style_divisor: Fallback playback style (as for
+                       :class:`~rtttl.player.PlayRtttl`).
+    """
+
+    def __init__(self, sample_rate: int = SYNTH_SAMPLE_RATE,
+                 chunk_samples: int = SYNTH_CHUNK_SAMPLES,
+                 amplitude: int = SYNTH_AMPLITUDE, waveform: str = "square",
+                 style_divisor: int = STYLE_DEFAULT):
+        self.sample_rate    = sample_rate
+        self.style_divisor  = style_divisor
+        self._table         = wave_table(waveform, amplitude)
+        self._buffers       = (array('h', bytes(2 * chunk_samples)),
+                               array('h', bytes(2 * chunk_samples)))
+        self._turn          = 0         # buffer filled by the next chunk
+        self._notes         = None      # (freq, tone_us, gap_us) iterator
+        self._phase         = 0         # oscillator phase, 0..65535
+        self._rem           = 0         # phase remainder, in 1/sample_rate steps
+        self._inc           = 0         # phase step per sample …
+        self._inc_rem       = 0         # … and its remainder
+        self._tone_left     = 0         # samples left in the current tone
+        self._gap_left      = 0         # then silent samples left
+        self._frac          = 0         # sample-timeline remainder (µs·Hz)
+        self.samples        = 0         # samples produced for this song
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self, song) -> bool:
+        """
+        Set the song to synthesise next.
+
+        Args:
+            song: RTTTL string (parsed note by note while playing), a
+                  :class:`~rtttl.compiler.CompiledSong`, or a binary
+                  file-like object (read in chunks, see
+                  :class:`~rtttl.stream.NoteStream`).
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        if isinstance(song, CompiledSong):
+            notes = _compiled_notes(song)
+        elif isinstance(song, str):
+            header = parse_header(song)
+            if header.notes_start < 0:
+                return False
+            notes = self._parsed_notes(header, _string_notes(song, header))
+        else:
+            stream = NoteStream(song)
+            if stream.header.notes_start < 0:
+                return False
+            notes = self._parsed_notes(stream.header, _stream_notes(stream))
+        self._notes = notes
+        self._tone_left = self._gap_left = 0
+        self._phase = self._rem = 0
+        self._frac = 0
+        self.samples = 0
+        return True
+
+    def next_chunk(self):
+        """
+        Fill the next buffer and return it.
+
+        The two buffers alternate, so the previous chunk stays intact while
+        this one is filled.  The last chunk of a song is a shorter
+        ``memoryview``.
+
+        Returns:
+            The buffer (``array('h')``), or ``None`` when the song is over.
+        """
+        buf = self._buffers[self._turn]
+        self._turn ^= 1
+        n = self.fill(buf)
+        if n == len(buf):
+            return buf
+        if not n:
+            return None
+        return memoryview(buf)[:n]
+
+    def fill(self, buf) -> int:
+        """
+        Write the next samples into *buf* (``array('h')`` or a writable
+        ``memoryview`` of one).
+
+        Returns:
+            Samples written; less than ``len(buf)`` only at the end of the
+            song.
+        """
+        n = len(buf)
+        i = 0
+        table = self._table
+        sr = self.sample_rate
+        phase = self._phase
+        rem = self._rem
+        while i < n:
+            if self._tone_left:
+                inc = self._inc
+                inc_rem = self._inc_rem
+                end = i + self._tone_left
+                if end > n:
+                    end = n
+                self._tone_left -= end - i
+                while i < end:
+                    buf[i] = table[phase >> 8]
+                    phase += inc
+                    rem += inc_rem
+                    if rem >= sr:
+                        rem -= sr
+                        phase += 1
+                    phase &= 0xFFFF
+                    i += 1
+            elif self._gap_left:
+                end = i + self._gap_left
+                if end > n:
+                    end = n
+                self._gap_left -= end - i
+                while i < end:
+                    buf[i] = 0
+                    i += 1
+            elif not self._next_note():
+                break
+        self._phase = phase
+        self._rem = rem
+        self.samples += i
+        return i
+
+    def stream(self, sink) -> int:
+        """
+        Synthesise the rest of the song into *sink* (blocking).
+
+        Args:
+            sink: Anything with ``write(buffer)``: ``machine.I2S``, a binary
+                  file, a :class:`WavSink` …
+
+        Returns:
+            Number of samples written.
+        """
+        n = 0
+        buf = self.next_chunk()
+        while buf is not None:
+            sink.write(buf)
+            n += len(buf)
+            buf = self.next_chunk()
+        return n
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _parsed_notes(self, header, tokens):
+        """``(freq, tone_us, gap_us)`` for each parser triple in *tokens*."""
+        style = header.style_divisor if header.style_divisor != STYLE_DEFAULT \
+            else self.style_divisor
+        for note_index, octave, duration_us in tokens:
+            yield note_triple(note_index, octave, duration_us, style)
+
+    def _next_note(self) -> bool:
+        """Load the next note; ``False`` at the end of the song."""
+        if self._notes is None:
+            return False
+        for freq, tone_us, gap_us in self._notes:
+            sr = self.sample_rate
+            # Note length from the cumulative timeline; the tone part is
+            # rounded down on its own, as in rtttl.render.
+            self._frac += (tone_us + gap_us) * sr
+            total = self._frac // 1_000_000
+            self._frac -= total * 1_000_000
+            tone = tone_us * sr // 1_000_000 if freq else 0
+            if tone > total:
+                tone = total
+            self._tone_left = tone
+            self._gap_left = total - tone
+            step = freq << 16
+            self._inc = step // sr
+            self._inc_rem = step - self._inc * sr
+            if total:
+                return True
+        self._notes = None
+        return False
+
+
+class WavSink:
+    """Mono 16-bit WAV file sink for host testing (CPython).
+
+    Args:
+        path:        File name or writable binary file object.
+        sample_rate: Rate written to the header.
+    """
+
+    def __init__(self, path, sample_rate: int = SYNTH_SAMPLE_RATE):
+        import wave                     # deferred: host only
+
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, buf) -> None:
+        self._wav.writeframes(buf)
+
+    def close(self) -> None:
+        self._wav.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _string_notes(rtttl: str, header):
+    """Parser triples of every pass of *rtttl*, read one token at a time."""
+    end = len(rtttl)
+    for _ in range(max(header.number_of_loops, 1)):
+        idx = header.notes_start
+        while idx < end:
+            note_index, octave, duration_us, idx = parse_next_note_us(rtttl, idx, header)
+            yield note_index, octave, duration_us
+
+
+def _stream_notes(stream):
+    """Parser triples of every pass of a :class:`NoteStream`."""
+    loops = max(stream.header.number_of_loops, 1)
+    while True:
+        for note in stream.notes_us():
+            yield note
+        loops -= 1
+        if loops <= 0 or not stream.rewind():
+            return
+
+
+def _compiled_notes(song):
+    notes = song.notes
+    for _ in range(max(song.header.number_of_loops, 1)):
+        for i in range(0, song.note_count * 3, 3):
+            yield notes[i], notes[i + 1], notes[i + 2]
+
+
+def main(argv=None) -> int:
+    import argparse                     # deferred: host-only CLI
+    import sys
+    import tracemalloc
+
+    from .melodies import RTTTL_MELODIES
+
+    ap = argparse.ArgumentParser(prog="python -m rtttl.synth",
+                                 description="Stream an RTTTL song to a WAV or raw PCM file.")
+    ap.add_argument("song", help="built-in melody index, RTTTL file, or '-' for stdin")
+    ap.add_argument("-o", "--output", required=True, help=".wav file, or raw s16le PCM otherwise")
+    ap.add_argument("-r", "--rate", type=int, default=SYNTH_SAMPLE_RATE)
+    ap.add_argument("-c", "--chunk", type=int, default=SYNTH_CHUNK_SAMPLES, help="samples per buffer")
+    ap.add_argument("-w", "--waveform", choices=WAVEFORMS, default="square")
+    args = ap.parse_args(argv)
+
+    tracemalloc.start()
+    synth = Synth(args.rate, args.chunk, waveform=args.waveform)
+    if args.song.isdigit():
+        ok = synth.start(RTTTL_MELODIES[int(args.song)])
+    elif args.song == "-":
+        ok = synth.start(sys.stdin.buffer)
+    else:
+        src = open(args.song, "rb")
+        ok = synth.start(src)
+    if not ok:
+        print("cannot parse song header", file=sys.stderr)
+        return 1
+    if args.output.endswith(".wav"):
+        sink = WavSink(args.output, args.rate)
+    else:
+        sink = open(args.output, "wb")
+    tracemalloc.reset_peak()            # leave out the wave module import
+    with sink:
+        n = synth.stream(sink)
+    peak = tracemalloc.get_traced_memory()[1]
+    print("%d samples (%.2f s) written to %s; peak Python memory %d bytes" % (
+        n, n / args.rate, args.output, peak))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""
+Test setup: make the repository importable as the ``rtttl`` package.
+
+The repository root *is* the ``rtttl/`` folder that is copied to the
+device, so it is loaded under that name here instead of being installed.
+"""
+
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "rtttl" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "rtttl", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules["rtttl"] = _module
+    _spec.loader.exec_module(_module)
@@ -0,0 +1,69 @@
+"""asyncio front-end (rtttl.async_player) in real time."""
+
+import asyncio
+
+import pytest
+
+from rtttl import async_player
+from rtttl.async_player import AsyncPlayRtttl
+from rtttl.backends import RecordingBackend
+from rtttl.simulate import simulate, tones
+
+SONG = "short:d=16,o=6,b=240:c,e,p,g"       # four 62.5 ms notes
+
+
+def freqs(events):
+    return [hz for _, kind, hz in events if kind == "freq"]
+
+
+def test_play_waits_for_the_end_of_the_song(monkeypatch):
+    sleeps = []
+    real_sleep = async_player._sleep_ms
+
+    def sleep_ms(ms):
+        sleeps.append(ms)
+        return real_sleep(ms)
+    monkeypatch.setattr(async_player, "_sleep_ms", sleep_ms)
+
+    backend = RecordingBackend()
+    player = AsyncPlayRtttl(backend=backend)
+    done = []
+    assert asyncio.run(player.play(SONG, on_complete=lambda: done.append(1)))
+    assert done == [1] and not player.is_playing()
+    assert freqs(backend.events) == [hz for _, _, hz in tones(simulate(SONG))]
+    # It sleeps until the next tone stop or note, not every millisecond.
+    assert len(sleeps) <= 10 and sum(sleeps) >= 200
+
+
+def test_play_rejects_a_bad_header():
+    player = AsyncPlayRtttl(backend=RecordingBackend())
+    assert asyncio.run(player.play("no header")) is False
+
+
+def test_background_playback_and_wait():
+    backend = RecordingBackend()
+    player = AsyncPlayRtttl(backend=backend)
+
+    async def main():
+        task = player.play_background(SONG)
+        assert task is not None and player.is_playing()
+        await player.wait()
+        return task
+    task = asyncio.run(main())
+    assert task.done() and not player.is_playing()
+    assert freqs(backend.events) == [hz for _, _, hz in tones(simulate(SONG))]
+
+
+def test_cancel_stops_and_silences():
+    backend = RecordingBackend()
+    player = AsyncPlayRtttl(backend=backend)
+
+    async def main():
+        task = player.play_background("long:d=1,o=5,b=60:c,d,e")
+        await asyncio.sleep(0.05)
+        player.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(main())
+    assert not player.is_playing()
+    assert backend.events[-1][1:] == ("duty", 0)
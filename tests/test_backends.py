@@ -0,0 +1,80 @@
+"""Output backends (rtttl.backends) and how the player drives them."""
+
+import sys
+import types
+
+import pytest
+
+from rtttl.backends import NullBackend, OutputBackend, PWMBackend, RecordingBackend
+from rtttl.notes import get_frequency
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, run
+
+
+class FakePWM:
+    def __init__(self, pin):
+        self.pin = pin
+        self.calls = []
+
+    def freq(self, hz):
+        self.calls.append(("freq", hz))
+
+    def duty_u16(self, value):
+        self.calls.append(("duty", value))
+
+
+@pytest.fixture
+def fake_machine(monkeypatch):
+    machine = types.ModuleType("machine")
+    machine.Pin = lambda n: ("pin", n)
+    machine.PWM = FakePWM
+    monkeypatch.setitem(sys.modules, "machine", machine)
+    return machine
+
+
+def test_pwm_backend_imports_machine_when_created(fake_machine):
+    backend = PWMBackend(5)
+    pwm = backend._pwm
+    assert pwm.pin == ("pin", 5)
+    assert pwm.calls == [("freq", 1000), ("duty", 0)]
+    backend.freq(440)
+    backend.duty_u16(32768)
+    assert pwm.calls[2:] == [("freq", 440), ("duty", 32768)]
+
+
+def test_player_builds_a_pwm_backend_from_a_pin(fake_machine):
+    player = PlayRtttl(pin=7)
+    assert isinstance(player._pwm, PWMBackend) and player._pwm._pwm.pin == ("pin", 7)
+
+
+def test_player_needs_a_pin_or_a_backend():
+    with pytest.raises(ValueError):
+        PlayRtttl()
+
+
+def test_output_backend_is_abstract():
+    with pytest.raises(NotImplementedError):
+        OutputBackend().freq(440)
+    with pytest.raises(NotImplementedError):
+        OutputBackend().duty_u16(0)
+
+
+def test_recording_backend_records_tone_on_and_off():
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    player.start("t:d=4,o=5,b=120:a,p")
+    run(player, clock)
+    # quarter note at 120 bpm: 500 ms, the tone 1/16 shorter
+    assert backend.events[:3] == [(0, "freq", get_frequency(9, 5)), (0, "duty", 32768),
+                                  (468_750, "duty", 0)]
+    assert all(kind == "duty" and value == 0 for _, kind, value in backend.events[3:])
+    backend.clear()
+    assert backend.events == []
+
+
+def test_null_backend_plays_silently():
+    clock = VirtualClock()
+    player = PlayRtttl(backend=NullBackend(), clock=clock)
+    assert player.start("t:d=4,o=5,b=120:a,b,c6")
+    assert run(player, clock) == 1_500_000
@@ -0,0 +1,86 @@
+"""Melody banks (rtttl.bank) against compiled RTTTL strings."""
+
+import io
+
+import pytest
+
+from rtttl.bank import BankView, MelodyBank, write_bank
+from rtttl.compiler import as_compiled, compile_rtttl
+from rtttl.constants import STYLE_STACCATO
+from rtttl.melodies import RTTTL_MELODIES
+
+
+def make_bank(songs):
+    f = io.BytesIO()
+    write_bank(songs, f)
+    return f.getvalue()
+
+
+def test_in_memory_bank_loads_notes_without_copying():
+    data = make_bank(RTTTL_MELODIES[:4])
+    from_bytes = MelodyBank(data)
+    from_file = MelodyBank(io.BytesIO(data))
+    for i, rtttl in enumerate(RTTTL_MELODIES[:4]):
+        want = list(compile_rtttl(rtttl).notes)
+        view = from_bytes.load(i).notes
+        assert isinstance(view, memoryview) and view.obj is data
+        assert list(view) == want
+        assert list(from_file.load(i).notes) == want
+
+
+def test_builtin_bank_matches_its_sources():
+    from rtttl.melodies import BANK
+    from rtttl.melodies_src import RTTTL_MELODIES as SOURCES
+    assert len(BANK) == len(SOURCES) == len(RTTTL_MELODIES)
+    for i, rtttl in enumerate(SOURCES):
+        want = compile_rtttl(rtttl)
+        song = BANK.load(i)
+        assert RTTTL_MELODIES[i] == rtttl
+        assert list(song.notes) == list(want.notes)
+        assert BANK.name(i) == song.header.name == want.header.name
+        for attr in ("bpm", "default_duration", "default_octave", "number_of_loops",
+                     "time_for_whole_note_ms", "time_for_whole_note_us"):
+            assert getattr(song.header, attr) == getattr(want.header, attr), attr
+
+
+def test_lookup_by_name_and_position(tmp_path):
+    long_name = "Überlange Melodie mit sehr langem Namen ♪"
+    songs = ["short:d=4,o=5,b=100:c,d", long_name + ":d=8,o=6,b=180:e,f,p,g"]
+    path = str(tmp_path / "songs.bin")
+    with open(path, "wb") as f:
+        assert write_bank(songs, f) == 2
+    bank = MelodyBank(path)
+    assert list(bank.names()) == ["short", long_name]
+    assert bank.index_of(long_name) == 1
+    assert bank.load(long_name).header.name == long_name
+    assert list(bank.load(-1).notes) == list(compile_rtttl(songs[1]).notes)
+    assert bank.source(0) == songs[0]
+    with pytest.raises(KeyError):
+        bank.index_of(long_name[:20])
+    with pytest.raises(IndexError):
+        bank.load(2)
+    bank.close()
+    assert bank.load("short").note_count == 2       # reopened on demand
+
+
+def test_views():
+    bank = MelodyBank(make_bank(RTTTL_MELODIES[:5]))
+    view = BankView(bank, (4, 0, 2))
+    assert len(view) == 3
+    assert list(view) == [RTTTL_MELODIES[4], RTTTL_MELODIES[0], RTTTL_MELODIES[2]]
+    assert view[1:] == [RTTTL_MELODIES[0], RTTTL_MELODIES[2]]
+    assert view.name(0) == bank.name(4)
+    assert list(view.song(2).notes) == list(compile_rtttl(RTTTL_MELODIES[2]).notes)
+
+
+def test_restyled_on_load():
+    data = make_bank(RTTTL_MELODIES[:2])
+    song = as_compiled(MelodyBank(data).load(1), STYLE_STACCATO)
+    assert list(song.notes) == list(compile_rtttl(RTTTL_MELODIES[1], STYLE_STACCATO).notes)
+
+
+def test_not_a_bank():
+    with pytest.raises(ValueError):
+        MelodyBank(b"RTTX" + bytes(8))
+    with pytest.raises(ValueError):
+        write_bank(["no header"], io.BytesIO())
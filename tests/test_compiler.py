@@ -0,0 +1,76 @@
+"""Compiled note streams and the compile cache (rtttl.compiler)."""
+
+import pytest
+
+from rtttl.compiler import (CompiledSong, as_compiled, clear_compile_cache,
+                            compile_cached, compile_rtttl)
+from rtttl.constants import COMPILE_CACHE_SIZE, STYLE_STACCATO
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.notes import get_frequency
+from rtttl.parser import parse_header, parse_next_note_us
+from rtttl.simulate import simulate, tones
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_compile_cache()
+    yield
+    clear_compile_cache()
+
+
+def test_notes_and_duration_follow_the_parser():
+    rtttl = "Scale:d=4,o=5,b=120:c,8d#6,p,16g."
+    header = parse_header(rtttl)
+    song = compile_rtttl(rtttl)
+    idx = header.notes_start
+    total = 0
+    for i in range(song.note_count):
+        note_index, octave, duration_us, idx = parse_next_note_us(rtttl, idx, header)
+        freq, tone_us, gap_us = song.note(i)
+        assert freq == get_frequency(note_index, octave)
+        assert tone_us + gap_us == duration_us
+        assert (tone_us == 0) == (note_index > 11)
+        total += duration_us
+    assert idx == len(rtttl)
+    assert song.duration_us() == total
+    assert song.duration_ms() == total // 1000
+
+
+def test_invalid_header():
+    assert compile_rtttl("no header") is None
+    assert compile_cached("no header") is None
+    assert compile_cached("no header") is None
+
+
+def test_cache_returns_the_same_song_per_style():
+    rtttl = RTTTL_MELODIES[0]
+    song = compile_cached(rtttl)
+    assert compile_cached(rtttl) is song
+    staccato = compile_cached(rtttl, STYLE_STACCATO)
+    assert staccato is not song and staccato.style_divisor == STYLE_STACCATO
+    assert compile_cached(rtttl, STYLE_STACCATO) is staccato
+
+
+def test_cache_evicts_the_least_recently_used_song():
+    songs = RTTTL_MELODIES[:COMPILE_CACHE_SIZE + 1]
+    first = [compile_cached(s) for s in songs[:COMPILE_CACHE_SIZE]]
+    assert compile_cached(songs[0]) is first[0]       # now the most recent
+    compile_cached(songs[-1])                         # evicts songs[1]
+    assert compile_cached(songs[0]) is first[0]
+    for i in range(2, COMPILE_CACHE_SIZE):
+        assert compile_cached(songs[i]) is first[i]
+    assert compile_cached(songs[1]) is not first[1]
+
+
+def test_as_compiled_restyles_compiled_songs():
+    song = compile_rtttl(RTTTL_MELODIES[0])
+    assert as_compiled(song) is song
+    restyled = as_compiled(song, STYLE_STACCATO)
+    assert isinstance(restyled, CompiledSong)
+    assert list(restyled.notes) == list(compile_rtttl(RTTTL_MELODIES[0], STYLE_STACCATO).notes)
+    assert as_compiled(RTTTL_MELODIES[0]) is compile_cached(RTTTL_MELODIES[0])
+
+
+def test_player_plays_strings_and_compiled_songs_alike():
+    for rtttl in RTTTL_MELODIES[:5]:
+        assert tones(simulate(compile_rtttl(rtttl))) == tones(simulate(rtttl))
@@ -0,0 +1,65 @@
+"""Corpus validator (rtttl.corpus)."""
+
+import json
+
+from rtttl.bank import MelodyBank
+from rtttl.compiler import compile_rtttl
+from rtttl.corpus import (check_corpus, check_file, check_song, find_files, main,
+                          validate_rtttl)
+from rtttl.melodies import RTTTL_MELODIES
+
+
+def test_builtin_melodies_are_valid():
+    for rtttl in RTTTL_MELODIES:
+        assert validate_rtttl(rtttl) == [], rtttl
+
+
+def test_problems_and_offsets():
+    rtttl = "x:d=3,o=9,b=0,q=1:c,9d,h8,z,,c#.,4e5x"
+    problems = validate_rtttl(rtttl)
+    assert [(code, rtttl[offset:offset + 3]) for code, offset, _ in problems] == [
+        ("duration", "d=3"), ("octave", "o=9"), ("bpm", "b=0"), ("header", "q=1"),
+        ("duration", "9d,"), ("octave", "h8,"), ("note", "z,,"), ("note", ",c#"),
+        ("note", "4e5")]
+    assert validate_rtttl("no header") == [("header", 0, "expected 'name:parameters:notes'")]
+
+
+def test_check_song_counts_loops():
+    rtttl = "loop:d=4,o=5,b=120,l=3:c,d"
+    result = check_song(rtttl, pack=True)
+    assert result["ok"] and result["name"] == "loop" and result["notes"] == 2
+    assert result["duration_ms"] == 3 * compile_rtttl(rtttl).duration_ms()
+    assert result["record"][0] == b"loop"
+    bad = check_song("bad:d=4,o=5,b=120:c,z", pack=True)
+    assert not bad["ok"] and "record" not in bad
+
+
+def test_files_and_pool(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.rtttl").write_text("\n".join(RTTTL_MELODIES[:3]) + "\n\n")
+    (tmp_path / "sub" / "b.txt").write_text("\n" + RTTTL_MELODIES[3] + "\nbad:d=4,o=5,b=120:z\n")
+    (tmp_path / "notes.md").write_text("not a song")
+    files = find_files([str(tmp_path)])
+    assert [f[len(str(tmp_path)):] for f in files] == ["/a.rtttl", "/sub/b.txt"]
+
+    results = check_file(files[1])
+    assert [(r["line"], r["ok"]) for r in results] == [(2, True), (3, False)]
+    missing = check_file(str(tmp_path / "missing.rtttl"))
+    assert missing[0]["problems"][0]["code"] == "io"
+
+    serial = check_corpus(files, jobs=1)
+    assert check_corpus(files, jobs=2) == serial
+    assert len(serial) == 5
+
+
+def test_main_writes_bank_and_json(tmp_path, capsys):
+    songs = tmp_path / "songs.rtttl"
+    songs.write_text("\n".join(RTTTL_MELODIES[:4]) + "\nbad:d=4,o=5,b=120:z\n")
+    bank, report = str(tmp_path / "out.bin"), str(tmp_path / "report.json")
+    assert main(["-j", "1", "--bank", bank, "--json", report, str(songs)]) == 1
+    assert "1 with problems" in capsys.readouterr().out
+    loaded = MelodyBank(bank)
+    assert len(loaded) == 4
+    assert list(loaded.load(2).notes) == list(compile_rtttl(RTTTL_MELODIES[2]).notes)
+    with open(report) as f:
+        assert [r["ok"] for r in json.load(f)] == [True] * 4 + [False]
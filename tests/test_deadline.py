@@ -0,0 +1,84 @@
+"""Deadlines and low-power waits (PlayRtttl.next_deadline_ms, compat)."""
+
+from rtttl import compat
+from rtttl.backends import RecordingBackend
+from rtttl.constants import LIGHTSLEEP_MIN_MS
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, simulate, tones
+
+RTTTL = "t:d=4,o=5,b=100:c,p,e"    # 600 ms notes, tones of 562.5 ms
+
+
+def make_player():
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    return PlayRtttl(backend=backend, clock=clock), clock, backend
+
+
+def assert_on_time(backend, rtttl):
+    """Whole-millisecond sleeps: every event is at most 1 ms late."""
+    got = tones(backend.events)
+    want = tones(simulate(rtttl))
+    assert [hz for _, _, hz in got] == [hz for _, _, hz in want]
+    for (start, end, _), (want_start, want_end, _) in zip(got, want):
+        assert 0 <= start - want_start < 1000 and 0 <= end - want_end < 1000
+
+
+def test_deadline_points_at_the_next_event():
+    player, clock, _ = make_player()
+    assert player.next_deadline_ms() == -1
+    player.start(RTTTL)                         # c starts
+    assert player.next_deadline_ms() == 563     # tone stop, rounded up
+    clock.advance(562_000)
+    assert player.next_deadline_ms() == 1
+    clock.advance(1_000)
+    player.update()                             # tone stopped
+    assert player.next_deadline_ms() == 37      # next note at 600 ms
+    player.enqueue("n:d=4,o=5,b=120:a")
+    assert player.next_deadline_ms() == 0       # the next song wants compiling
+    player.update()
+    assert player.next_deadline_ms() == 37
+
+
+def test_sleeping_to_the_deadline_keeps_the_timing():
+    for rtttl in RTTTL_MELODIES[:6]:
+        player, clock, backend = make_player()
+        player.start(rtttl)
+        updates = 0
+        while player.update():
+            updates += 1
+            player.wait(clock.sleep)
+        assert_on_time(backend, rtttl)
+        # One wake-up per tone stop and per note, not one per millisecond.
+        assert clock.wakeups <= 2 * player.lateness.notes + 1
+        assert updates == clock.wakeups
+
+
+def test_play_blocking_light_sleeps_in_rests():
+    player, clock, backend = make_player()
+    player.play_blocking("t:d=4,o=5,b=60:c,1p,c", clock.sleep)
+    assert_on_time(backend, "t:d=4,o=5,b=60:c,1p,c")
+    assert clock.light_ms >= 4_000
+    assert clock.idle_ms < 2_000
+
+
+def test_low_power_sleep_picks_the_mode(monkeypatch):
+    calls = []
+    now = [0]
+
+    def idle():
+        calls.append("idle")
+        now[0] += 1
+
+    monkeypatch.setattr(compat, "_idle", idle)
+    monkeypatch.setattr(compat, "_lightsleep", lambda ms: calls.append(("light", ms)))
+    monkeypatch.setattr(compat, "ticks_ms", lambda: now[0])
+    compat.low_power_sleep(LIGHTSLEEP_MIN_MS, False)
+    assert calls == [("light", LIGHTSLEEP_MIN_MS)]
+    del calls[:]
+    compat.low_power_sleep(5, True)             # a tone is sounding
+    assert calls == ["idle"] * 5
+    del calls[:]
+    compat.low_power_sleep(LIGHTSLEEP_MIN_MS - 1, False)
+    assert calls == ["idle"] * (LIGHTSLEEP_MIN_MS - 1)
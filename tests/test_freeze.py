@@ -0,0 +1,63 @@
+"""Frozen song constants (rtttl.freeze) through the compiler and player."""
+
+import io
+
+import pytest
+
+from rtttl.bank import MelodyBank
+from rtttl.compiler import compile_cached, compile_rtttl
+from rtttl.freeze import freeze_song, main, write_module
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.simulate import simulate, tones
+
+
+def test_frozen_buffers_compile_through_the_cache():
+    rtttl = RTTTL_MELODIES[0]
+    data = freeze_song(rtttl)[1]
+    want = list(compile_rtttl(rtttl).notes)
+    for source in (data, bytearray(data), memoryview(data)):
+        song = compile_cached(source)
+        assert list(song.notes) == want
+        assert song.header.name == compile_rtttl(rtttl).header.name
+
+
+def test_frozen_song_plays_like_its_text():
+    for rtttl in RTTTL_MELODIES[:5]:
+        assert tones(simulate(freeze_song(rtttl)[1])) == tones(simulate(rtttl))
+
+
+def test_keep_text_stores_the_source():
+    rtttl = RTTTL_MELODIES[2]
+    name, data = freeze_song(rtttl, keep_text=True)
+    bank = MelodyBank(data)
+    assert list(bank.names()) == [name]
+    assert bank.source(0) == rtttl
+    assert len(freeze_song(rtttl)[1]) < len(data)
+
+
+def test_invalid_song_is_rejected():
+    with pytest.raises(ValueError):
+        freeze_song("no header here")
+
+
+def test_written_module_defines_the_songs():
+    songs = RTTTL_MELODIES[:3] + ["Dup:d=4:c", "Dup:d=8:e", "9 lives!:d=4:g"]
+    out = io.StringIO()
+    assert write_module(songs, out) == len(songs)
+    namespace = {}
+    exec(out.getvalue(), namespace)
+    assert namespace["NAMES"] == tuple(compile_rtttl(s).header.name for s in songs)
+    assert namespace["SONGS"] == tuple(freeze_song(s)[1] for s in songs)
+    assert namespace["DUP"] is namespace["SONGS"][3]
+    assert namespace["DUP_2"] is namespace["SONGS"][4]
+    assert namespace["SONG_9_LIVES_"] is namespace["SONGS"][5]
+
+
+def test_command_line_reads_song_files(tmp_path, capsys):
+    (tmp_path / "a.rtttl").write_text("One:d=4:c\n\nTwo:d=4:e\n", encoding="utf-8")
+    target = tmp_path / "frozen.py"
+    assert main([str(tmp_path / "a.rtttl"), "-o", str(target)]) == 0
+    assert "froze 2 songs" in capsys.readouterr().err
+    namespace = {}
+    exec(target.read_text(encoding="utf-8"), namespace)
+    assert namespace["NAMES"] == ("One", "Two")
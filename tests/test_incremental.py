@@ -0,0 +1,80 @@
+"""Incremental recompilation (rtttl.incremental) against full compiles."""
+
+import random
+
+import pytest
+
+from rtttl.compiler import compile_rtttl
+from rtttl.incremental import IncrementalSong
+from rtttl.melodies import RTTTL_MELODIES
+
+_PIECES = ["", ",", "c", "8", "#", ".", "6", "p", "16g#", ",4a.5", ",32p,", "e6,"]
+
+
+def check(live):
+    song = compile_rtttl(live.text)
+    if song is None:
+        assert live.header is None and live.song() is None
+        return
+    index = song.index(live.text.encode())
+    assert live.note_count == song.note_count
+    assert [live.note(k) for k in range(live.note_count)] == \
+        [tuple(song.notes[i:i + 3]) for i in range(0, len(song.notes), 3)]
+    assert [live.start_us(k) for k in range(live.note_count + 1)] == list(index.starts)
+    assert [live.token_offset(k) for k in range(live.note_count)] == list(index.offsets)
+    assert live.duration_us() == song.duration_us()
+    built = live.song()
+    assert list(built.notes) == list(song.notes)
+    assert list(built.index().starts) == list(index.starts)
+    assert list(built.index().offsets) == list(index.offsets)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_note_edits_match_full_compile(seed):
+    rnd = random.Random(seed)
+    live = IncrementalSong(RTTTL_MELODIES[seed * 5])
+    for _ in range(300):
+        text = live.text
+        start = text.index(":", text.index(":") + 1) + 1
+        offset = rnd.randint(start, len(text))
+        removed = rnd.randint(0, min(6, len(text) - offset))
+        old = [live.note(k) for k in range(live.note_count)]
+        first, n_removed, n_added = live.edit(offset, removed, rnd.choice(_PIECES))
+        new = [live.note(k) for k in range(live.note_count)]
+        # Only the notes reported as changed differ.
+        assert new[:first] == old[:first]
+        assert new[first + n_added:] == old[first + n_removed:]
+        if rnd.random() < 0.1:
+            check(live)
+    check(live)
+
+
+def test_header_edits_recompile():
+    live = IncrementalSong("Tune:d=4,o=5,b=100:c,d,e")
+    assert live.edit(15, 3, "200") == (0, 3, 3)
+    check(live)
+    assert live.duration_ms() == 3 * 300
+    live.edit(6, 1, "8")                    # d=4 → d=8
+    check(live)
+    live.edit(4, 1, "")                     # drop the first colon
+    assert live.header is None and live.note_count == 0
+    assert live.song() is None
+    live.edit(4, 0, ":")
+    check(live)
+    assert live.note_count == 3
+
+
+def test_non_ascii_text():
+    live = IncrementalSong("Für Élise:d=8,o=5,b=140:e6,d#6,e6")
+    end = len(live.text)
+    live.edit(end, 0, ",b5")
+    live.edit(end - 2, 2, "c6")
+    check(live)
+    assert live.note_at(live.token_offset(2)) == 2
+    assert live.note_at(0) == -1
+
+
+def test_bad_range():
+    live = IncrementalSong("x:d=4,o=5,b=100:c")
+    with pytest.raises(ValueError):
+        live.edit(10, 20, "")
@@ -0,0 +1,97 @@
+"""Multi-channel scheduler (rtttl.multi_player) on a fake millisecond clock."""
+
+import pytest
+
+from rtttl import multi_player
+from rtttl.backends import RecordingBackend
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.multi_player import MultiPlayer
+from rtttl.simulate import simulate, tones
+
+
+class MsClock:
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = MsClock()
+    monkeypatch.setattr(multi_player, "ticks_ms", clock)
+    return clock
+
+
+def run(mp, clock, limit_ms=600_000):
+    end = clock.now + limit_ms
+    while mp.update() and clock.now < end:
+        clock.now += 1
+
+
+def expected_ms(rtttl, start_ms=0):
+    # Events are rounded up to whole ms from the exact µs timeline.
+    return [(start_ms - (-s // 1000), start_ms - (-e // 1000), hz)
+            for s, e, hz in tones(simulate(rtttl))]
+
+
+def test_channels_follow_the_exact_timeline(clock):
+    mp = MultiPlayer()
+    songs = RTTTL_MELODIES[:3]
+    backends = [RecordingBackend(clock) for _ in songs]
+    done = []
+    for i, (backend, rtttl) in enumerate(zip(backends, songs)):
+        ch = mp.add_channel(backend=backend)
+        assert mp.start(ch, rtttl, on_complete=lambda i=i: done.append(i))
+    run(mp, clock)
+    assert sorted(done) == [0, 1, 2] and not mp.is_playing()
+    for backend, rtttl in zip(backends, songs):
+        assert tones(backend.events) == expected_ms(rtttl)
+
+
+def test_stop_and_restart_a_channel(clock):
+    mp = MultiPlayer()
+    a, b = RecordingBackend(clock), RecordingBackend(clock)
+    ca, cb = mp.add_channel(backend=a), mp.add_channel(backend=b)
+    mp.start(ca, RTTTL_MELODIES[0])
+    mp.start(cb, RTTTL_MELODIES[1])
+    clock.now = 500
+    mp.update()
+    mp.stop(ca)
+    assert not mp.is_playing(ca) and mp.is_playing(cb) and mp.is_playing()
+    assert a.events[-1][1:] == ("duty", 0)
+    # Restarting replaces the song; events of the old one are dropped.
+    b.clear()
+    mp.start(cb, RTTTL_MELODIES[2])
+    run(mp, clock)
+    assert tones(b.events) == expected_ms(RTTTL_MELODIES[2], 500)
+    assert a.events[-1][0] == 500
+
+
+def test_loops(clock):
+    mp = MultiPlayer()
+    backend = RecordingBackend(clock)
+    rtttl = "t:d=8,o=6,b=200,l=3:c,d,p,e"
+    mp.start(mp.add_channel(backend=backend), rtttl)
+    run(mp, clock)
+    assert tones(backend.events) == expected_ms(rtttl)
+
+
+def test_epoch_rebase_keeps_due_times(clock):
+    mp = MultiPlayer()
+    backend = RecordingBackend(clock)
+    clock.now = multi_player._REBASE_MS - 300
+    start = clock.now
+    mp.start(mp.add_channel(backend=backend), RTTTL_MELODIES[0])
+    run(mp, clock)
+    assert mp._epoch != 0
+    assert tones(backend.events) == expected_ms(RTTTL_MELODIES[0], start)
+
+
+def test_bad_input(clock):
+    mp = MultiPlayer()
+    with pytest.raises(ValueError):
+        mp.add_channel()
+    assert not mp.start(mp.add_channel(backend=RecordingBackend(clock)), "no header")
+    assert not mp.update()
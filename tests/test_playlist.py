@@ -0,0 +1,125 @@
+"""Playlist order, repeat modes and on_complete callbacks in simulated time."""
+
+from rtttl.backends import RecordingBackend
+from rtttl.compiler import compile_rtttl
+from rtttl.constants import REPEAT_ALL, REPEAT_ONE
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, run, simulate, tones
+
+SONGS = ["a:d=8,o=5,b=200:c,d", "b:d=8,o=5,b=200:e,f,g", "c:d=16,o=6,b=200:a,p,b"]
+
+
+def make_player():
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    return PlayRtttl(backend=backend, clock=clock), clock, backend
+
+
+def back_to_back(songs):
+    """Tones of *songs* played one after another without gaps."""
+    out, t = [], 0
+    for rtttl in songs:
+        out += [(start + t, end + t, hz) for start, end, hz in tones(simulate(rtttl))]
+        t += compile_rtttl(rtttl).duration_us()
+    return out
+
+
+def test_playlist_is_gapless():
+    player, clock, backend = make_player()
+    for rtttl in SONGS:
+        player.enqueue(rtttl)
+    run(player, clock)
+    assert tones(backend.events) == back_to_back(SONGS)
+
+
+def test_repeat_off_drops_played_songs():
+    player, clock, _ = make_player()
+    finished = []
+    for i in range(300):
+        player.enqueue(SONGS[i % 3], lambda i=i: finished.append(i))
+        assert len(player._playlist) <= 2
+        while player.queued():
+            clock.advance(player._us_until_next_event())
+            player.update()
+    run(player, clock)
+    assert finished == list(range(300))
+    assert len(player._playlist) == 1
+    assert player.queued() == 0
+
+
+def test_repeat_one_callback_can_stop():
+    player, clock, backend = make_player()
+    player.set_repeat(REPEAT_ONE)
+    passes = []
+
+    def done():
+        passes.append(len(tones(backend.events)))
+        if len(passes) == 3:
+            player.stop()
+
+    player.start(SONGS[1], done)
+    run(player, clock)
+    assert passes == [3, 6, 9]
+    assert not player.is_playing()
+    assert tones(backend.events) == back_to_back([SONGS[1]] * 3)
+
+
+def test_repeat_all_keeps_playlist():
+    player, clock, backend = make_player()
+    order = []
+    player.set_repeat(REPEAT_ALL)
+    for name, rtttl in zip("abc", SONGS):
+        player.enqueue(rtttl, lambda name=name: order.append(name))
+    length = sum(compile_rtttl(rtttl).duration_us() for rtttl in SONGS)
+    run(player, clock, max_us=2 * length + 1)
+    assert order == list("abcabc")
+    assert len(player._playlist) == 3
+    assert tones(backend.events)[:14] == back_to_back(SONGS * 2)
+
+
+def test_on_complete_can_chain_songs():
+    player, clock, backend = make_player()
+    started = []
+
+    def chain(k):
+        def done():
+            if k + 1 < len(SONGS):
+                started.append(k + 1)
+                player.start(SONGS[k + 1], chain(k + 1))
+        return done
+
+    player.start(SONGS[0], chain(0))
+    run(player, clock)
+    assert started == [1, 2]
+    want = [hz for _, _, hz in back_to_back(SONGS)]
+    assert [hz for _, _, hz in tones(backend.events)] == want
+
+
+def test_seek_past_end_advances_playlist():
+    player, clock, backend = make_player()
+    finished = []
+    player.enqueue(SONGS[0], lambda: finished.append("a"))
+    player.enqueue(SONGS[1], lambda: finished.append("b"))
+    assert player.seek(10_000)
+    assert finished == ["a"]
+    assert player.is_playing()
+    run(player, clock)
+    assert finished == ["a", "b"]
+    assert [hz for _, _, hz in tones(backend.events)][-3:] == \
+        [hz for _, _, hz in tones(simulate(SONGS[1]))]
+
+
+def test_seek_past_end_repeats():
+    player, clock, backend = make_player()
+    passes = []
+    player.set_repeat(REPEAT_ONE)
+    player.start(SONGS[1], lambda: passes.append(clock.now_us))
+    assert player.seek(10_000)
+    assert passes == [0] and player.is_playing()
+    assert player.position_ms() == 0
+    player.set_repeat(REPEAT_ALL)
+    player.enqueue(SONGS[0])
+    player.seek(10_000)
+    assert player.is_playing() and player._source == SONGS[0]
+    player.seek(10_000)                 # start() songs are not in the playlist
+    assert player.is_playing() and player._source == SONGS[0]
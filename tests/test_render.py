@@ -0,0 +1,67 @@
+"""Offline renderer (rtttl.render) against the player timeline."""
+
+import io
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.render import note_table, render_pcm, render_wav
+from rtttl.simulate import simulate, tones
+
+RATE = 8000
+
+
+def test_note_and_rest_lengths():
+    # Quarter notes at 120 bpm: 4000 samples each, the tone 1/16 shorter.
+    pcm = render_pcm("t:d=4,o=5,b=120:c,p,e", RATE, amplitude=100)
+    assert len(pcm) == 12000
+    assert np.all(pcm[:3750] != 0) and np.all(pcm[3750:8000] == 0)
+    assert np.all(pcm[8000:11750] != 0) and np.all(pcm[11750:] == 0)
+    assert set(np.unique(pcm)) == {-100, 0, 100}
+
+
+def test_square_wave_starts_high_at_the_note_frequency():
+    pcm = render_pcm("t:d=4,o=5,b=120:c,e", RATE, amplitude=100)
+    table = note_table("t:d=4,o=5,b=120:c,e")
+    for start, freq in ((0, table[0][0]), (4000, table[1][0])):
+        tone = pcm[start:start + 3750]
+        assert tone[0] == 100
+        flips = np.count_nonzero(np.diff(tone))
+        assert abs(flips - 3750 * 2 * freq // RATE) <= 1
+
+
+def test_tones_line_up_with_the_simulated_player():
+    for rtttl in RTTTL_MELODIES[:10]:
+        pcm = render_pcm(rtttl, RATE)
+        expected = 0
+        for start_us, end_us, freq in tones(simulate(rtttl)):
+            start, end = start_us * RATE // 1_000_000, end_us * RATE // 1_000_000
+            assert np.all(pcm[start + 1:end - 1] != 0)
+            expected += end - start
+        assert abs(np.count_nonzero(pcm) - expected) <= len(tones(simulate(rtttl)))
+
+
+def test_loops_repeat_the_song():
+    once = render_pcm("t:d=8,o=6,b=200,l=1:c,d,p,e", RATE)
+    twice = render_pcm("t:d=8,o=6,b=200,l=2:c,d,p,e", RATE)
+    assert len(twice) == 2 * len(once)
+    assert np.array_equal(twice[:len(once)], once)
+
+
+def test_invalid_header_raises():
+    with pytest.raises(ValueError):
+        render_pcm("no header")
+
+
+def test_render_wav():
+    f = io.BytesIO()
+    n = render_wav(RTTTL_MELODIES[21], f, RATE)
+    f.seek(0)
+    with wave.open(f, "rb") as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, RATE)
+        assert w.getnframes() == n
+        assert np.array_equal(np.frombuffer(w.readframes(n), "<i2"),
+                              render_pcm(RTTTL_MELODIES[21], RATE))
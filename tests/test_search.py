@@ -0,0 +1,90 @@
+"""Name and melody search (rtttl.search)."""
+
+import pytest
+
+from rtttl.bench import synthetic_corpus
+from rtttl.compiler import compile_rtttl
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.search import SongIndex, contour, fragment_contour
+
+NOKIA = "8e6,8d6,f#5,g#5,8c#6,8b5,d5,e5,8b5,8a5,c#5,e5,2a5"
+
+
+def build(songs):
+    index = SongIndex()
+    for i, rtttl in enumerate(songs):
+        assert index.add(rtttl, "line %d" % i) == i
+    return index
+
+
+def test_contour_skips_rests_and_ignores_key():
+    song = compile_rtttl("t:d=4,o=5,b=120:c,p,e,g,c6,c5,c8")
+    assert list(contour(song)) == [4, 3, 5, -12, 24]
+    assert fragment_contour("c,e,g") == fragment_contour("8d6,8f#6,8a6")
+    assert list(fragment_contour([440, 880, 0, 440])) == [12, -12]
+    with pytest.raises(ValueError):
+        fragment_contour("x:bad:c,d")
+
+
+def test_name_prefix():
+    index = build(["Nokia:d=4:c", "nightrider:d=4:c", "Other:d=4:c", "NOKIA 2:d=4:c"])
+    assert index.find_name("no") == [0, 3]
+    assert index.find_name("N") == [1, 0, 3]
+    assert index.find_name("n", limit=1) == [1]
+    assert index.find_name("x") == []
+    assert index.name(3) == "NOKIA 2" and index.ref(2) == "line 2"
+
+
+def test_melody_found_in_any_key_and_tempo():
+    songs = synthetic_corpus(300, 60, seed=8) + ["Nokia:d=4,o=5,b=112:" + NOKIA]
+    index = build(songs)
+    target = len(songs) - 1
+    for fragment in ("8e6,8d6,f#5,g#5,8c#6,8b5",            # as written
+                     "16g6,16f6,8a5,8b5,16e6,16d6",         # up a minor third
+                     [659, 587, 370, 415, 554, 494]):       # in Hz
+        score, song_id = index.query(fragment)[0]
+        assert (score, song_id) == (1.0, target)
+    # One wrong note still finds the song, with a lower score.
+    score, song_id = index.query("8e6,8d6,f#5,a5,8c#6,8b5,d5")[0]
+    assert song_id == target and 0 < score < 1.0
+    with pytest.raises(ValueError):
+        index.query("c,d,e")                # needs ngram + 1 notes
+
+
+def test_added_songs_are_found_at_once():
+    index = build(RTTTL_MELODIES)
+    before = index.query(NOKIA[:30])
+    song_id = index.add("Late:d=8,o=4,b=100:" + NOKIA)
+    assert song_id == len(RTTTL_MELODIES)
+    results = index.query(NOKIA[:30])
+    assert (1.0, song_id) in results
+    assert len(results) >= len(before)
+
+
+def test_save_open_and_sync(tmp_path):
+    path = str(tmp_path / "songs.rtti")
+    index = build(RTTTL_MELODIES)
+    index.save(path)
+    loaded = SongIndex.open(path)
+    assert len(loaded) == len(index)
+    assert [loaded.name(i) for i in range(len(loaded))] == \
+        [index.name(i) for i in range(len(index))]
+    fragment = RTTTL_MELODIES[21].split(":")[2][:40]
+    assert loaded.query(fragment) == index.query(fragment)
+
+    # Appended records are indexed when the file is next opened...
+    new_id = loaded.add("Late:d=8,o=4,b=100:" + NOKIA, "new")
+    assert loaded.sync() == 1 and loaded.sync() == 0
+    reopened = SongIndex.open(path)
+    assert reopened.ref(new_id) == "new"
+    assert (1.0, new_id) in reopened.query(NOKIA)
+    # ...and folded into the postings by the next save.
+    reopened.save()
+    assert (1.0, new_id) in SongIndex.open(path).query(NOKIA)
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / "junk.rtti"
+    path.write_bytes(b"JUNK" + bytes(20))
+    with pytest.raises(ValueError):
+        SongIndex.open(str(path))
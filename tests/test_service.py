@@ -0,0 +1,148 @@
+"""Rendering service (rtttl.service): cache keys, LRU, disk and merging."""
+
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from rtttl import service
+from rtttl.service import RenderCache, RenderServer
+
+BEEP = "Beep:d=4,o=5,b=120:c,e,g"
+RATE = 8000
+
+
+def test_key_depends_on_notes_not_spelling():
+    key = RenderCache.key(BEEP, RATE)
+    assert RenderCache.key("Other name:d=4,o=5,b=120:4c,4e5,4g", RATE) == key
+    assert RenderCache.key("x:d=4,o=5,b=120:c,e,b", RATE) == \
+        RenderCache.key("x:d=4,o=5,b=120:c,e,h", RATE)
+    assert RenderCache.key(BEEP, RATE * 2) != key
+    assert RenderCache.key(BEEP, RATE, amplitude=100) != key
+    assert RenderCache.key("x:d=4,o=5,b=120,l=2:c,e,g", RATE) != key
+    for bad in ("no header", "x:d=4,o=5,b=120:" + "c," * 10_000):
+        with pytest.raises(ValueError):
+            RenderCache.key(bad)
+
+
+def test_memory_hits_and_lru_eviction():
+    cache = RenderCache()
+    wav, key, source = cache.get(BEEP, RATE)
+    assert source == "miss" and wav[:4] == b"RIFF"
+    assert cache.get(BEEP, RATE) == (wav, key, "memory")
+
+    # Room for two renders of this size: the least recently used goes.
+    cache = RenderCache(memory_bytes=2 * len(wav) + 100)
+    a, b, c = ("x:d=4,o=5,b=120:c,e,%s" % n for n in "gab")
+    cache.get(a, RATE)
+    cache.get(b, RATE)
+    assert cache.get(a, RATE)[2] == "memory"        # a is now the newest
+    cache.get(c, RATE)                              # evicts b
+    assert cache.get(a, RATE)[2] == "memory"
+    assert cache.get(b, RATE)[2] == "miss"          # evicts c
+    assert cache.get(c, RATE)[2] == "miss"
+    stats = cache.stats()
+    assert stats["memory_items"] == 2 and stats["memory_bytes"] <= 2 * len(wav) + 100
+    assert stats["misses"] == 5 and stats["hits_memory"] == 2
+    assert stats["hit_rate"] == 2 / 7
+
+
+def test_disk_cache_survives_a_restart(tmp_path):
+    wav, key, _ = RenderCache(str(tmp_path)).get(BEEP, RATE)
+    cache = RenderCache(str(tmp_path))
+    assert cache.get(BEEP, RATE) == (wav, key, "disk")
+    assert cache.get(BEEP, RATE)[2] == "memory"
+    cache.clear_memory()
+    assert cache.get(BEEP, RATE)[2] == "disk"
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def slow_render(monkeypatch, fail=False):
+    """Make renders wait until the returned event is set; count them."""
+    release = threading.Event()
+    calls = []
+    plain = service.render_wav
+
+    def render_wav(*args):
+        calls.append(args)
+        release.wait(5)
+        if fail:
+            raise ValueError("render failed")
+        plain(*args)
+
+    monkeypatch.setattr(service, "render_wav", render_wav)
+    return release, calls
+
+
+def request_all(cache, n):
+    results = [None] * n
+
+    def request(i):
+        try:
+            results[i] = cache.get(BEEP, RATE)
+        except ValueError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def wait_for_waiters(cache, n):
+    for _ in range(500):
+        if cache.merged == n:
+            return
+        threading.Event().wait(0.01)
+
+
+def test_concurrent_requests_share_one_render(monkeypatch):
+    release, calls = slow_render(monkeypatch)
+    cache = RenderCache()
+    threads, results = request_all(cache, 8)
+    wait_for_waiters(cache, 7)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(source for _, _, source in results) == ["merged"] * 7 + ["miss"]
+    assert len({wav for wav, _, _ in results}) == 1
+    assert cache.stats()["merged"] == 7 and not cache._inflight
+
+
+def test_render_error_reaches_every_waiter(monkeypatch):
+    release, calls = slow_render(monkeypatch, fail=True)
+    cache = RenderCache()
+    threads, results = request_all(cache, 4)
+    wait_for_waiters(cache, 3)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.stats()["memory_items"] == 0 and not cache._inflight
+
+
+def test_http_front_end():
+    server = RenderServer(("127.0.0.1", 0), RenderCache(), quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = "http://127.0.0.1:%d" % server.server_address[1]
+    try:
+        url = base + "/render?rate=%d" % RATE
+        with urllib.request.urlopen(url, BEEP.encode()) as r:
+            assert r.headers["X-Cache"] == "miss"
+            assert r.headers["ETag"] == '"%s"' % RenderCache.key(BEEP, RATE)
+            wav = r.read()
+        with urllib.request.urlopen(url, BEEP.encode()) as r:
+            assert r.headers["X-Cache"] == "memory" and r.read() == wav
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(base + "/render?rate=5", BEEP.encode())
+        assert e.value.code == 400
+        with urllib.request.urlopen(base + "/stats") as r:
+            assert b'"hits_memory": 1' in r.read()
+    finally:
+        server.shutdown()
+        server.server_close()
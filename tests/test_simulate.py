@@ -0,0 +1,97 @@
+"""Simulated-time playback (rtttl.simulate) as a timing oracle."""
+
+from rtttl import bench
+from rtttl.backends import NullBackend, RecordingBackend
+from rtttl.compiler import compile_rtttl
+from rtttl.constants import REPEAT_ONE
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, run, simulate, tones
+
+
+def compiled_tones(song):
+    """``(start_us, end_us, hz)`` of every sounding note of every pass."""
+    out, t = [], 0
+    notes = song.notes
+    for _ in range(max(song.header.number_of_loops, 1)):
+        for i in range(0, len(notes), 3):
+            freq, tone_us, gap_us = notes[i], notes[i + 1], notes[i + 2]
+            if freq and tone_us:
+                out.append((t, t + tone_us, freq))
+            t += tone_us + gap_us
+    return out
+
+
+def test_timeline_matches_compiled_notes():
+    for rtttl in RTTTL_MELODIES:
+        song = compile_rtttl(rtttl)
+        if not song.header.number_of_loops:
+            continue                    # plays forever
+        assert tones(simulate(rtttl)) == compiled_tones(song), rtttl[:20]
+
+
+def test_run_returns_song_length():
+    rtttl = "len:d=4,o=5,b=100,l=3:c,8p,e.,16g"
+    clock = VirtualClock(5_000)
+    player = PlayRtttl(backend=NullBackend(), clock=clock)
+    player.start(rtttl)
+    assert run(player, clock) == 3 * compile_rtttl(rtttl).duration_us()
+    assert player.position_ms() == 0
+
+
+def test_endless_song_is_cut_off():
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    player.set_repeat(REPEAT_ONE)
+    player.start("forever:d=4,o=5,b=120:c,d")
+    assert run(player, clock, max_us=10_000_000) == 10_000_000
+    assert not player.is_playing()
+    assert tones(backend.events)[19][1] < 10_000_000 <= tones(backend.events)[-1][1]
+
+
+def test_blocking_loop_sleeps_on_the_clock():
+    clock = VirtualClock()
+    player = PlayRtttl(backend=NullBackend(), clock=clock)
+    player.start("sleepy:d=4,o=5,b=60:c,p,2p,e")
+    while player.update():
+        player.wait(clock.sleep)
+    assert clock.now_us >= 5_000_000
+    assert clock.idle_ms + clock.light_ms == clock.now_us // 1000
+    assert clock.light_ms >= 3_000      # the rests
+
+
+def test_invalid_header_gives_no_events():
+    assert simulate("no header") == []
+
+
+def test_bench_uses_the_virtual_clock():
+    idle_ns, note_ns = bench.bench_update(calls=200, repeat=1)
+    assert idle_ns > 0 and note_ns > 0
+
+
+def test_bench_compare_flags_regressions():
+    baseline = {"parse_corpus_notes_per_s": 1000.0, "compile_corpus_notes_per_s": 2000.0,
+                "update_note_ns": 100.0, "parse_alloc_bytes_per_note": 50.0}
+    results = {"parse_corpus_notes_per_s": 800.0, "compile_corpus_notes_per_s": 1000.0,
+               "update_note_ns": 130.0, "parse_alloc_bytes_per_note": 70.0,
+               "tokenize_corpus_notes_per_s": 5.0}
+    lines, regressions = bench.compare(results, baseline)
+    # compile fell from 2x to 1.25x the reference; update_note_ns rose with
+    # the slower host and is unchanged relative to it
+    assert regressions == ["compile_corpus_notes_per_s", "parse_alloc_bytes_per_note"]
+    assert len(lines) == 4
+
+
+def test_bench_compare_ignores_host_speed():
+    baseline = {"parse_corpus_notes_per_s": 1000.0, "tokenize_corpus_notes_per_s": 5000.0,
+                "update_idle_ns": 300.0}
+    slower = {name: value / 3 if name.endswith("_per_s") else value * 3
+              for name, value in baseline.items()}
+    assert bench.compare(slower, baseline)[1] == []
+
+
+def test_bench_baseline_has_every_metric():
+    assert set(bench.load_baseline()) >= {
+        "parse_corpus_notes_per_s", "tokenize_corpus_notes_per_s",
+        "compile_corpus_notes_per_s", "update_idle_ns", "update_note_ns"}
@@ -0,0 +1,80 @@
+"""Runtime counters and the note hook (PlayRtttl.enable_stats)."""
+
+import io
+
+from rtttl.backends import RecordingBackend
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, run, simulate, tones
+
+RTTTL = "t:d=4,o=5,b=120:c,e,p,g"
+
+
+def make_player():
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    return PlayRtttl(backend=backend, clock=clock), clock, backend
+
+
+def test_counters_and_note_hook():
+    player, clock, backend = make_player()
+    seen = []
+    stats = player.enable_stats(on_note=lambda p: seen.append(clock.now_us))
+    player.start(RTTTL)
+    run(player, clock)
+    # Instrumented playback is unchanged.
+    assert tones(backend.events) == tones(simulate(RTTTL))
+    assert stats.notes == player.lateness.notes == 4   # the rest counts too
+    assert seen == [0, 500_000, 1_000_000, 1_500_000]
+    assert stats.parse_calls == 1
+    assert stats.freq_writes == sum(1 for e in backend.events if e[1] == "freq")
+    assert stats.duty_writes == sum(1 for e in backend.events if e[1] == "duty")
+    assert stats.updates > stats.notes
+    assert 0 < stats.idle_updates < stats.updates
+    snap = player.stats()
+    assert snap["enabled"] and snap["notes"] == 4
+    assert snap["lateness"]["notes"] == player.lateness.notes
+
+
+def test_stream_notes_count_as_parse_calls():
+    player, clock, backend = make_player()
+    stats = player.enable_stats()
+    player.start_stream(io.BytesIO(RTTTL.encode()))
+    run(player, clock)
+    assert stats.parse_calls >= 4
+    assert tones(backend.events) == tones(simulate(RTTTL))
+
+
+def test_disable_restores_plain_player():
+    player, clock, backend = make_player()
+    player.enable_stats()
+    player.disable_stats()
+    assert "update" not in vars(player)
+    assert player._pwm is backend
+    assert player.stats()["enabled"] is False
+    player.start(RTTTL)
+    run(player, clock)
+    assert tones(backend.events) == tones(simulate(RTTTL))
+
+
+def test_enable_twice_does_not_stack():
+    player, clock, backend = make_player()
+    player.enable_stats()
+    stats = player.enable_stats()
+    assert player._pwm.backend is backend
+    player.start(RTTTL)
+    run(player, clock)
+    assert stats.notes == 4
+
+
+def test_seek_and_skip_count_skipped_notes():
+    player, clock, backend = make_player()
+    stats = player.enable_stats()
+    player.start(RTTTL)
+    player.update()                 # first note
+    assert player.seek(1_600)       # into the last note: two jumped over
+    assert stats.skipped == 2
+    player.start(RTTTL)
+    player.update()
+    player.enqueue("n:d=4,o=5,b=120:a")
+    assert player.skip()            # three notes never started
+    assert stats.skipped == 5
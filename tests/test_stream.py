@@ -0,0 +1,87 @@
+"""Streamed parsing (rtttl.stream) against the string parser."""
+
+import io
+
+import pytest
+
+from rtttl.constants import STREAM_HEADER_MAX
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.parser import parse_header, parse_next_note, parse_next_note_us
+from rtttl.stream import NoteStream, iter_notes
+from rtttl.simulate import VirtualClock, run, simulate, tones
+from rtttl.backends import RecordingBackend
+from rtttl.player import PlayRtttl
+
+
+def string_notes(rtttl, us=False):
+    header = parse_header(rtttl)
+    parse = parse_next_note_us if us else parse_next_note
+    idx = header.notes_start
+    notes = []
+    while idx < len(rtttl):
+        note_index, octave, duration, idx = parse(rtttl, idx, header)
+        notes.append((note_index, octave, duration))
+    return notes
+
+
+@pytest.mark.parametrize("chunk_size", [7, 16, 64, 4096])
+def test_melodies_match_string_parser(chunk_size):
+    for rtttl in RTTTL_MELODIES:
+        got = list(iter_notes(io.BytesIO(rtttl.encode()), chunk_size))
+        assert got == string_notes(rtttl)
+
+
+def test_microseconds_match_string_parser():
+    for rtttl in RTTTL_MELODIES:
+        stream = NoteStream(io.BytesIO(rtttl.encode()), 16)
+        assert list(stream.notes_us()) == string_notes(rtttl, us=True)
+
+
+def test_whitespace_between_tokens_is_ignored():
+    rtttl = RTTTL_MELODIES[21]
+    name, params, notes = rtttl.split(":")
+    spaced = name + ":" + params + ":\n" + ",\n  ".join(notes.split(",")) + "\n"
+    assert list(iter_notes(io.StringIO(spaced), 8)) == string_notes(rtttl)
+
+
+def test_non_ascii_names():
+    notes = "8e6,8d#6,e6,8p.,b5"
+    for name in ("Für Élise", "a" + "é" * 40, "ab" + "€" * 30, "♪" + "😀" * 20):
+        rtttl = name + ":d=8,o=5,b=140:" + notes
+        stream = NoteStream(io.BytesIO(rtttl.encode()), 16)
+        # Names longer than STREAM_HEADER_MAX bytes are cut at a character
+        # boundary, dropping at most the three bytes of a split character.
+        kept = len(stream.header.name.encode())
+        assert name.startswith(stream.header.name)
+        assert kept == len(name.encode()) or 61 <= kept <= STREAM_HEADER_MAX
+        assert list(stream.notes()) == string_notes(rtttl)
+
+
+def test_bare_trailing_duration_is_a_rest():
+    header = parse_header("t:d=4,o=5,b=120:c")
+    assert list(iter_notes(io.BytesIO(b"t:d=4,o=5,b=120:c,8"))) == [
+        (0, 5, header.time_for_whole_note_ms // 4),
+        (42, 5, header.time_for_whole_note_ms // 8)]
+
+
+def test_bad_header_yields_nothing():
+    assert list(iter_notes(io.BytesIO(b"no colon here"))) == []
+    assert NoteStream(io.BytesIO(b"name:d=4")).header.notes_start == -1
+
+
+def test_rewind_replays_the_song():
+    rtttl = RTTTL_MELODIES[3]
+    stream = NoteStream(io.BytesIO(rtttl.encode()), 32)
+    first = list(stream.notes())
+    assert stream.rewind()
+    assert list(stream.notes()) == first
+
+
+def test_streamed_playback_matches_compiled():
+    rtttl = "loop:d=8,o=5,b=180,l=3:c,e,g,p,c6"
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    assert player.start_stream(io.BytesIO(rtttl.encode()), chunk_size=8)
+    run(player, clock)
+    assert tones(backend.events) == tones(simulate(rtttl))
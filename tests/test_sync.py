@@ -0,0 +1,181 @@
+"""Multi-node sync (rtttl.sync): start messages, reassembly and start_at."""
+
+import socket
+
+import pytest
+
+from rtttl.backends import NullBackend, RecordingBackend
+from rtttl.compiler import compile_rtttl
+from rtttl.constants import SYNC_MAX_MESSAGE
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, tones
+from rtttl.sync import SyncFollower, SyncLeader, UDPTransport, _PART_HEADER, _split
+
+LONG_SONG = "Lång sång:d=32,o=5,b=900:" + ",".join(["c", "d#6", "8e.", "g"] * 300)
+
+
+class FakeNet:
+    """Zero-latency message switch; every sent message is kept in :attr:`sent`."""
+
+    def __init__(self):
+        self.boxes = {}
+        self.sent  = []
+
+    def transport(self, name, peer=None):
+        return FakeTransport(self, name, peer)
+
+
+class FakeTransport:
+
+    def __init__(self, net, name, peer):
+        self.net  = net
+        self.name = name
+        self.peer = peer
+
+    def send(self, text, addr=None):
+        self.net.sent.append(text)
+        self.net.boxes.setdefault(addr or self.peer, []).append((text, self.name))
+
+    def recv(self):
+        box = self.net.boxes.get(self.name)
+        return box.pop(0) if box else None
+
+    def wait(self, ms):
+        pass
+
+
+def make_nodes(offset_us=3_000_000):
+    clock = VirtualClock(1_000_000)
+    net = FakeNet()
+    leader = SyncLeader(net.transport("leader"), backend=RecordingBackend(clock),
+                        clock=lambda: clock() + offset_us)
+    follower = SyncFollower(net.transport("f1", "leader"),
+                            backend=RecordingBackend(clock), name="f1", local=clock)
+    return clock, net, leader, follower
+
+
+def step(clock, nodes, ms):
+    for _ in range(ms):
+        for node in nodes:
+            node.update()
+        clock.advance(1000)
+
+
+# ---------------------------------------------------------------------------
+# Position before and after start_at
+# ---------------------------------------------------------------------------
+
+def test_position_before_and_after_start_at():
+    song = "armed:d=4,o=5,b=120,l=2:c,e,g"
+    clock = VirtualClock()
+    player = PlayRtttl(backend=NullBackend(), clock=clock)
+    assert player.start_at(song, 500_000)
+    for _ in range(3):
+        assert player.update()
+        assert player.position_ms() == 0
+        assert player.source_offset() == -1
+        clock.advance(100_000)
+    clock.now_us = 500_000
+    assert player.update()
+    assert player.position_ms() == 0
+    assert song[player.source_offset()] == "c"
+    clock.advance(600_000)
+    assert player.update()
+    assert player.position_ms() == 600
+    assert song[player.source_offset()] == "e"
+
+
+# ---------------------------------------------------------------------------
+# Message size limits
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("text", ["", "abc", "x" * 1000, "é" * 700, "a€" * 400 + "😀" * 50])
+@pytest.mark.parametrize("size", [4, 9, 100, SYNC_MAX_MESSAGE - _PART_HEADER])
+def test_split_respects_size(text, size):
+    parts = _split(text, size)
+    assert "".join(parts) == text
+    assert all(len(part.encode()) <= size for part in parts)
+    assert all(parts) or parts == [""]
+
+
+def test_start_messages_fit():
+    clock, net, leader, follower = make_nodes()
+    step(clock, (follower, leader), 5)
+    assert leader.followers() == 1
+    assert leader.start(LONG_SONG)
+    starts = [msg for msg in net.sent if msg[:1] == "S"]
+    assert len(starts) > 1
+    assert all(len(msg.encode()) <= SYNC_MAX_MESSAGE for msg in starts)
+
+
+# ---------------------------------------------------------------------------
+# Follower
+# ---------------------------------------------------------------------------
+
+def test_follower_plays_long_song_in_step():
+    clock, net, leader, follower = make_nodes()
+    step(clock, (follower, leader), 200)
+    assert leader.start(LONG_SONG, lead_ms=100)
+    length_ms = compile_rtttl(LONG_SONG).duration_ms()
+    step(clock, (leader, follower), 100 + length_ms + 50)
+    assert not leader.player.is_playing() and not follower.player.is_playing()
+
+    led = tones(leader.player._pwm.events)
+    followed = tones(follower.player._pwm.events)
+    assert len(led) == 1200
+    assert [hz for _, _, hz in followed] == [hz for _, _, hz in led]
+    assert all(abs(a[0] - b[0]) <= 1000 for a, b in zip(led, followed))
+    assert "f1" in leader.skew_report()
+
+
+def test_follower_ignores_malformed_and_partial_messages():
+    clock, net, leader, follower = make_nodes()
+    inbox = net.boxes.setdefault("f1", [])
+    for text in ("S", "S 1", "S x 2 0 1 c", "S 1 2 3 1 c", "S 1 2 -1 1 c",
+                 "S 1 2 0 2 t:d=4,o=5,b=120:", "Sbogus"):
+        inbox.append((text, "leader"))
+    follower.update()
+    assert not follower.player.is_playing()
+    assert not [msg for msg in net.sent if msg[:1] == "A"]
+
+    # The missing part arrives: the song starts and is acknowledged.
+    inbox.append(("S 1 %d 1 2 c,e" % (clock() + 10_000_000), "leader"))
+    follower.update()
+    assert follower.player.is_playing()
+    assert "A 1 f1" in net.sent
+
+
+def test_udp_drops_oversize_datagrams():
+    rx = UDPTransport.bind("127.0.0.1", 0)
+    port = rx._sock.getsockname()[1]
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        tx.sendto(b"S" * (SYNC_MAX_MESSAGE + 1), ("127.0.0.1", port))
+        tx.sendto(b"\xff\xfe", ("127.0.0.1", port))
+        tx.sendto(b"P 1", ("127.0.0.1", port))
+        rx.wait(1000)
+        msg = None
+        for _ in range(100):
+            msg = rx.recv()
+            if msg is not None:
+                break
+            rx.wait(10)
+        assert msg is not None and msg[0] == "P 1"
+    finally:
+        tx.close()
+        rx.close()
+
+
+def test_malformed_messages_are_dropped():
+    clock, net, leader, follower = make_nodes()
+    step(clock, (follower, leader), 5)
+    for text in ("P", "P x", "A", "A x", "R", "R x f1 1 2 3 4 5 6", "R 1 f1 a b c d e f"):
+        net.boxes.setdefault("leader", []).append((text, "stray"))
+    for text in ("Q", "Q 1 2", "Q a b c", "T x"):
+        net.boxes.setdefault("f1", []).append((text, "leader"))
+    step(clock, (leader, follower), 5)
+    assert leader.followers() == 1
+    assert leader.reports == {}
+    assert leader.start("t:d=4,o=5,b=240:c,d", lead_ms=50)
+    step(clock, (leader, follower), 600)
+    assert len(tones(follower.player._pwm.events)) == 2
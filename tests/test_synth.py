@@ -0,0 +1,104 @@
+"""Streaming synthesis (rtttl.synth) against the offline renderer."""
+
+import io
+import wave
+
+import pytest
+
+from rtttl.compiler import compile_rtttl
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.synth import Synth, WavSink, wave_table
+
+RATE = 8000
+
+
+def synth_all(song, chunk=256, **kw):
+    synth = Synth(RATE, chunk, **kw)
+    assert synth.start(song)
+    out = []
+    buf = synth.next_chunk()
+    while buf is not None:
+        out.extend(buf)
+        buf = synth.next_chunk()
+    assert synth.samples == len(out)
+    return out
+
+
+def test_sources_and_chunk_sizes_agree():
+    rtttl = "loop:d=8,o=5,b=180,l=2:c,e,g,p,c6"
+    want = synth_all(rtttl)
+    assert len(want) == 2 * 5 * RATE * 60 // 180 // 2
+    assert synth_all(compile_rtttl(rtttl)) == want
+    assert synth_all(io.BytesIO(rtttl.encode())) == want
+    for chunk in (1, 7, 1000, 100_000):
+        assert synth_all(rtttl, chunk) == want
+
+
+def test_length_and_rests_match_render_pcm():
+    np = pytest.importorskip("numpy")
+    from rtttl.render import render_pcm
+
+    for rtttl in RTTTL_MELODIES[:8]:
+        got = np.array(synth_all(rtttl), dtype=np.int16)
+        want = render_pcm(rtttl, RATE)
+        assert len(got) == len(want)
+        # Both square waves are never zero while a tone sounds.
+        assert ((got != 0) == (want != 0)).all()
+
+
+def test_phase_runs_on_across_notes():
+    # With continuous style two tied a's sound exactly like one half note.
+    tied = synth_all("t:d=4,o=5,b=120:a,a", waveform="sine", style_divisor=0)
+    half = synth_all("t:d=2,o=5,b=120:a", waveform="sine", style_divisor=0)
+    assert tied == half
+
+
+def test_pitch_is_exact():
+    samples = synth_all("t:d=1,o=4,b=30:a", style_divisor=0)  # 8 s of 440 Hz
+    rising = sum(1 for a, b in zip(samples, samples[1:]) if a < 0 <= b)
+    assert abs(rising - 8 * 440) <= 1
+
+
+def test_buffers_alternate_and_last_chunk_is_short():
+    synth = Synth(RATE, 1000)
+    synth.start("t:d=4,o=5,b=120:c,e")             # 8000 samples
+    chunks = []
+    buf = synth.next_chunk()
+    while buf is not None:
+        chunks.append(buf)
+        buf = synth.next_chunk()
+    assert len(chunks) == 8
+    assert chunks[0] is chunks[2] and chunks[1] is chunks[3]
+    assert chunks[0] is not chunks[1]
+    synth.start("t:d=4,o=5,b=100:c")               # 4800 samples
+    sizes = []
+    buf = synth.next_chunk()
+    while buf is not None:
+        sizes.append((type(buf).__name__, len(buf)))
+        buf = synth.next_chunk()
+    assert sizes[-1] == ("memoryview", 800) and sizes[0] == ("array", 1000)
+
+
+def test_bad_input():
+    synth = Synth(RATE)
+    assert synth.next_chunk() is None
+    assert not synth.start("no header")
+    assert not synth.start(io.BytesIO(b"no header"))
+    with pytest.raises(ValueError):
+        wave_table("sawtooth")
+    table = wave_table("triangle", 1000)
+    assert min(table) == -1000 and max(table) == 1000
+
+
+def test_wav_sink():
+    rtttl = RTTTL_MELODIES[21]
+    f = io.BytesIO()
+    synth = Synth(RATE)
+    synth.start(rtttl)
+    sink = WavSink(f, RATE)
+    n = synth.stream(sink)
+    sink.close()
+    f.seek(0)
+    with wave.open(f) as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, RATE)
+        assert w.getnframes() == n == len(synth_all(rtttl))
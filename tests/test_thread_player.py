@@ -0,0 +1,109 @@
+"""Engine thread (rtttl.thread_player) and its command queue."""
+
+import threading
+import time
+
+from rtttl import thread_player
+from rtttl.backends import NullBackend, RecordingBackend
+from rtttl.notes import transpose_frequency
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, simulate, tones
+from rtttl.thread_player import CommandQueue, ThreadedPlayer
+
+RTTTL = "t:d=4,o=5,b=120:c,e,p,g"
+
+
+def test_queue_is_bounded_fifo():
+    q = CommandQueue(3)
+    assert q.get() is None and len(q) == 0
+    for round_ in range(5):             # wraps around the slots
+        assert q.put(round_) and q.put("x") and q.put(None)
+        assert not q.put("full") and len(q) == 3
+        assert [q.get(), q.get()] == [round_, "x"]
+        assert len(q) == 1
+        assert q.get() is None and len(q) == 0
+
+
+def test_queue_across_threads():
+    q = CommandQueue(4)
+    got = []
+
+    def consume():
+        while len(got) < 1000:
+            item = q.get()
+            if item is None:
+                time.sleep(0)           # let the producer run
+            else:
+                got.append(item)
+
+    t = threading.Thread(target=consume)
+    t.start()
+    for i in range(1000):
+        while not q.put(i):
+            time.sleep(0)
+    t.join(10)
+    assert got == list(range(1000))
+
+
+def run_engine(engine, clock, monkeypatch, until):
+    """Run the engine loop on this thread with a virtual sleep_ms."""
+    def sleep_ms(ms):
+        clock.advance(ms * 1000)
+        if until():
+            engine._alive = False
+
+    monkeypatch.setattr(thread_player, "sleep_ms", sleep_ms)
+    engine._alive = engine._running = True
+    engine._loop()
+
+
+def test_engine_plays_queued_commands(monkeypatch):
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    engine = ThreadedPlayer(player, queue_size=4)
+    assert engine.set_transpose(12) and engine.start(RTTTL)
+    assert engine.pending() == 2
+    run_engine(engine, clock, monkeypatch, lambda: not player._is_running)
+    # Polled in whole milliseconds: tone stops may come up to 1 ms late.
+    got = tones(backend.events)
+    want = tones(simulate(RTTTL))
+    assert [hz for _, _, hz in got] == [transpose_frequency(hz, 12) for _, _, hz in want]
+    for (start, end, _), (want_start, want_end, _) in zip(got, want):
+        assert start == want_start and 0 <= end - want_end < 1000
+    assert engine.pending() == 0 and not engine._running
+
+
+def test_engine_keeps_going_after_a_bad_command(monkeypatch):
+    clock = VirtualClock()
+    player = PlayRtttl(backend=RecordingBackend(clock), clock=clock)
+    engine = ThreadedPlayer(player)
+    engine.set_tempo(0)                 # ValueError on the engine thread
+    engine.start(RTTTL)
+    run_engine(engine, clock, monkeypatch, lambda: not player._is_running)
+    assert isinstance(engine.last_error, ValueError)
+    assert clock.now_us >= 2_000_000    # the song still played
+
+
+def test_full_queue_drops_commands():
+    engine = ThreadedPlayer(PlayRtttl(backend=NullBackend()), queue_size=2)
+    assert engine.start(RTTTL) and engine.seek(100)
+    assert not engine.stop()
+    assert engine.pending() == 2
+
+
+def test_real_thread_start_and_shutdown():
+    player = PlayRtttl(backend=NullBackend())
+    engine = ThreadedPlayer(player, poll_ms=1)
+    engine.run()
+    engine.run()                        # no second thread
+    try:
+        engine.start("t:d=32,o=5,b=900:c,e,g,c6")
+        for _ in range(1000):
+            if engine.is_playing():
+                break
+            threading.Event().wait(0.001)
+        assert engine.is_playing()
+    finally:
+        engine.shutdown()
+    assert not engine.is_playing() and not engine._running
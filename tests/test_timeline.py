@@ -0,0 +1,86 @@
+"""Playback position, token offsets and seeking (rtttl.timeline) in
+simulated time."""
+
+from rtttl.backends import NullBackend
+from rtttl.compiler import compile_rtttl
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock
+
+SONG = "Timeline:d=8,o=5,b=120,l=2:c,4e.,p,g#6,16a,2p,c6"
+
+
+def make_player():
+    clock = VirtualClock(1_000_000)
+    return PlayRtttl(backend=NullBackend(), clock=clock), clock
+
+
+def test_position_and_offset_follow_notes():
+    player, clock = make_player()
+    song = compile_rtttl(SONG)
+    index = song.index(SONG)
+    count = song.note_count
+    assert player.start(SONG)
+    assert player.duration_ms() == 2 * index.total_us() // 1000
+
+    seen = []
+    note_pos = 0
+    while player.update():
+        pos = player.position_ms()
+        offset = player.source_offset()
+        if player._note_pos != note_pos:        # a note has just started
+            note_pos = player._note_pos
+            k = note_pos // 3 - 1
+            loop = player._loops_total - player._loops_left
+            assert pos == (loop * index.total_us() + index.starts[k]) // 1000
+            assert offset == index.offsets[k]
+            seen.append(SONG[offset])
+        # half-way to the next event the position has moved on with the clock
+        wait = player._us_until_next_event()
+        clock.advance(wait // 2)
+        assert pos <= player.position_ms() <= pos + wait // 1000 + 1
+        clock.advance(wait - wait // 2)
+    assert seen == list("c4pg12c") * 2
+    assert player.position_ms() == 0
+    assert player.source_offset() == -1
+    assert len(seen) == 2 * count
+
+
+def test_offsets_point_at_tokens():
+    for rtttl in RTTTL_MELODIES:
+        song = compile_rtttl(rtttl)
+        offsets = song.index(rtttl).offsets
+        assert len(offsets) == song.note_count
+        for k, offset in enumerate(offsets):
+            assert offset >= song.header.notes_start
+            assert rtttl[offset - 1] in ":,", (rtttl, k)
+
+
+def test_seek():
+    player, clock = make_player()
+    index = compile_rtttl(SONG).index()
+    total_ms = index.total_us() // 1000
+    assert player.start(SONG)
+    for ms in (0, 1, index.starts[3] // 1000, total_ms - 1, total_ms + 300, 0):
+        assert player.seek(ms)
+        assert player.position_ms() == ms
+        clock.advance(100_000)
+        player.update()
+        if player.is_playing():
+            assert player.position_ms() == ms + 100
+    assert player.seek(2 * total_ms)
+    assert not player.is_playing()
+    assert not player.seek(0)
+    assert player.position_ms() == 0
+
+
+def test_streamed_song_has_no_position():
+    import io
+
+    player, clock = make_player()
+    assert player.start_stream(io.BytesIO(SONG.encode()))
+    player.update()
+    assert player.duration_ms() == -1
+    assert player.position_ms() == -1
+    assert player.source_offset() == -1
+    assert not player.seek(10)
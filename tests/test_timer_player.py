@@ -0,0 +1,102 @@
+"""Timer-driven player (rtttl.timer_player) on a virtual timer and clock."""
+
+import io
+
+import pytest
+
+from rtttl.backends import RecordingBackend
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.simulate import VirtualClock, simulate, tones
+from rtttl.timer_player import HostTimer, TimerPlayRtttl
+
+
+class VirtualTimer:
+    """One-shot ``machine.Timer`` fired by hand on a VirtualClock."""
+
+    ONE_SHOT = 0
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.due = None
+        self.callback = None
+        self.periods = []
+
+    def init(self, mode=ONE_SHOT, period=0, callback=None):
+        self.due = self.clock.now_us + period * 1000
+        self.callback = callback
+        self.periods.append(period)
+
+    def deinit(self):
+        self.due = None
+
+    def run(self):
+        while self.due is not None:
+            self.clock.now_us = self.due
+            self.due = None
+            self.callback(self)
+
+
+def make_player():
+    clock = VirtualClock()
+    timer = VirtualTimer(clock)
+    backend = RecordingBackend(clock)
+    return TimerPlayRtttl(backend=backend, clock=clock, timer=timer), timer, backend
+
+
+def assert_close_to_simulated(got, rtttl):
+    want = tones(simulate(rtttl))
+    assert [hz for _, _, hz in got] == [hz for _, _, hz in want]
+    for (start, _, _), (want_start, _, _) in zip(got, want):
+        # periods are rounded up to whole ms; the timeline absorbs it
+        assert 0 <= start - want_start < 1000
+
+
+def test_timer_plays_the_song():
+    for rtttl in RTTTL_MELODIES[:5]:
+        player, timer, backend = make_player()
+        assert player.start(rtttl)
+        timer.run()
+        assert not player.is_playing()
+        assert min(timer.periods) >= 1
+        assert_close_to_simulated(tones(backend.events), rtttl)
+
+
+def test_start_stream_compiles_first():
+    rtttl = RTTTL_MELODIES[3]
+    player, timer, backend = make_player()
+    assert player.start_stream(io.BytesIO(rtttl.encode()), chunk_size=8)
+    timer.run()
+    assert_close_to_simulated(tones(backend.events), rtttl)
+    assert not player.start_stream(io.BytesIO(b"no header"))
+
+
+def test_enqueue_compiles_now_and_plays_gaplessly():
+    player, timer, backend = make_player()
+    with pytest.raises(ValueError):
+        player.enqueue("no header")
+    player.enqueue(RTTTL_MELODIES[0])
+    player.enqueue(RTTTL_MELODIES[1])
+    timer.run()
+    got = tones(backend.events)
+    first = tones(simulate(RTTTL_MELODIES[0]))
+    assert len(got) == len(first) + len(tones(simulate(RTTTL_MELODIES[1])))
+
+
+def test_stop_and_seek_rearm_the_timer():
+    player, timer, backend = make_player()
+    player.start(RTTTL_MELODIES[0])
+    assert player.seek(1_000)
+    assert timer.due is not None
+    player.stop()
+    assert timer.due is None and not player.is_playing()
+    assert backend.events[-1][1:] == ("duty", 0)
+
+
+def test_host_timer_plays_in_real_time():
+    backend = RecordingBackend()
+    player = TimerPlayRtttl(backend=backend, timer=HostTimer())
+    rtttl = "short:d=16,o=6,b=240:c,e,p,g"
+    player.play_blocking(rtttl)
+    assert not player.is_playing()
+    freqs = [hz for _, kind, hz in backend.events if kind == "freq"]
+    assert freqs == [hz for _, _, hz in tones(simulate(rtttl))]
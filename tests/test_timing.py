@@ -0,0 +1,66 @@
+"""Absolute note scheduling and lateness statistics (rtttl.timing)."""
+
+import random
+
+from rtttl.backends import RecordingBackend
+from rtttl.constants import RESYNC_LATENESS_US
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, simulate, tones
+from rtttl.timing import LatenessStats
+
+
+def test_lateness_histogram():
+    stats = LatenessStats(buckets=(100, 1_000))
+    for late in (0, -5, 100, 101, 1_000, 5_000):
+        stats.record(late)
+    snap = stats.snapshot()
+    assert snap["histogram"] == [(100, 3), (1_000, 2), (None, 1)]
+    assert snap["notes"] == 6 and snap["max_us"] == 5_000
+    assert snap["mean_us"] == (100 + 101 + 1_000 + 5_000) // 6
+    stats.reset()
+    assert stats.snapshot()["notes"] == 0 and list(stats.counts) == [0, 0, 0]
+
+
+def jittery_run(player, clock, rnd, max_poll_us):
+    starts = []
+    while True:
+        clock.advance(rnd.randint(1, max_poll_us))
+        before = len(player._pwm.events)
+        if not player.update():
+            return starts
+        if len(player._pwm.events) > before:
+            starts.append(clock.now_us)
+
+
+def test_late_polls_do_not_accumulate():
+    rnd = random.Random(4)
+    rtttl = RTTTL_MELODIES[21]
+    clock = VirtualClock()
+    player = PlayRtttl(backend=RecordingBackend(clock), clock=clock)
+    player.start(rtttl)
+    jittery_run(player, clock, rnd, 3_000)
+    got = tones(player._pwm.events)
+    want = tones(simulate(rtttl))
+    assert [hz for _, _, hz in got] == [hz for _, _, hz in want]
+    for (start, _, _), (want_start, _, _) in zip(got, want):
+        assert 0 <= start - want_start <= 3_000         # late, never drifting
+    late = player.lateness
+    assert late.notes >= len(want) and 0 < late.max <= 3_000 and late.resyncs == 0
+
+
+def test_long_stall_rebases_the_timeline():
+    rtttl = "t:d=4,o=5,b=120:c,d,e,f"
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    player.start(rtttl)
+    stall = 500_000 + RESYNC_LATENESS_US + 1_000    # second note this late
+    clock.advance(stall)
+    player.update()
+    while player.update():
+        clock.now_us = min(player._next_action_time, player._tone_stop_time
+                           if player._tone_on else player._next_action_time)
+    starts = [s for s, _, _ in tones(backend.events)]
+    assert starts == [0, stall, stall + 500_000, stall + 1_000_000]
+    assert player.lateness.resyncs == 1
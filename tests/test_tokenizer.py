@@ -0,0 +1,97 @@
+"""Byte tokenizer (rtttl.tokenizer) and compiler against the string parser."""
+
+import random
+from array import array
+
+from rtttl.bench import synthetic_corpus
+from rtttl.compiler import compile_rtttl
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.notes import get_frequency, tone_length
+from rtttl.parser import parse_header, parse_next_note, parse_next_note_us
+from rtttl import tokenizer
+from rtttl.tokenizer import parse_song
+
+_ALPHABET = "::::,,,=dobls0123456789#_.pcdefgabhP "
+
+
+def parser_notes(rtttl, us=False):
+    header = parse_header(rtttl)
+    parse = parse_next_note_us if us else parse_next_note
+    idx = header.notes_start
+    notes = []
+    while idx < len(rtttl):
+        note_index, octave, duration, idx = parse(rtttl, idx, header)
+        notes += (note_index, octave, duration)
+    return header, notes
+
+
+def tokenizer_notes(data, us=False):
+    header, notes, count = parse_song(data, us=us)
+    return header, list(notes[:count * 3])
+
+
+def test_melodies_and_corpus_match_parser():
+    for rtttl in list(RTTTL_MELODIES) + synthetic_corpus(50, 100):
+        for us in (False, True):
+            want = parser_notes(rtttl, us)[1]
+            encoded = rtttl.encode()
+            for data in (rtttl, encoded, bytearray(encoded), memoryview(encoded)):
+                assert tokenizer_notes(data, us)[1] == want
+
+
+def test_reused_buffer():
+    out = array('I')
+    for rtttl in synthetic_corpus(20, 50, seed=3):
+        header, notes, count = parse_song(rtttl.encode(), out)
+        assert notes is out
+        assert list(out[:count * 3]) == parser_notes(rtttl)[1]
+
+
+def test_random_strings_accepted_like_parse_header():
+    # Malformed headers can make parse_header() step over a colon; the
+    # tokenizer must accept exactly the same songs and read the same notes.
+    rnd = random.Random(12)
+    for _ in range(20_000):
+        prefix = rnd.choice(("", "n:", "x:d:", "a:o=5,", "q:b=", "s:d=8,o=5,b=120:"))
+        rtttl = prefix + "".join(rnd.choice(_ALPHABET) for _ in range(rnd.randint(0, 30)))
+        header = parse_header(rtttl)
+        got_header, got = tokenizer_notes(rtttl, us=True)
+        assert got_header.notes_start == header.notes_start, rtttl
+        assert (compile_rtttl(rtttl) is None) == (header.notes_start < 0), rtttl
+        if header.notes_start < 0:
+            continue
+        try:
+            want = parser_notes(rtttl, us=True)[1]
+        except IndexError:
+            continue        # parse_next_note() cannot read a bare trailing duration
+        assert got == want, rtttl
+
+
+def test_compile_matches_parser():
+    for rtttl in RTTTL_MELODIES:
+        header, notes = parser_notes(rtttl, us=True)
+        song = compile_rtttl(rtttl)
+        want = []
+        for i in range(0, len(notes), 3):
+            note_index, octave, duration_us = notes[i:i + 3]
+            if note_index <= 11:
+                tone_us = tone_length(duration_us, 16)
+                want += (get_frequency(note_index, octave), tone_us, duration_us - tone_us)
+            else:
+                want += (0, 0, duration_us)
+        assert list(song.notes) == want
+        assert song.header.name == header.name
+
+
+def test_non_ascii_name():
+    rtttl = "Für Élise:d=8,o=5,b=140:e6,d#6,e6"
+    header, notes = tokenizer_notes(rtttl.encode())
+    assert header.name == "Für Élise"
+    assert notes == parser_notes(rtttl)[1]
+
+
+def test_token_cache_refills(monkeypatch):
+    monkeypatch.setattr(tokenizer, "TOKEN_CACHE_SIZE", 8)
+    for rtttl in synthetic_corpus(20, 100, seed=5):
+        assert tokenizer_notes(rtttl.encode())[1] == parser_notes(rtttl)[1]
+    assert len(tokenizer._shapes) <= 8
@@ -0,0 +1,86 @@
+"""Transposition and tempo scaling (rtttl.notes, CompiledSong, PlayRtttl)."""
+
+import pytest
+
+from rtttl.backends import RecordingBackend
+from rtttl.compiler import compile_rtttl
+from rtttl.constants import FREQ_TABLE, KEY_COUNT, NOTES, TEMPO_ONE
+from rtttl.melodies import RTTTL_MELODIES
+from rtttl.notes import (get_frequency, key_of_frequency, scale_duration,
+                         tempo_factor, transpose_frequency)
+from rtttl.player import PlayRtttl
+from rtttl.simulate import VirtualClock, run, simulate, tones
+
+
+def test_frequency_table():
+    assert FREQ_TABLE[4 * 12 + 9] == 440                    # A4
+    assert NOTES == [2093, 2217, 2349, 2489, 2637, 2794,
+                     2960, 3136, 3322, 3520, 3729, 3951]     # octave 7
+    assert list(FREQ_TABLE) == sorted(set(FREQ_TABLE))
+    for key in range(KEY_COUNT):
+        assert key_of_frequency(FREQ_TABLE[key]) == key
+    assert key_of_frequency(0) == -1
+    assert key_of_frequency(445) == key_of_frequency(435) == 4 * 12 + 9
+
+
+def test_transpose_frequency():
+    a4 = get_frequency(9, 4)
+    assert transpose_frequency(a4, 12) == 880
+    assert transpose_frequency(a4, -12) == 220
+    assert transpose_frequency(a4, 3) == get_frequency(0, 5)
+    assert transpose_frequency(0, 5) == 0
+    assert transpose_frequency(FREQ_TABLE[0], -1) == FREQ_TABLE[0]
+    assert transpose_frequency(FREQ_TABLE[-1], 1) == FREQ_TABLE[-1]
+
+
+def test_tempo_arithmetic():
+    assert tempo_factor(1) == TEMPO_ONE
+    assert tempo_factor(2) == TEMPO_ONE // 2
+    assert tempo_factor(0.5) == TEMPO_ONE * 2
+    for bad in (0, -1):
+        with pytest.raises(ValueError):
+            tempo_factor(bad)
+    for duration in (0, 1, 1023, 1024, 250_000, 3_999_999):
+        for factor in (1, 341, 512, 1024, 1536, 4096):
+            assert scale_duration(duration, factor) == duration * factor // TEMPO_ONE
+
+
+def test_compiled_song_transposed_and_with_tempo():
+    song = compile_rtttl(RTTTL_MELODIES[21])
+    assert song.transposed(0) is song and song.with_tempo(1) is song
+    up = song.transposed(2)
+    for i in range(song.note_count):
+        freq, tone_us, gap_us = song.note(i)
+        assert up.note(i) == (transpose_frequency(freq, 2), tone_us, gap_us)
+    fast = song.with_tempo(2)
+    for i in range(song.note_count):
+        freq, tone_us, gap_us = song.note(i)
+        assert fast.note(i) == (freq, tone_us // 2, gap_us // 2)
+    assert fast.header is song.header
+
+
+def test_player_applies_transpose_and_tempo():
+    rtttl = "t:d=4,o=5,b=120:c,e,p,g"
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    player.set_transpose(-12)
+    player.set_tempo(2)
+    player.start(rtttl)
+    run(player, clock)
+    want = [(start // 2, end // 2, transpose_frequency(hz, -12))
+            for start, end, hz in tones(simulate(rtttl))]
+    assert tones(backend.events) == want
+    with pytest.raises(ValueError):
+        player.set_tempo(0)
+
+
+def test_transpose_changes_mid_song():
+    rtttl = "t:d=4,o=5,b=120:a,a,a"
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    player = PlayRtttl(backend=backend, clock=clock)
+    player.start(rtttl)
+    player.set_transpose(12)          # first note is already sounding
+    run(player, clock)
+    assert [hz for _, _, hz in tones(backend.events)] == [880, 1760, 1760]
@@ -0,0 +1,222 @@
+"""
+rtttl/thread_player.py
+~~~~~~~~~~~~~~~~~~~~~~
+Run a :class:`~rtttl.player.PlayRtttl` on its own thread.
+
+:class:`ThreadedPlayer` drives the player from a dedicated thread — the
+second core on a Pico W (``_thread``), a ``threading.Thread`` on CPython —
+so the main loop no longer pays for audio timing.  The application never
+touches the player directly.  Instead it posts commands (start, stop,
+seek, style, …) into a bounded single-producer / single-consumer
+:class:`CommandQueue`, and the engine thread applies them between notes.
+Only the engine thread ever mutates the player's state.
+
+Usage example::
+
+    from rtttl import PlayRtttl
+    from rtttl.thread_player import ThreadedPlayer
+    from rtttl.melodies import RTTTL_MELODIES
+
+    engine = ThreadedPlayer(PlayRtttl(pin=8))
+    engine.run()                              # starts the engine thread
+    engine.start(RTTTL_MELODIES[21])          # returns at once
+    ...
+    engine.seek(2_000)
+    engine.shutdown()
+
+``on_complete`` callbacks run on the engine thread.
+"""
+
+try:
+    import threading as _threading
+except ImportError:                     # MicroPython
+    _threading = None
+    import _thread
+
+from .compat import sleep_ms
+from .constants import COMMAND_QUEUE_SIZE, THREAD_POLL_MS
+
+
+class CommandQueue:
+    """Bounded single-producer / single-consumer queue without locks.
+
+    One thread may call :meth:`put` and one other thread :meth:`get`.  Each
+    index is written by one side only, and a slot is filled before the
+    index that publishes it moves, so no lock is needed.
+
+    Args:
+        size: Number of items the queue can hold.
+    """
+
+    def __init__(self, size: int = COMMAND_QUEUE_SIZE):
+        self._slots = [None] * (size + 1)   # one slot always stays empty
+        self._head  = 0                     # next slot to read (consumer)
+        self._tail  = 0                     # next slot to write (producer)
+
+    def put(self, item) -> bool:
+        """Append *item*; returns ``False`` if the queue is full."""
+        tail = self._tail
+        nxt = tail + 1
+        if nxt == len(self._slots):
+            nxt = 0
+        if nxt == self._head:
+            return False
+        self._slots[tail] = item
+        self._tail = nxt
+        return True
+
+    def get(self):
+        """Remove and return the oldest item, or ``None`` if empty."""
+        head = self._head
+        if head == self._tail:
+            return None
+        item = self._slots[head]
+        self._slots[head] = None
+        head += 1
+        if head == len(self._slots):
+            head = 0
+        self._head = head
+        return item
+
+    def __len__(self) -> int:
+        n = self._tail - self._head
+        return n if n >= 0 else n + len(self._slots)
+
+
+class ThreadedPlayer:
+    """Drive a player from a dedicated thread, controlled through a queue.
+
+    Once :meth:`run` has been called, only the engine thread may use
+    *player*.  Call the methods below from one thread only (the single
+    producer).  They return ``False`` if the command queue is full; the
+    command is then dropped.
+
+    Args:
+        player:     :class:`~rtttl.player.PlayRtttl` to drive.
+        queue_size: Number of commands that can be pending.
+        poll_ms:    Longest the engine sleeps before looking for new
+                    commands; it wakes earlier for every note event.
+    """
+
+    def __init__(self, player, queue_size: int = COMMAND_QUEUE_SIZE,
+                 poll_ms: int = THREAD_POLL_MS):
+        self.player     = player
+        self.poll_ms    = poll_ms
+        self.last_error = None      # last exception raised by a command
+        self._commands  = CommandQueue(queue_size)
+        self._alive     = False     # written by the producer only
+        self._running   = False     # written by the engine thread only
+        self._thread    = None
+
+    # ------------------------------------------------------------------
+    # Engine thread control
+    # ------------------------------------------------------------------
+
+    def run(self) -> None:
+        """Start the engine thread (no-op if it is already running)."""
+        if self._alive:
+            return
+        self._alive = True
+        self._running = True
+        if _threading is not None:
+            self._thread = _threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        else:
+            _thread.start_new_thread(self._loop, ())
+
+    def shutdown(self) -> None:
+        """Silence the output, stop the engine thread and wait for it."""
+        self._alive = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        else:
+            while self._running:
+                sleep_ms(1)
+
+    def is_playing(self) -> bool:
+        """``True`` while the engine is playing a song.
+
+        Commands still in the queue are not taken into account.
+        """
+        return self.player._is_running
+
+    def pending(self) -> int:
+        """Number of commands not yet applied."""
+        return len(self._commands)
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def post(self, method: str, *args) -> bool:
+        """Queue a call of ``player.<method>(*args)`` on the engine thread."""
+        return self._commands.put((method, args))
+
+    def start(self, rtttl, on_complete=None) -> bool:
+        """Queue :meth:`PlayRtttl.start() <rtttl.player.PlayRtttl.start>`.
+
+        Songs whose header cannot be parsed are ignored by the engine.
+        """
+        return self.post("start", rtttl, on_complete)
+
+    def start_stream(self, source, on_complete=None) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.start_stream`."""
+        return self.post("start_stream", source, on_complete)
+
+    def stop(self) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.stop`."""
+        return self.post("stop")
+
+    def seek(self, ms: int) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.seek`."""
+        return self.post("seek", ms)
+
+    def set_style(self, style_divisor: int) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.set_style`."""
+        return self.post("set_style", style_divisor)
+
+    def set_transpose(self, semitones: int) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.set_transpose`."""
+        return self.post("set_transpose", semitones)
+
+    def set_tempo(self, scale) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.set_tempo`."""
+        return self.post("set_tempo", scale)
+
+    def enqueue(self, rtttl, on_complete=None) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.enqueue`."""
+        return self.post("enqueue", rtttl, on_complete)
+
+    def skip(self) -> bool:
+        """Queue :meth:`~rtttl.player.PlayRtttl.skip`."""
+        return self.post("skip")
+
+    # ------------------------------------------------------------------
+    # Internal (engine thread)
+    # ------------------------------------------------------------------
+
+    def _loop(self) -> None:
+        player = self.player
+        commands = self._commands
+        poll_ms = self.poll_ms
+        try:
+            while self._alive:
+                cmd = commands.get()
+                while cmd is not None:
+                    try:
+                        getattr(player, cmd[0])(*cmd[1])
+                    except Exception as e:
+                        self.last_error = e
+                    cmd = commands.get()
+
+                wait = poll_ms
+                if player.update():
+                    wait = player._ms_until_next_event()
+                    if wait > poll_ms:
+                        wait = poll_ms
+                if wait:
+                    sleep_ms(wait)
+        finally:
+            player.stop()
+            self._running = False
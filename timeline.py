@@ -0,0 +1,97 @@
+"""
+rtttl/timeline.py
+~~~~~~~~~~~~~~~~~
+Note-time index for seeking and position reporting.
+
+A :class:`NoteIndex` holds the cumulative start time of every note of a
+compiled song, and optionally the offset of each note token in the RTTTL
+text.  Looking up which note plays at a given time is a binary search, so
+seeking never rescans the song.
+
+Usage example::
+
+    from rtttl.compiler import compile_rtttl
+
+    song = compile_rtttl("Nokia:d=4,o=5,b=112:8e6,8d6,f#5,g#5")
+    index = song.index()
+    k = index.find(600_000)          # note playing 600 ms into the song
+    print(index.starts[k], index.total_us())
+"""
+
+from array import array
+
+from .tokenizer import tokenize
+
+
+class NoteIndex:
+    """Cumulative note start times of one pass of a compiled song.
+
+    Attributes:
+        starts:  ``array('I')`` of ``note_count + 1`` start times in µs; the
+                 last entry is the length of one pass.
+        offsets: ``array('I')`` of byte offsets of each note token in the
+                 RTTTL text, or ``None`` if the text was not given.
+
+    Args:
+        song:  :class:`~rtttl.compiler.CompiledSong` to index.
+        rtttl: Optional source text of *song*, for :attr:`offsets`.
+    """
+
+    def __init__(self, song, rtttl=None):
+        notes = song.notes
+        starts = array('I', bytes(4 * (song.note_count + 1)))
+        t = 0
+        k = 1
+        for i in range(0, song.note_count * 3, 3):
+            t += notes[i + 1] + notes[i + 2]
+            starts[k] = t
+            k += 1
+        self.starts  = starts
+        self.offsets = None
+        if rtttl is not None:
+            self.offsets = _token_offsets(rtttl, song.header, song.note_count)
+
+    @classmethod
+    def from_arrays(cls, starts, offsets=None):
+        """Wrap existing :attr:`starts` / :attr:`offsets` arrays without
+        recomputing them."""
+        index = cls.__new__(cls)
+        index.starts  = starts
+        index.offsets = offsets
+        return index
+
+    def total_us(self) -> int:
+        """Length of one pass in µs."""
+        return self.starts[-1]
+
+    def find(self, t_us: int) -> int:
+        """Index of the note playing *t_us* µs into a pass.
+
+        Times past the end map to the last note; zero-length notes are
+        never returned when a later note starts at the same time.
+        """
+        starts = self.starts
+        lo = 0
+        hi = len(starts) - 2          # last note
+        if hi < 0:
+            return 0
+        while lo < hi:
+            mid = (lo + hi + 1) >> 1
+            if starts[mid] <= t_us:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+
+def _token_offsets(rtttl, header, count: int):
+    """Byte offset of each of the *count* note tokens of *rtttl*."""
+    data = rtttl.encode() if isinstance(rtttl, str) else rtttl
+    offsets = array('I', bytes(4 * count))
+    one = array('I', bytes(12))
+    pos = header.notes_start
+    end = len(data)
+    for k in range(count):
+        offsets[k] = pos
+        pos = tokenize(data, pos, end, header, one)[1]
+    return offsets
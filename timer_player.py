@@ -0,0 +1,192 @@
+"""
+rtttl/timer_player.py
+~~~~~~~~~~~~~~~~~~~~~
+Timer-driven RTTTL player: notes advance from ``machine.Timer`` callbacks.
+
+:class:`TimerPlayRtttl` re-arms a one-shot timer for every tone stop and
+note boundary, so playback keeps exact time no matter how long the main
+loop takes.  The callback only indexes into the pre-compiled note stream
+(see :mod:`rtttl.compiler`) and writes to the output backend; it does not
+allocate, so it is safe to run as a hard IRQ.
+
+Usage example::
+
+    from rtttl.timer_player import TimerPlayRtttl
+    from rtttl.melodies import RTTTL_MELODIES
+
+    player = TimerPlayRtttl(pin=8)
+    player.start(RTTTL_MELODIES[0])    # returns immediately; no update() needed
+
+Any object with the ``machine.Timer`` interface (``ONE_SHOT``,
+``init(mode=, period=, callback=)`` and ``deinit()``) can be passed as
+*timer*; :class:`HostTimer` provides one for CPython.
+"""
+
+from array import array
+
+from .compat import sleep_ms
+from .compiler import CompiledSong, note_triple
+from .constants import STREAM_CHUNK_SIZE, STYLE_DEFAULT
+from .player import PlayRtttl
+from .stream import NoteStream
+
+
+class TimerPlayRtttl(PlayRtttl):
+    """RTTTL player that schedules itself with one-shot timer callbacks.
+
+    Takes the same arguments as :class:`~rtttl.player.PlayRtttl`, plus:
+
+    Args:
+        timer: Timer to use.  Defaults to a virtual ``machine.Timer(-1)``.
+
+    ``on_complete`` callbacks run inside the timer callback, so on the
+    device they must not allocate memory when the timer is a hard IRQ.
+    Parsing allocates, so :meth:`start_stream` reads and compiles the whole
+    song before it starts, and :meth:`enqueue` compiles each song straight
+    away: handing over to the next playlist song inside the callback only
+    swaps arrays.
+    """
+
+    def __init__(self, *args, timer=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if timer is None:
+            from machine import Timer   # deferred: only needed on hardware
+            timer = Timer(-1)
+        self._timer    = timer
+        self._one_shot = timer.ONE_SHOT
+        # Bound once here: creating a bound method inside the IRQ allocates.
+        self._timer_cb = self._on_timer
+
+    def start(self, rtttl, on_complete=None) -> bool:
+        """Begin playback; the timer drives it from here on.
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        self._timer.deinit()
+        if not super().start(rtttl, on_complete):
+            return False
+        if self._is_running:
+            self._arm()
+        return True
+
+    def start_at(self, rtttl, at_us: int, on_complete=None) -> bool:
+        """Like :meth:`start`, but the first note begins at clock time *at_us*."""
+        self._timer.deinit()
+        if not super().start_at(rtttl, at_us, on_complete):
+            return False
+        if self._is_running:
+            self._arm()
+        return True
+
+    def start_stream(self, source, on_complete=None,
+                     chunk_size: int = STREAM_CHUNK_SIZE) -> bool:
+        """Read a song from a file or byte stream, compile it, and play it.
+
+        The timer callback cannot parse, so unlike
+        :meth:`PlayRtttl.start_stream() <rtttl.player.PlayRtttl.start_stream>`
+        the whole song is compiled first: memory use grows with its length.
+
+        Returns:
+            ``True`` on success, ``False`` if the header could not be parsed.
+        """
+        stream = NoteStream(source, chunk_size)
+        header = stream.header
+        if header.notes_start < 0:
+            return False
+        style = header.style_divisor if header.style_divisor != STYLE_DEFAULT \
+            else self._style_divisor
+        notes = array('I')
+        for note_index, octave, duration_us in stream.notes_us():
+            notes.extend(note_triple(note_index, octave, duration_us, style))
+        return self.start(CompiledSong(header, notes, style), on_complete)
+
+    def stop(self) -> None:
+        """Cancel the timer, stop playback and silence the output."""
+        self._timer.deinit()
+        super().stop()
+
+    def seek(self, ms: int) -> bool:
+        """Jump to *ms* into the song and re-arm the timer for the new note."""
+        self._timer.deinit()
+        moved = super().seek(ms)
+        if self._is_running:
+            self._arm()
+        return moved
+
+    def enqueue(self, rtttl, on_complete=None) -> None:
+        """Compile *rtttl* now and add it to the playlist.
+
+        Raises:
+            ValueError: if the header cannot be parsed.
+        """
+        song = self._compile(rtttl)
+        if song is None:
+            raise ValueError("invalid RTTTL header")
+        song.index(rtttl if isinstance(rtttl, str) else None)
+        super().enqueue(song, on_complete)
+
+    def skip(self) -> bool:
+        """Start the next playlist song now and re-arm the timer for it."""
+        self._timer.deinit()
+        playing = super().skip()
+        if self._is_running:
+            self._arm()
+        return playing
+
+    def play_blocking(self, rtttl, sleep=None) -> None:
+        """Play an RTTTL string, compiled song or stream and sleep until the
+        timer has finished it.
+
+        *sleep* is as in :meth:`~rtttl.player.PlayRtttl.wait`.
+        """
+        if self._start_any(rtttl):
+            while self._is_running:
+                if self.next_deadline_ms() > 0:
+                    self.wait(sleep)
+                else:                       # event due: let the IRQ run
+                    sleep_ms(1)
+
+    # ------------------------------------------------------------------
+    # Internal (IRQ path: no allocations below this line)
+    # ------------------------------------------------------------------
+
+    def _on_timer(self, _timer) -> None:
+        if self.update():
+            self._arm()
+
+    def _arm(self) -> None:
+        # Timer periods are whole milliseconds; rounding up keeps every
+        # event at or after its due time, and the absolute note timeline
+        # absorbs the difference.
+        wait = self._ms_until_next_event()
+        if wait < 1:
+            wait = 1
+        self._timer.init(mode=self._one_shot, period=wait,
+                         callback=self._timer_cb)
+
+
+class HostTimer:
+    """``machine.Timer`` stand-in for CPython, built on ``threading.Timer``.
+
+    Only one-shot mode is implemented — enough to run
+    :class:`TimerPlayRtttl` on a Linux host.
+    """
+
+    ONE_SHOT = 0
+
+    def __init__(self, _id: int = -1):
+        self._thread = None
+
+    def init(self, mode: int = ONE_SHOT, period: int = 0, callback=None) -> None:
+        import threading
+
+        self.deinit()
+        self._thread = threading.Timer(period / 1000, callback, (self,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def deinit(self) -> None:
+        if self._thread is not None:
+            self._thread.cancel()
+            self._thread = None
@@ -0,0 +1,180 @@
+"""
+rtttl/timing.py
+~~~~~~~~~~~~~~~
+Note-start lateness statistics and optional playback counters.
+
+The player schedules every note on an absolute timeline measured from the
+start of the song, so a late poll delays one note but not the rest of the
+song.  :class:`LatenessStats` records how late each note actually began
+(the time between its scheduled start and the ``update()`` call that played
+it) as a running histogram, with the maximum and mean.
+
+Usage example::
+
+    player.start(song)
+    while player.update():
+        do_other_work()
+    print(player.lateness.snapshot())
+    # {'notes': 42, 'mean_us': 180, 'max_us': 1210, 'resyncs': 0,
+    #  'histogram': [(100, 20), (250, 14), …, (None, 0)]}
+
+:class:`PlayerStats` holds the counters behind
+:meth:`PlayRtttl.enable_stats() <rtttl.player.PlayRtttl.enable_stats>`:
+``update()`` calls and their cost, output writes, parse time and skipped
+notes.
+"""
+
+from array import array
+
+from .backends import OutputBackend
+from .compat import ticks_us, ticks_diff
+from .constants import LATENESS_BUCKETS_US
+
+
+class LatenessStats:
+    """Running histogram of note-start lateness.
+
+    :meth:`record` does not allocate, so it is safe to call on every note
+    (including from a timer callback).
+
+    Args:
+        buckets: Ascending upper bounds of the histogram buckets in µs.  One
+                 open-ended bucket is added for anything later.
+    """
+
+    def __init__(self, buckets=LATENESS_BUCKETS_US):
+        self.buckets = tuple(buckets)
+        self.counts  = array('I', [0] * (len(self.buckets) + 1))
+        self.notes   = 0
+        self.total   = 0   # µs
+        self.max     = 0   # µs
+        self.resyncs = 0   # timeline re-based after a stall
+
+    def record(self, late_us: int) -> None:
+        """Add one note that began *late_us* µs after its scheduled time."""
+        self.notes += 1
+        buckets = self.buckets
+        if late_us <= buckets[0]:           # the common, on-time case
+            self.counts[0] += 1
+            if late_us > 0:
+                self.total += late_us
+                if late_us > self.max:
+                    self.max = late_us
+            return
+        self.total += late_us
+        if late_us > self.max:
+            self.max = late_us
+        i = 1
+        n = len(buckets)
+        while i < n and late_us > buckets[i]:
+            i += 1
+        self.counts[i] += 1
+
+    def mean(self) -> int:
+        """Mean lateness in µs (0 before the first note)."""
+        return self.total // self.notes if self.notes else 0
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.notes   = 0
+        self.total   = 0
+        self.max     = 0
+        self.resyncs = 0
+
+    def snapshot(self) -> dict:
+        """Current statistics as a plain dict.
+
+        ``histogram`` lists ``(upper_bound_us, count)`` pairs; the bound of
+        the last, open-ended bucket is ``None``.
+        """
+        bounds = self.buckets + (None,)
+        return {
+            "notes":     self.notes,
+            "mean_us":   self.mean(),
+            "max_us":    self.max,
+            "resyncs":   self.resyncs,
+            "histogram": [(bounds[i], self.counts[i]) for i in range(len(bounds))],
+        }
+
+
+class PlayerStats:
+    """Playback counters filled in while instrumentation is enabled.
+
+    Attributes:
+        updates:       ``update()`` calls (nested calls count once).
+        idle_updates:  Calls that neither started a note nor stopped a tone.
+        update_us:     Total time spent in ``update()``, in µs.
+        max_update_us: Longest single ``update()`` call, in µs.
+        notes:         Notes started.
+        freq_writes:   ``freq()`` calls on the output backend.
+        duty_writes:   ``duty_u16()`` calls on the output backend.
+        output_us:     Time spent in those calls, in µs.
+        parse_calls:   Songs compiled plus stream notes parsed.
+        parse_us:      Time spent doing so, in µs.
+        skipped:       Notes jumped over by ``seek()`` or cut by ``skip()``.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero every counter."""
+        self.updates       = 0
+        self.idle_updates  = 0
+        self.update_us     = 0
+        self.max_update_us = 0
+        self.notes         = 0
+        self.freq_writes   = 0
+        self.duty_writes   = 0
+        self.output_us     = 0
+        self.parse_calls   = 0
+        self.parse_us      = 0
+        self.skipped       = 0
+        self._depth        = 0   # inside an instrumented update()
+
+    def snapshot(self) -> dict:
+        """Current counters as a plain dict."""
+        return {
+            "enabled":        True,
+            "updates":        self.updates,
+            "idle_updates":   self.idle_updates,
+            "update_us":      self.update_us,
+            "mean_update_us": self.update_us // self.updates if self.updates else 0,
+            "max_update_us":  self.max_update_us,
+            "notes":          self.notes,
+            "freq_writes":    self.freq_writes,
+            "duty_writes":    self.duty_writes,
+            "output_us":      self.output_us,
+            "parse_calls":    self.parse_calls,
+            "parse_us":       self.parse_us,
+            "skipped":        self.skipped,
+        }
+
+
+class ProbeBackend(OutputBackend):
+    """Output backend wrapper that counts and times every write.
+
+    Args:
+        backend: Backend to forward to (kept as :attr:`backend`).
+        stats:   :class:`PlayerStats` to update.
+    """
+
+    def __init__(self, backend, stats: PlayerStats):
+        self.backend = backend
+        self._stats  = stats
+
+    def freq(self, hz: int) -> None:
+        t0 = ticks_us()
+        self.backend.freq(hz)
+        stats = self._stats
+        stats.output_us += ticks_diff(ticks_us(), t0)
+        stats.freq_writes += 1
+
+    def duty_u16(self, value: int) -> None:
+        t0 = ticks_us()
+        self.backend.duty_u16(value)
+        stats = self._stats
+        stats.output_us += ticks_diff(ticks_us(), t0)
+        stats.duty_writes += 1
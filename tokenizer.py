@@ -0,0 +1,349 @@
+"""
+rtttl/tokenizer.py
+~~~~~~~~~~~~~~~~~~
+Table-driven RTTTL note tokenizer for ``bytes``, ``bytearray`` and
+``memoryview`` input.
+
+:func:`tokenize` walks the note section of a song once, classifying every
+byte with 256-entry lookup tables, and writes ``note_index, octave,
+duration`` triples straight into a caller-supplied ``array('I')``.  Nothing
+is sliced, decoded or allocated per note, and the input is never copied, so
+songs can be tokenized in place from a file buffer or a ``bytes`` constant
+in flash.  :func:`parse_song` is the one-call fast path that also parses
+the header and sizes the output buffer.  For ``bytes`` it first splits the
+note section at commas and looks the tokens up in a cache shared by all
+songs, so each distinct token is decoded byte by byte only once.
+
+The header is parsed by :func:`~rtttl.parser.parse_header`, so the same
+songs are accepted.  The notes are the same as calling
+:func:`~rtttl.parser.parse_next_note` token by token, as long as the note
+section is ASCII (as valid RTTTL is): other characters are read as one
+token per byte.
+
+Usage example::
+
+    from rtttl.tokenizer import parse_song
+
+    header, notes, count = parse_song(b"Nokia:d=4,o=5,b=112:8e6,8d6,f#5,g#5")
+    for i in range(0, count * 3, 3):
+        note_index, octave, duration_ms = notes[i], notes[i + 1], notes[i + 2]
+"""
+
+from array import array
+
+from .constants import TOKEN_CACHE_SIZE
+from .parser import SongHeader, parse_header
+
+_NOT_DIGIT = 255
+_PAUSE     = 42
+
+_COLON = 0x3A
+_COMMA = 0x2C
+
+
+def _build_tables():
+    digit = bytearray([_NOT_DIGIT] * 256)
+    for c in range(10):
+        digit[0x30 + c] = c
+    note = bytearray([_PAUSE] * 256)
+    for ch, index in (("c", 0), ("d", 2), ("e", 4), ("f", 5), ("g", 7),
+                      ("a", 9), ("b", 11), ("h", 11)):
+        note[ord(ch)] = index
+        note[ord(ch.upper())] = index
+    return bytes(digit), bytes(note)
+
+
+# byte → digit value (255 if not a digit); byte → note index (42 = pause)
+_DIGIT_VALUE, _NOTE_INDEX = _build_tables()
+
+
+def tokenize(data, pos: int, end: int, header, out, whole: int = 0,
+             first: int = 0):
+    """
+    Decode note tokens from ``data[pos:end]`` into *out*.
+
+    Args:
+        data:   ``bytes``, ``bytearray`` or ``memoryview`` holding the song.
+        pos:    Offset of the first note token (e.g. ``header.notes_start``).
+        end:    Offset just past the last byte to read.
+        header: :class:`~rtttl.parser.SongHeader` with the song defaults.
+        out:    Preallocated ``array('I')``; each note fills three slots with
+                ``note_index, octave, duration``.
+        whole:  Whole-note duration; defaults to
+                ``header.time_for_whole_note_ms``.  Pass
+                ``header.time_for_whole_note_us`` for microseconds.
+        first:  Number of notes already in *out*; writing starts after them.
+
+    Returns:
+        Tuple ``(count, next_pos)`` — notes written by this call and the
+        offset after the last token read.  If *out* fills up before *end*,
+        ``next_pos`` is where to resume.
+    """
+    if not whole:
+        whole = header.time_for_whole_note_ms
+    default_duration = header.default_duration
+    default_octave = header.default_octave
+    digit = _DIGIT_VALUE
+    note = _NOTE_INDEX
+    i = start = first * 3
+    cap = len(out) - 2
+    tail = end - 6      # from here on, the rest of a token may hit *end*
+
+    # Byte values are literals below: module-level names would cost a
+    # global lookup per byte on CPython.
+    while pos < end and i < cap:
+        # --- duration digits ---
+        num = 0
+        d = digit[data[pos]]
+        while d != 255:                 # _NOT_DIGIT
+            num = num * 10 + d
+            pos += 1
+            if pos >= end:
+                break
+            d = digit[data[pos]]
+        duration = whole // (num or default_duration)
+        octave = default_octave
+
+        if pos <= tail:
+            # Fast path: letter, sharp, dot, octave, dot and comma are at
+            # most six bytes, so no bounds checks are needed.
+            index = note[data[pos]]
+            c = data[pos + 1]
+            pos += 2
+            if c == 0x23 or c == 0x5F:  # '#' or '_'
+                if index <= 11:
+                    index += 1
+                c = data[pos]
+                pos += 1
+            if c == 0x2E:               # '.'
+                duration += duration // 2
+                c = data[pos]
+                pos += 1
+            d = digit[c]
+            if d != 255:
+                octave = d
+                c = data[pos]
+                pos += 1
+            if c == 0x2E:               # '.'
+                duration += duration // 2
+                c = data[pos]
+                pos += 1
+            if c != 0x2C:               # ','
+                pos -= 1        # *c* starts the next token
+
+        elif pos >= end:
+            out[i] = 42                 # _PAUSE
+            out[i + 1] = default_octave
+            out[i + 2] = duration
+            i += 3
+            break
+
+        else:
+            # Last few bytes: same steps, checking *end* each time.
+            index = note[data[pos]]
+            pos += 1
+            if pos < end:
+                c = data[pos]
+                if c == 0x23 or c == 0x5F:  # '#' or '_'
+                    if index <= 11:
+                        index += 1
+                    pos += 1
+            if pos < end and data[pos] == 0x2E:
+                duration += duration // 2
+                pos += 1
+            if pos < end:
+                d = digit[data[pos]]
+                if d != 255:
+                    octave = d
+                    pos += 1
+            if pos < end and data[pos] == 0x2E:
+                duration += duration // 2
+                pos += 1
+            if pos < end and data[pos] == 0x2C:
+                pos += 1
+
+        out[i] = index
+        out[i + 1] = octave
+        out[i + 2] = duration
+        i += 3
+
+    return (i - start) // 3, pos
+
+
+def parse_song(data, out=None, us: bool = False):
+    """
+    Parse a whole song — header and notes — in one pass.
+
+    Args:
+        data: Song as ``bytes``, ``bytearray`` or ``memoryview`` (a ``str``
+              is encoded first).
+        out:  Optional preallocated ``array('I')``, reused across calls to
+              avoid allocating.  It is extended if it is too small; if
+              omitted, a buffer of the right size is allocated.
+        us:   Durations in microseconds instead of milliseconds.
+
+    Returns:
+        Tuple ``(header, notes, count)``.  *notes* holds *count* triples and
+        may be longer than ``3 * count`` only if *out* was supplied.
+        ``count`` is 0 and ``header.notes_start`` is -1 if the header could
+        not be parsed.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    end = len(data)
+
+    # The header is short: parse up to the second colon as text.  When
+    # parse_header() accepts that prefix it ends exactly at the colon, as it
+    # would on the whole song.  A malformed header can make it step over a
+    # colon; only then is the whole song decoded, so that acceptance always
+    # matches parse_header().
+    first = _find(data, _COLON, 0, end)
+    second = _find(data, _COLON, first + 1, end) if first >= 0 else -1
+    text = str(bytes(data[:second + 1 if second >= 0 else end]), "utf-8")
+    header = parse_header(text)
+    if header.notes_start < 0 and 0 <= second < end - 1:
+        text = str(bytes(data), "utf-8")
+        header = parse_header(text)
+    if header.notes_start > 0:
+        # character offset → byte offset (they differ for non-ASCII names)
+        header.notes_start = len(text[:header.notes_start].encode())
+    if header.notes_start < 0:
+        return header, out if out is not None else array('I'), 0
+    second = header.notes_start - 1
+
+    whole = header.time_for_whole_note_us if us else header.time_for_whole_note_ms
+    need = 3 * (_count(data, _COMMA, second + 1, end) + 1)
+    if out is None:
+        out = array('I', bytes(4 * need))
+    elif len(out) < need:
+        out.extend(array('I', bytes(4 * (need - len(out)))))
+
+    count = 0
+    pos = second + 1
+    if isinstance(data, bytes):
+        count, pos = _split_tokens(data, pos, end, header, out, whole)
+    n, pos = tokenize(data, pos, end, header, out, whole, count)
+    count += n
+    while pos < end:
+        # Out of room (tokens without commas between them): every note
+        # takes at least one byte, so this is enough for the rest.
+        out.extend(array('I', bytes(12 * (end - pos))))
+        n, pos = tokenize(data, pos, end, header, out, whole, count)
+        count += n
+    return header, out, count
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+# Token → (note_index, octave, duration code); octave 10 stands for the
+# song's default octave.  Independent of the header, so shared by all songs.
+_shapes = {}
+# Duration code → (duration digits, dots), and the reverse mapping
+_codes    = []
+_code_ids = {}
+
+_SHAPE_HEADER = SongHeader()
+_SHAPE_HEADER.default_duration = 1
+_SHAPE_HEADER.default_octave   = 10
+
+
+def _split_tokens(data: bytes, pos: int, end: int, header, out, whole: int):
+    """
+    Decode the comma-separated tokens of ``data[pos:end]`` into *out*.
+
+    The note section is split at C speed, and each token is looked up in
+    ``_shapes``: songs are built from a small vocabulary of tokens, so only
+    the first occurrence of each is decoded byte by byte (by
+    :func:`tokenize`).  Unlike :func:`tokenize`, this allocates the token
+    strings.  It stops before any token that is not exactly one note;
+    :func:`tokenize` carries on from the returned offset.
+
+    *out* must have room for one note per token.
+
+    Returns:
+        Tuple ``(count, next_pos)`` as for :func:`tokenize`.
+    """
+    tokens = data[pos:end].split(b",")
+    if not tokens[-1]:
+        tokens.pop()                    # nothing after the last comma
+    shapes = _shapes
+    octaves = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, header.default_octave]
+    durations = _durations(whole, header.default_duration, 0)
+    i = 0
+    for tok in tokens:
+        try:
+            index, octave, code = shapes[tok]
+        except KeyError:
+            shape = _shape(tok)
+            if shape is None:
+                break
+            if len(shapes) >= TOKEN_CACHE_SIZE:
+                shapes.clear()
+                _codes.clear()
+                _code_ids.clear()
+                durations = []
+            index, octave, num, dots = shape
+            code = _code_ids.get((num, dots))
+            if code is None:
+                code = _code_ids[num, dots] = len(_codes)
+                _codes.append((num, dots))
+            shapes[tok] = index, octave, code
+            durations += _durations(whole, header.default_duration,
+                                    len(durations))
+        out[i] = index
+        out[i + 1] = octaves[octave]
+        out[i + 2] = durations[code]
+        i += 3
+    count = i // 3
+    pos += sum(map(len, tokens[:count])) + count
+    return count, pos if pos < end else end
+
+
+def _durations(whole: int, default: int, first: int) -> list:
+    """Durations of the codes in ``_codes[first:]``."""
+    result = []
+    for num, dots in _codes[first:]:
+        duration = whole // (num or default)
+        for _ in range(dots):
+            duration += duration // 2
+        result.append(duration)
+    return result
+
+
+def _shape(tok: bytes):
+    """Header-independent decoding of one token, as ``(note_index, octave,
+    duration digits, dots)``, or ``None`` if *tok* is not exactly one
+    note."""
+    digits = len(tok) - len(tok.lstrip(b"0123456789"))
+    if digits == len(tok):
+        return None                     # its note letter would be the comma
+    num = int(tok[:digits]) if digits else 0
+    # With a whole note of 4 units the dots give 4, 6 or 9 units.
+    one = array('I', bytes(12))
+    n, pos = tokenize(tok, 0, len(tok), _SHAPE_HEADER, one, 4 * (num or 1))
+    if n != 1 or pos != len(tok):
+        return None
+    return one[0], one[1], num, (4, 6, 9).index(one[2])
+
+
+def _find(data, byte: int, start: int, end: int) -> int:
+    """Offset of *byte* in ``data[start:end]``, or -1."""
+    if hasattr(data, "find"):           # bytes / bytearray: C speed
+        return data.find(bytes((byte,)), start, end)
+    for pos in range(start, end):       # memoryview
+        if data[pos] == byte:
+            return pos
+    return -1
+
+
+def _count(data, byte: int, start: int, end: int) -> int:
+    """Number of *byte* values in ``data[start:end]``."""
+    if hasattr(data, "count"):
+        return data.count(bytes((byte,)), start, end)
+    n = 0
+    for pos in range(start, end):
+        if data[pos] == byte:
+            n += 1
+    return n